@@ -0,0 +1,139 @@
+"""
+Ambient light auto-brightness
+A light sensor (an LDR divider or a phototransistor) on an ADC pin is
+sampled on a hardware timer into an exponential moving average. The main
+loop maps the average onto a brightness curve and only moves to another
+level once the light has changed by more than a hysteresis band, so the
+strip doesn't flicker between two levels at dusk. A level set by hand
+(console, /device) is held until the light changes as much again or
+LIGHT_HOLD_SEC passes.
+
+machine is only needed to start sampling; the filter and curve also run
+on the host (tools/bench_auto_brightness.py).
+"""
+
+import constants
+import log
+from utils import ticks_ms, ticks_us, ticks_diff
+
+FRACTION_BITS = 4  # the average keeps 4 bits below the reading
+
+
+def curve_level(curve, light):
+    """Brightness for a light reading, interpolated between curve points"""
+    x0, y0 = curve[0]
+    if light <= x0:
+        return y0
+    for x1, y1 in curve[1:]:
+        if light <= x1:
+            return y0 + (y1 - y0) * (light - x0) // (x1 - x0)
+        x0, y0 = x1, y1
+    return y0
+
+
+class AutoBrightness:
+    def __init__(self, pin, level, curve=None, read=None, clock=None):
+        """
+        pin: ADC pin of the light sensor
+        level: brightness shown now, kept until the light says otherwise
+        curve: (reading, brightness %) points with rising readings, on the
+        0-65535 read_u16 scale
+        read: returns a reading, defaults to the pin's ADC (host
+        simulations pass their own)
+        clock: returns milliseconds for the hold timeout, defaults to
+        ticks_ms
+        """
+        self.pin = pin
+        self.level = level
+        self.curve = curve or constants.LIGHT_CURVE
+        self.read = read
+        self.clock = clock or ticks_ms
+        self.average = None  # fixed point, FRACTION_BITS below the reading
+        self.timer = None
+        self.held_at = None  # clock() when a level was set by hand
+        self.held_exact = None  # the curve's level for the light at that time
+
+        # Overhead, from sample() on the timer and update() in the loop
+        self.samples = 0
+        self.sample_us = 0
+        self.updates = 0
+        self.update_us = 0
+
+    def start(self):
+        """Sample the sensor every LIGHT_SAMPLE_MS on a hardware timer"""
+        import machine
+
+        if self.read is None:
+            adc = machine.ADC(machine.Pin(self.pin))
+            adc.atten(machine.ADC.ATTN_11DB)  # The full 0-3.3 V range
+            self.read = adc.read_u16
+        self.timer = machine.Timer(constants.LIGHT_TIMER_ID)
+        self.timer.init(
+            period=constants.LIGHT_SAMPLE_MS,
+            mode=machine.Timer.PERIODIC,
+            callback=self.sample,
+        )
+        log.info("Auto-brightness on GPIO %s", self.pin)
+
+    def stop(self):
+        if self.timer:
+            self.timer.deinit()
+            self.timer = None
+
+    def sample(self, _timer=None):
+        """Fold one reading into the moving average (the timer callback)"""
+        start = ticks_us()
+        reading = self.read() << FRACTION_BITS
+        if self.average is None:
+            self.average = reading
+        else:
+            self.average += (reading - self.average) >> constants.LIGHT_EMA_SHIFT
+        self.samples += 1
+        self.sample_us += ticks_diff(ticks_us(), start)
+
+    def hold(self, level):
+        """
+        Show a level set by hand instead of the curve's, until the light
+        moves by more than the hysteresis band or LIGHT_HOLD_SEC passes
+        """
+        self.level = level
+        self.held_at = self.clock()
+        self.held_exact = None
+        if self.average is not None:
+            self.held_exact = curve_level(self.curve, self.average >> FRACTION_BITS)
+
+    def update(self):
+        """
+        Call from the main loop; returns the new brightness level once the
+        light is far enough from the current level's, otherwise None
+        """
+        average = self.average
+        if average is None:
+            return None
+        start = ticks_us()
+        exact = curve_level(self.curve, average >> FRACTION_BITS)
+        step = constants.BRIGHTNESS_STEP
+        band = step // 2 + constants.LIGHT_HYSTERESIS
+        level = None
+        if self.held_at is not None:
+            if self.held_exact is None:
+                self.held_exact = exact  # Held before the first sample
+            held_ms = ticks_diff(self.clock(), self.held_at)
+            expired = held_ms >= constants.LIGHT_HOLD_SEC * 1000
+            if expired or abs(exact - self.held_exact) > band:
+                self.held_at = None  # The room changed, or the hold ran out
+        if self.held_at is None and abs(exact - self.level) > band:
+            level = (exact + step // 2) // step * step
+            self.level = level
+        self.updates += 1
+        self.update_us += ticks_diff(ticks_us(), start)
+        return level
+
+    def stats(self):
+        return {
+            "level": self.level,
+            "held": self.held_at is not None,
+            "light": None if self.average is None else self.average >> FRACTION_BITS,
+            "sample_us": self.sample_us // max(1, self.samples),
+            "update_us": self.update_us // max(1, self.updates),
+        }
@@ -0,0 +1,45 @@
+"""
+Colors precomputed for each brightness level
+Drawing code looks up colors already scaled to the current level instead
+of scaling the base colors on every draw, so a brightness change (from
+the light sensor) is just a switch to another table. Tables are built the
+first time a level is used and kept.
+"""
+
+import constants
+
+
+def scale(color, percent):
+    """Scale an RGB color by a brightness percentage (0-100)"""
+    return tuple(int(c * percent / 100) for c in color)
+
+
+class ColorTable:
+    def __init__(self, percent):
+        self.percent = percent
+        self.ours = scale(constants.COLOR_GREEN_BASE, percent)
+        self.theirs = scale(constants.COLOR_RED_BASE, percent)
+        self.other_team = scale(constants.COLOR_OTHER_TEAM_BASE, percent)
+        self.panel_text = scale(constants.COLOR_PANEL_TEXT_BASE, percent)
+        self.celebration_ours = scale(constants.COLOR_GREEN_CELEBRATION, percent)
+        self.celebration_theirs = scale(constants.COLOR_RED_CELEBRATION, percent)
+
+        # Spinner, AP mode and status pixels are already dim; they only
+        # dim further once the score is darker than they are
+        indicator = min(100, percent * 100 // constants.LOADING_BRIGHTNESS_PERCENT)
+        self.indicator = scale(constants.COLOR_BLUE_AP_MODE, indicator)
+        self.stale = scale(constants.COLOR_STALE_INDICATOR, indicator)
+        self.wifi_lost = scale(constants.COLOR_WIFI_LOST_INDICATOR, indicator)
+        self.intermission = scale(constants.COLOR_INTERMISSION_INDICATOR, indicator)
+
+
+_tables = {}
+
+
+def table(percent):
+    """The color table for a brightness level, built on first use"""
+    colors = _tables.get(percent)
+    if colors is None:
+        colors = ColorTable(percent)
+        _tables[percent] = colors
+    return colors
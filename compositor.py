@@ -0,0 +1,197 @@
+"""
+Layered display compositor
+The strip shows a merge of ordered layers rather than whatever wrote to it
+last: the score at the bottom, animations (Wi-Fi spinner, AP mode, goal
+celebrations) over it, status indicators over those, and a brightness and
+power mask applied last. Each layer keeps its own buffer and the layers
+are merged into the strip only when one of them has changed.
+
+Layers have the NeoPixel interface (n, buf, fill, item assignment, write),
+so drawing code and the effect player can target a layer unchanged.
+Layers are drawn from both the main loop and the network thread (the
+Wi-Fi spinner and AP mode fill), so frames are rendered under a lock.
+"""
+
+import _thread
+import log
+from utils import ticks_us, ticks_diff
+
+
+class Layer:
+    def __init__(self, compositor, name):
+        """
+        One layer of the display; pixels never set are transparent
+        Set pixels are tracked sparsely, a fill() covers the whole layer.
+        """
+        n = compositor.n
+        self.compositor = compositor
+        self.name = name
+        self.n = n
+        self.buf = bytearray(3 * n)  # GRB, the NeoPixel buffer order
+        self.mask = bytearray(n)  # 1 where a pixel has been set
+        self.pixels = []  # indices of set pixels
+        self.opaque = False  # every pixel set by fill()
+        self.dirty = False
+
+    # NeoPixel interface
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, index, color):
+        i = 3 * index
+        buf = self.buf
+        buf[i + 1], buf[i], buf[i + 2] = color
+        if not self.mask[index]:
+            self.mask[index] = 1
+            self.pixels.append(index)
+        self.dirty = True
+
+    def __getitem__(self, index):
+        i = 3 * index
+        buf = self.buf
+        return buf[i + 1], buf[i], buf[i + 2]
+
+    def fill(self, color):
+        """Set every pixel, covering everything below this layer"""
+        buf = self.buf
+        if not any(color):
+            buf[:] = self.compositor.blank
+        else:
+            r, g, b = color
+            for i in range(0, len(buf), 3):
+                buf[i] = g
+                buf[i + 1] = r
+                buf[i + 2] = b
+        self.opaque = True
+        self.dirty = True
+
+    def write(self):
+        """
+        Show this layer now
+        The buffer may have been written directly (the effect player reads
+        frames into it), so it always counts as changed.
+        """
+        self.dirty = True
+        self.compositor.render()
+
+    def clear(self):
+        """Make the whole layer transparent again"""
+        if not self.opaque and not self.pixels:
+            return
+        mask = self.mask
+        for index in self.pixels:
+            mask[index] = 0
+        self.pixels = []
+        self.opaque = False
+        self.dirty = True
+
+    @property
+    def empty(self):
+        return not self.opaque and not self.pixels
+
+    def merge_into(self, out):
+        """Copy the set pixels over out"""
+        buf = self.buf
+        if self.opaque:
+            out[:] = buf
+            return
+        for index in self.pixels:
+            i = 3 * index
+            out[i] = buf[i]
+            out[i + 1] = buf[i + 1]
+            out[i + 2] = buf[i + 2]
+
+
+class MaskLayer(Layer):
+    """
+    Brightness and power mask, applied after every other layer
+    Each channel of a set pixel scales the output below it: 255 passes it
+    through, 0 blacks it out, so fill((0, 0, 0)) blanks the whole strip.
+    """
+
+    def __init__(self, compositor, name):
+        super().__init__(compositor, name)
+        self.black = False
+
+    def fill(self, color):
+        super().fill(color)
+        self.black = not any(color)
+
+    def merge_into(self, out):
+        buf = self.buf
+        if self.opaque:
+            if self.black:
+                out[:] = buf
+                return
+            for i in range(len(out)):
+                out[i] = out[i] * buf[i] // 255
+            return
+        for index in self.pixels:
+            for i in range(3 * index, 3 * index + 3):
+                out[i] = out[i] * buf[i] // 255
+
+
+class Compositor:
+    def __init__(self, strip):
+        """
+        strip: NeoPixel (or BudgetedStrip) the merged frame is written to
+        """
+        self.strip = strip
+        self.n = strip.n
+        self.blank = bytes(3 * strip.n)
+
+        # Bottom to top
+        self.score = Layer(self, "score")
+        self.animation = Layer(self, "animation")
+        self.status = Layer(self, "status")
+        self.mask = MaskLayer(self, "mask")
+        self.layers = (self.score, self.animation, self.status, self.mask)
+        # One frame at a time: BudgetedStrip scales the strip buffer in
+        # place, so two renders at once could tear or scale a frame twice
+        self._lock = _thread.allocate_lock()
+
+        # Compositing time per frame; the strip write itself is excluded
+        self.frames = 0
+        self.last_us = 0
+        self.peak_us = 0
+        self.total_us = 0
+
+    def render(self, force=False):
+        """
+        Merge the layers into the strip if any of them changed
+        Returns True if a frame was written.
+        """
+        for layer in self.layers:
+            if layer.dirty:
+                break
+        else:
+            if not force:
+                return False
+
+        with self._lock:
+            start = ticks_us()
+            out = self.strip.buf
+            out[:] = self.blank
+            for layer in self.layers:
+                layer.dirty = False
+                if not layer.empty:
+                    layer.merge_into(out)
+            elapsed = ticks_diff(ticks_us(), start)
+
+            self.frames += 1
+            self.last_us = elapsed
+            self.total_us += elapsed
+            if elapsed > self.peak_us:
+                self.peak_us = elapsed
+            log.debug("Composited frame in %dus", elapsed)
+
+            self.strip.write()
+            return True
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "last_us": self.last_us,
+            "avg_us": self.total_us // max(1, self.frames),
+            "peak_us": self.peak_us,
+        }
@@ -5,29 +5,63 @@ Handles loading/saving WiFi credentials and other settings to a JSON file
 
 import json
 import constants
+import log
 
 DEFAULT_CONFIG = {
     "wifi": {"ssid": "", "password": "", "hostname": "wildsensor"},
     "device": {
         "team_abbrev": "MIN",
-        "poll_interval": constants.DEFAULT_POLL_INTERVAL,
+        "provider": constants.DEFAULT_PROVIDER,
         "brightness": constants.DEFAULT_BRIGHTNESS,
+        "sleep_mode": constants.DEFAULT_SLEEP_MODE,
+        "schedule_sleep": True,
+        "power_budget_ma": constants.LED_POWER_BUDGET_MA,
+        "log_level": constants.DEFAULT_LOG_LEVEL,
+        "heap_profile": False,
+        "teams": [],
+        "display": constants.DEFAULT_DISPLAY,
+        "watchdog": True,
+        "light_sensor": None,
+        "console": True,
     },
+    "hub": {"enabled": False, "key": ""},
 }
 
+# Device settings /device (and tools/fleet.py) may change, with the value
+# each takes: (type,), (int, lowest, highest) or (str, choice, ...)
+DEVICE_SETTINGS = {
+    "team_abbrev": (str,),
+    "provider": (str, "nhl", "nba", "mlb", "mock"),
+    "brightness": (int, 0, 100),
+    "sleep_mode": (str, "idle", "light", "deep"),
+    "schedule_sleep": (bool,),
+    "power_budget_ma": (int, 100, 20000),
+    "log_level": (str, "debug", "info", "warning", "error"),
+    "heap_profile": (bool,),
+    "teams": (list,),
+    "display": (str, "bars", "panel"),
+    "watchdog": (bool,),
+    "light_sensor": (dict,),  # {"pin": 34}, or None for no sensor
+    "console": (bool,),
+    "poll_interval": (int, 1, 3600),
+    "relay": (str,),  # "host:port", or "" to poll the API
+}
+# Settings the running box takes without a restart (main.apply_settings)
+LIVE_SETTINGS = ("brightness", "log_level", "poll_interval")
+
 
 def load_config():
     """Load configuration from file, return defaults if not found"""
     try:
         with open(constants.CONFIG_FILE, "r") as f:
             config = json.load(f)
-            print("Configuration loaded successfully")
+            log.info("Configuration loaded successfully")
             return config
     except OSError:
-        print("No configuration file found, using defaults")
+        log.info("No configuration file found, using defaults")
         return DEFAULT_CONFIG.copy()
     except Exception as e:
-        print(f"Error loading config: {e}")
+        log.error("Error loading config: %s", e)
         return DEFAULT_CONFIG.copy()
 
 
@@ -36,16 +70,58 @@ def save_config(config):
     try:
         with open(constants.CONFIG_FILE, "w") as f:
             json.dump(config, f)
-            print("Configuration saved successfully")
+            log.info("Configuration saved successfully")
         return True
     except Exception as e:
-        print(f"Error saving config: {e}")
+        log.error("Error saving config: %s", e)
         return False
 
 
-def get_wifi_credentials():
-    """Get WiFi credentials from config"""
-    config = load_config()
+def check_device_setting(key, value):
+    """Raises ValueError if value doesn't fit the device setting key"""
+    rule = DEVICE_SETTINGS[key]
+    kind = rule[0]
+    if value is None and key == "light_sensor":
+        return
+    # JSON true/false are ints to isinstance(), but not brightness levels
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ValueError(f"{key} must be {kind.__name__}, not {repr(value)}")
+    if kind is int and len(rule) == 3 and not rule[1] <= value <= rule[2]:
+        raise ValueError(f"{key} must be {rule[1]}-{rule[2]}, not {value}")
+    if kind is str and len(rule) > 1 and value not in rule[1:]:
+        raise ValueError(f"{key} must be one of {', '.join(rule[1:])}")
+    if key == "teams" and not all(isinstance(team, str) for team in value):
+        raise ValueError("teams must be team abbreviations")
+    if key == "light_sensor" and not isinstance(value.get("pin"), int):
+        raise ValueError("light_sensor needs a GPIO pin number")
+
+
+def apply_device_settings(config, settings):
+    """
+    Merge a dict of device settings into config["device"]
+    Returns (changed, unknown): the settings whose value changed, and the
+    names that aren't device settings (left out). Raises ValueError,
+    changing nothing, if any value is out of range or of the wrong type.
+    """
+    for key, value in settings.items():
+        if key in DEVICE_SETTINGS:
+            check_device_setting(key, value)
+    device = config.setdefault("device", {})
+    changed = {}
+    unknown = []
+    for key, value in settings.items():
+        if key not in DEVICE_SETTINGS:
+            unknown.append(key)
+        elif device.get(key) != value:
+            device[key] = value
+            changed[key] = value
+    return changed, unknown
+
+
+def get_wifi_credentials(config=None):
+    """Get WiFi credentials from config (loaded from flash if not given)"""
+    if config is None:
+        config = load_config()
     return (
         config.get("wifi", {}).get("ssid", ""),
         config.get("wifi", {}).get("password", ""),
@@ -0,0 +1,143 @@
+"""
+Minimal listener for the runtime configuration page
+Only a non-blocking socket is held while nobody is using the page. The
+config server, templates and form parser are imported on the first
+connection and released again after a spell without requests.
+A UDP socket answers discovery probes from tools/fleet.py.
+"""
+
+import gc
+import socket
+import sys
+import time
+import constants
+import heap_profile
+import log
+
+# Loaded for the page and dropped again when idle
+LAZY_MODULES = ("config_server", "template_loader")
+
+
+class ConfigListener:
+    def __init__(self, port=None, idle_sec=None, status=None, hello=None, apply=None):
+        """
+        port: TCP port for the configuration page
+        idle_sec: seconds without a request before the server is unloaded
+        status: returns the live device status, served at /status
+        hello: reply (bytes) to discovery probes on DISCOVERY_PORT, None
+        to leave discovery off
+        apply: puts settings changed through /device into effect
+        """
+        if port is None:
+            port = constants.DEFAULT_HTTP_PORT
+        if idle_sec is None:
+            idle_sec = constants.CONFIG_SERVER_IDLE_SEC
+        self.port = port
+        self.idle_ms = idle_sec * 1000
+        self.status = status
+        self.hello = hello
+        self.apply = apply
+        self.sock = None
+        self.probe_sock = None
+        self.server = None
+        self.loaded = ()  # modules this listener imported
+        self.last_request = 0
+
+    def open(self):
+        """Bind the listening socket, returns True on success"""
+        try:
+            addr = socket.getaddrinfo("0.0.0.0", self.port)[0][-1]
+            s = socket.socket()
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind(addr)
+            s.listen(1)
+            s.setblocking(False)
+            self.sock = s
+            log.info("Configuration page listening on port %s", self.port)
+        except OSError as e:
+            log.warning("Config listener not started: %s", e)
+            return False
+        if self.hello:
+            try:
+                u = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                u.bind(socket.getaddrinfo("0.0.0.0", constants.DISCOVERY_PORT)[0][-1])
+                u.setblocking(False)
+                self.probe_sock = u
+            except OSError as e:
+                log.warning("Discovery not answered: %s", e)
+        return True
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        if self.probe_sock:
+            self.probe_sock.close()
+            self.probe_sock = None
+        self.unload()
+
+    def load(self):
+        """Import the config server for the first request"""
+        before = [name for name in LAZY_MODULES if name not in sys.modules]
+        with heap_profile.section("load config server"):
+            from config_server import ConfigServer
+
+            self.server = ConfigServer(
+                self.port, status=self.status, apply=self.apply
+            )
+        self.loaded = before
+        log.info("Config server loaded")
+
+    def unload(self):
+        """Drop the config server and the modules loaded for it"""
+        if self.server is None:
+            return
+        self.server = None
+        for name in self.loaded:
+            sys.modules.pop(name, None)
+        self.loaded = ()
+        gc.collect()
+        log.info("Config server unloaded after idle")
+
+    def poll(self):
+        """
+        Call from the main loop: answers a waiting request, if any, and
+        unloads the server after CONFIG_SERVER_IDLE_SEC without one
+        """
+        if self.sock is None:
+            return
+        if self.probe_sock:
+            self.answer_probe()
+        try:
+            cl, addr = self.sock.accept()
+        except OSError:
+            cl = None  # No client waiting
+
+        now = time.ticks_ms()
+        if cl is None:
+            if self.server and time.ticks_diff(now, self.last_request) > self.idle_ms:
+                self.unload()
+            return
+
+        log.debug("Config client connected from %s", addr)
+        if self.server is None:
+            try:
+                self.load()
+            except Exception as e:
+                log.error("Could not load config server: %s", e, site="config-load")
+                cl.close()
+                return
+        self.last_request = now
+        self.server.handle_client(cl)
+
+    def answer_probe(self):
+        """Reply to a waiting discovery probe, if any"""
+        try:
+            data, addr = self.probe_sock.recvfrom(32)
+        except OSError:
+            return  # No probe waiting
+        if data == constants.DISCOVERY_PROBE:
+            try:
+                self.probe_sock.sendto(self.hello, addr)
+            except OSError as e:
+                log.debug("Discovery reply failed: %s", e)
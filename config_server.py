@@ -1,7 +1,8 @@
 """
-Optional: Run a persistent configuration web server
-This allows reconfiguration even when connected to WiFi
-Can be imported and started from main.py if desired
+Runtime configuration web server
+This allows reconfiguration even when connected to WiFi.
+main.py loads it on demand through config_listener; serve() still runs
+it as a standalone blocking server.
 """
 
 import socket
@@ -13,12 +14,20 @@ from config import (
     update_wifi_credentials,
     load_config,
     save_config,
+    apply_device_settings,
+    LIVE_SETTINGS,
 )
 from template_loader import load_template, render_template, serve_html
 from utils import url_decode_params
 import constants
+import heap_profile
+import log
 import machine
 
+JSON_HEADER = (
+    "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n\r\n"
+)
+
 
 def get_device_code():
     """Get unique device code from MAC address"""
@@ -26,11 +35,30 @@ def get_device_code():
     return mac[-4:].upper()
 
 
+def _same_key(given, key):
+    """Compare without stopping at the first difference"""
+    if len(given) != len(key):
+        return False
+    diff = 0
+    for a, b in zip(given, key):
+        diff |= ord(a) ^ ord(b)
+    return diff == 0
+
+
 class ConfigServer:
-    def __init__(self, port=None):
+    def __init__(self, port=None, status=None, apply=None):
+        """
+        port: TCP port to serve on
+        status: returns the live device status for /status, None to leave
+        the endpoint out
+        apply: takes a dict of LIVE_SETTINGS changed through /device and
+        puts them into effect; without it they wait for a restart
+        """
         if port is None:
             port = constants.DEFAULT_HTTP_PORT
         self.port = port
+        self.status = status
+        self.apply = apply
         self.running = False
 
     def get_config_page(self):
@@ -81,7 +109,7 @@ class ConfigServer:
             return response
 
         except Exception as e:
-            print(f"Error saving device settings: {e}")
+            log.error("Error saving device settings: %s", e)
             return f"HTTP/1.1 500 Internal Server Error\r\n\r\nError: {e}"
 
     def handle_save_wifi(self, request):
@@ -107,9 +135,192 @@ class ConfigServer:
             return response
 
         except Exception as e:
-            print(f"Error saving WiFi settings: {e}")
+            log.error("Error saving WiFi settings: %s", e)
             return f"HTTP/1.1 500 Internal Server Error\r\n\r\nError: {e}"
 
+    def handle_ota(self, request):
+        """
+        Pull changed files from the update server in the form's url field
+        The form's key field must match the hub key; without a hub key
+        set, updates are refused.
+        Returns the response and whether to restart into the new code
+        """
+        import ota
+        import watchdog
+
+        try:
+            body = request.split("\r\n\r\n")[1] if "\r\n\r\n" in request else ""
+            params = url_decode_params(body)
+            key = load_config().get("hub", {}).get("key", "")
+            if not key or not _same_key(params.get("key", ""), key):
+                log.warning("OTA refused: missing or wrong key")
+                return "HTTP/1.1 403 Forbidden\r\n\r\nWrong key", False
+            url = params.get("url", "")
+            if not url:
+                return "HTTP/1.1 400 Bad Request\r\n\r\nMissing url", False
+
+            # The download runs inside one loop pass; feed the watchdog
+            # per chunk so a slow update isn't reset half-way
+            files, fetched = ota.update(url, progress=watchdog.feed)
+            message = f"{files} files changed, {fetched} bytes fetched"
+            return f"HTTP/1.1 200 OK\r\n\r\n{message}", files > 0
+
+        except Exception as e:
+            log.error("OTA failed: %s", e)
+            return f"HTTP/1.1 500 Internal Server Error\r\n\r\nError: {e}", False
+
+    def get_log(self):
+        """Recent log entries from the RAM ring buffer as plain text"""
+        body = "\n".join(log.entries()) + "\n"
+        return (
+            "HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nConnection: close\r\n\r\n"
+            + body
+        )
+
+    def get_heap(self):
+        """Heap profile report as plain text"""
+        body = "\n".join(heap_profile.report()) + "\n"
+        return (
+            "HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nConnection: close\r\n\r\n"
+            + body
+        )
+
+    def get_history(self, request):
+        """
+        One page of the game history as JSON
+        GET /history?start=<seq>, ?since=<unix time>, &limit=<n>; without
+        start or since, the newest records.
+        """
+        import json
+        from history import History
+
+        target = request.split("\r\n", 1)[0].split(" ")[1]
+        params = url_decode_params(target.partition("?")[2])
+        try:
+            query = {
+                key: int(params[key])
+                for key in ("start", "since", "limit")
+                if params.get(key)
+            }
+        except ValueError:
+            return "HTTP/1.1 400 Bad Request\r\n\r\nstart, since and limit are numbers"
+
+        return JSON_HEADER + json.dumps(History().page(**query))
+
+    def get_status(self):
+        """Live device status as JSON (tools/fleet.py status)"""
+        import json
+
+        return JSON_HEADER + json.dumps(self.status())
+
+    def get_config_json(self):
+        """
+        config.json as JSON for tools/fleet.py config, without the secrets:
+        the Wi-Fi password and the hub key (it signs hub score packets)
+        """
+        import json
+
+        config = dict(load_config())
+        for section, secret in (("wifi", "password"), ("hub", "key")):
+            values = dict(config.get(section, {}))
+            values.pop(secret, None)
+            config[section] = values
+        return JSON_HEADER + json.dumps(config)
+
+    def handle_device(self, request):
+        """
+        Change device settings from a JSON object in the request body
+        Unlike the settings form, the box only restarts for ?restart=1, so
+        a fleet can be updated first and restarted in batches. Settings the
+        running box can take are applied at once ("changed"); the rest are
+        saved for the next boot ("pending_restart"). Returns the response
+        and whether to restart.
+        """
+        import json
+
+        head, _, body = request.partition("\r\n\r\n")
+        try:
+            settings = json.loads(body)
+        except ValueError:
+            settings = None
+        if not isinstance(settings, dict):
+            return "HTTP/1.1 400 Bad Request\r\n\r\nExpected a JSON object", False
+
+        config = load_config()
+        try:
+            changed, unknown = apply_device_settings(config, settings)
+        except ValueError as e:
+            return f"HTTP/1.1 400 Bad Request\r\n\r\n{e}", False
+        if changed and not save_config(config):
+            return "HTTP/1.1 500 Internal Server Error\r\n\r\nSave failed", False
+        live = {}
+        pending = {}
+        for key, value in changed.items():
+            if self.apply and key in LIVE_SETTINGS:
+                live[key] = value
+            else:
+                pending[key] = value
+        if live:
+            self.apply(live)
+        restart = bool(changed) and "restart=1" in head.split("\r\n", 1)[0]
+        result = {
+            "changed": live,
+            "pending_restart": pending,
+            "unknown": unknown,
+            "restart": restart,
+        }
+        return JSON_HEADER + json.dumps(result), restart
+
+    def handle_client(self, cl):
+        """Answer one request; a saved form restarts the device"""
+        try:
+            cl.settimeout(constants.AP_CLIENT_TIMEOUT_SEC)
+            request = cl.recv(1024).decode("utf-8")
+
+            restart = False
+            if "GET /config.json" in request:
+                response = self.get_config_json()
+            elif "GET / " in request or "GET /config" in request:
+                with heap_profile.section("render config page"):
+                    response = self.get_config_page()
+            elif "GET /status" in request and self.status:
+                response = self.get_status()
+            elif "POST /device" in request:
+                response, restart = self.handle_device(request)
+            elif "GET /history" in request:
+                response = self.get_history(request)
+            elif "GET /log" in request:
+                response = self.get_log()
+            elif "GET /heap" in request and heap_profile.enabled:
+                response = self.get_heap()
+            elif "POST /save_device" in request:
+                response = self.handle_save_device(request)
+                restart = True
+            elif "POST /save_wifi" in request:
+                response = self.handle_save_wifi(request)
+                restart = True
+            elif "POST /ota" in request:
+                response, restart = self.handle_ota(request)
+            else:
+                response = "HTTP/1.1 404 Not Found\r\n\r\n"
+
+            cl.send(response.encode("utf-8"))
+            cl.close()
+
+            if restart:
+                # Restart after saving
+                import time
+
+                time.sleep(3)
+                machine.reset()
+
+        except Exception as e:
+            log.error("Server error: %s", e, site="config-server")
+            try:
+                cl.close()
+            except:
+                pass
+
     def serve(self):
         """Start the web server"""
         addr = socket.getaddrinfo("0.0.0.0", self.port)[0][-1]
@@ -118,48 +329,16 @@ class ConfigServer:
         s.bind(addr)
         s.listen(1)
 
-        print(f"Configuration server running on port {self.port}")
+        log.info("Configuration server running on port %s", self.port)
         self.running = True
 
         while self.running:
             try:
                 cl, addr = s.accept()
-                request = cl.recv(1024).decode("utf-8")
-
-                if "GET / " in request or "GET /config" in request:
-                    response = self.get_config_page()
-                elif "POST /save_device" in request:
-                    response = self.handle_save_device(request)
-                    cl.send(response.encode("utf-8"))
-                    cl.close()
-                    # Restart after saving
-                    import time
-
-                    time.sleep(3)
-                    machine.reset()
-                    return
-                elif "POST /save_wifi" in request:
-                    response = self.handle_save_wifi(request)
-                    cl.send(response.encode("utf-8"))
-                    cl.close()
-                    # Restart after saving
-                    import time
-
-                    time.sleep(3)
-                    machine.reset()
-                    return
-                else:
-                    response = "HTTP/1.1 404 Not Found\r\n\r\n"
-
-                cl.send(response.encode("utf-8"))
-                cl.close()
-
-            except Exception as e:
-                print(f"Server error: {e}")
-                try:
-                    cl.close()
-                except:
-                    pass
+            except OSError as e:
+                log.error("Server error: %s", e, site="config-server")
+                continue
+            self.handle_client(cl)
 
         s.close()
 
@@ -167,9 +346,9 @@ class ConfigServer:
         """Start server in background thread"""
         try:
             _thread.start_new_thread(self.serve, ())
-            print(f"Config server started in background on port {self.port}")
+            log.info("Config server started in background on port %s", self.port)
         except Exception as e:
-            print(f"Could not start background server: {e}")
+            log.warning("Could not start background server: %s", e)
 
     def stop(self):
         """Stop the server"""
@@ -0,0 +1,212 @@
+"""
+Serial command console
+Reads short commands from the serial port (or the Thonny shell) without
+holding up the main loop: each pass polls sys.stdin with select and only
+reads the characters already waiting, so an idle console costs one
+zero-timeout poll. Whole lines are parsed into commands for the loop to
+run; replay files of commands are stepped through one line per pass.
+
+    s 2 1 [period]    set the score (goals go through the goal queue)
+    g [us|them]       a test goal for us (default) or the opponent
+    b 40              brightness in percent
+    m                 dump device metrics as JSON
+    r file...         replay commands from files on flash, r alone stops
+    w 500             wait before the next replayed line (ms)
+    h                 this help
+"""
+
+import select
+import sys
+
+import constants
+from utils import ticks_ms, ticks_us, ticks_diff, ticks_add
+
+# Short and long names of each command
+COMMANDS = {
+    "s": "score",
+    "g": "goal",
+    "b": "brightness",
+    "m": "metrics",
+    "r": "replay",
+    "w": "wait",
+    "h": "help",
+    "?": "help",
+}
+COMMANDS.update({name: name for name in tuple(COMMANDS.values())})
+
+NO_COMMANDS = ()
+
+
+def number(text, low, high):
+    value = int(text)
+    if not low <= value <= high:
+        raise ValueError(f"{text} not in {low}-{high}")
+    return value
+
+
+def parse(line):
+    """
+    A command line as (name, args); raises ValueError on bad input
+    Blank lines and # comments give None.
+    """
+    words = line.split()
+    if not words or words[0].startswith("#"):
+        return None
+    name = COMMANDS.get(words[0].lower())
+    args = words[1:]
+    if name is None:
+        raise ValueError(f"unknown command {words[0]}, h for help")
+    if name == "score":
+        if not 2 <= len(args) <= 3:
+            raise ValueError("s <ours> <theirs> [period]")
+        period = number(args[2], 1, 9) if len(args) == 3 else None
+        return name, (number(args[0], 0, 99), number(args[1], 0, 99), period)
+    if name == "goal":
+        side = args[0].lower() if args else "us"
+        if side not in ("us", "them"):
+            raise ValueError("g [us|them]")
+        return name, (side == "us",)
+    if name == "brightness":
+        if len(args) != 1:
+            raise ValueError("b <percent>")
+        return name, (number(args[0], 0, 100),)
+    if name == "wait":
+        if len(args) != 1:
+            raise ValueError("w <ms>")
+        return name, (number(args[0], 0, 3600000),)
+    if name == "replay":
+        return name, tuple(args)
+    return name, ()
+
+
+class Console:
+    def __init__(self, stream=None, out=None):
+        """
+        stream: where commands come from, defaults to sys.stdin
+        out: prints replies, defaults to print (host benchmarks pass their
+        own)
+        """
+        self.stream = stream or sys.stdin
+        self.out = out or print
+        self.poller = select.poll()
+        self.poller.register(self.stream, select.POLLIN)
+        self.line = []
+        self.replay_files = []
+        self.replay_file = None
+        self.replay_at = None  # ticks_ms when the next replayed line is due
+
+        # Overhead, from every poll() in the loop
+        self.polls = 0
+        self.poll_us = 0
+        self.commands = 0
+        self.errors = 0
+
+    def poll(self):
+        """
+        Call once per loop pass; returns the commands for the loop to run
+        (score, goal, brightness and metrics), handling the rest itself
+        """
+        start = ticks_us()
+        commands = NO_COMMANDS
+        for line in self.read_lines():
+            command = self.handle(line)
+            if command:
+                commands += (command,)
+        if self.replay_file:
+            command = self.replay_step()
+            if command:
+                commands += (command,)
+        self.polls += 1
+        self.poll_us += ticks_diff(ticks_us(), start)
+        return commands
+
+    def read_lines(self):
+        """Complete lines waiting on the stream, without blocking"""
+        lines = NO_COMMANDS
+        line = self.line
+        while self.poller.poll(0):
+            char = self.stream.read(1)
+            if not char:
+                break
+            if not isinstance(char, str):
+                char = char.decode()  # A host pipe gives bytes
+            if char in "\r\n":
+                if line:
+                    lines += ("".join(line),)
+                    line.clear()
+                    if len(lines) >= constants.CONSOLE_LINES_PER_LOOP:
+                        break
+            elif len(line) < constants.CONSOLE_MAX_LINE:
+                line.append(char)
+        return lines
+
+    def handle(self, line):
+        """Run a console-only command, or return one for the loop"""
+        try:
+            command = parse(line)
+        except ValueError as e:
+            self.errors += 1
+            self.out(f"? {e}")
+            return None
+        if command is None:
+            return None
+        self.commands += 1
+        name, args = command
+        if name == "help":
+            self.out(__doc__.split("\n\n", 1)[1].rstrip())
+        elif name == "replay":
+            self.start_replay(args)
+        elif name == "wait":
+            self.replay_at = ticks_add(ticks_ms(), args[0])
+        else:
+            return command
+        return None
+
+    def start_replay(self, paths):
+        self.stop_replay()
+        self.replay_files = list(paths)
+        if paths:
+            self.next_replay_file()
+
+    def next_replay_file(self):
+        while self.replay_files:
+            path = self.replay_files.pop(0)
+            try:
+                self.replay_file = open(path)
+                self.replay_at = None
+                self.out(f"replaying {path}")
+                return
+            except OSError as e:
+                self.errors += 1
+                self.out(f"? can't replay {path}: {e}")
+
+    def stop_replay(self):
+        if self.replay_file:
+            self.replay_file.close()
+            self.replay_file = None
+        self.replay_files = []
+        self.replay_at = None
+
+    def replay_step(self):
+        """The next replayed line once its wait is over, one per pass"""
+        if self.replay_at is not None:
+            if ticks_diff(ticks_ms(), self.replay_at) < 0:
+                return None
+            self.replay_at = None
+        line = self.replay_file.readline()
+        if not line:
+            self.replay_file.close()
+            self.replay_file = None
+            self.next_replay_file()
+            if not self.replay_file:
+                self.out("replay done")
+            return None
+        return self.handle(line)
+
+    def stats(self):
+        return {
+            "commands": self.commands,
+            "errors": self.errors,
+            "replaying": self.replay_file is not None,
+            "poll_us": self.poll_us // max(1, self.polls),
+        }
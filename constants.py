@@ -11,22 +11,89 @@ POWER_BUTTON_PIN = 0  # GPIO 0 (common boot button on ESP32)
 
 # LED Configuration
 NUM_LEDS = 96
+DEFAULT_DISPLAY = "bars"  # "bars" (8-LED point segments) or "panel" (glyphs.py text)
+RELAY_SETTLE_MS = 50  # let the strip supply settle before the first write
+
+# LED Power Model (WS2812B)
+LED_MA_PER_CHANNEL = 20  # mA per colour channel at 255
+LED_IDLE_MA = 1  # mA per LED when black but powered
+LED_POWER_BUDGET_MA = 2000  # frames are scaled down to fit this estimate
+RELAY_IDLE_OFF_SEC = 30  # switch the strip supply off after this long all-black
 
 # Brightness Constants (0-100 scale)
 DEFAULT_BRIGHTNESS = 50
 LOADING_BRIGHTNESS_PERCENT = 5
 LOADING_BRIGHTNESS_VALUE = int(255 * LOADING_BRIGHTNESS_PERCENT / 100)  # 13
 
+# Auto-brightness (device "light_sensor": {"pin": 34} in config.json)
+BRIGHTNESS_STEP = 5  # auto levels are multiples of this
+LIGHT_TIMER_ID = 1  # hardware timer 0 is the OTA confirm timeout
+LIGHT_SAMPLE_MS = 100
+LIGHT_EMA_SHIFT = 4  # each sample moves the average 1/16 of the way
+LIGHT_HYSTERESIS = 3  # extra brightness points past half a step before switching
+LIGHT_HOLD_SEC = 3600  # a level set by hand outlasts unchanged light this long
+# (read_u16 reading, brightness %) points, for an LDR to 3.3 V over 10k to GND
+LIGHT_CURVE = ((0, 5), (2000, 10), (12000, 40), (40000, 80), (65535, 100))
+
+# Game states in which the period and clock are running
+LIVE_GAME_STATES = ("LIVE", "CRIT")
+
 # Network Configuration
-DEFAULT_POLL_INTERVAL = 10  # seconds
+DEFAULT_PROVIDER = "nhl"  # provider_<name>.py: "nhl", "nba", "mlb" or "mock"
+DEFAULT_POLL_INTERVAL = 10  # seconds, when the provider doesn't recommend one
+TEAM_ROTATE_SEC = 15  # time each tracked team's game is shown
 NETWORK_CHUNK_SIZE = 256  # bytes
-NETWORK_BUFFER_SIZE = 600  # characters
+API_HOST = "api-web.nhle.com"
+SCORE_URL = "https://api-web.nhle.com/v1/score/now"
+PBP_URL_TEMPLATE = "https://api-web.nhle.com/v1/gamecenter/{}/play-by-play"
+SCORE_MAX_GAME_BYTES = 2048  # score/now game header held at most
+PBP_MAX_PLAY_BYTES = 2048  # largest single play kept in RAM
+SCHEDULE_URL_TEMPLATE = "https://api-web.nhle.com/v1/club-schedule/{}/week/now"
+
+# Schedule Sleep (deep sleep between games)
+SCHEDULE_REFRESH_SEC = 24 * 3600  # fetch the schedule once a day
+SCHEDULE_RETRY_SEC = 3600  # refetch this often while no game is left in the cache
+SCHEDULE_MAX_GAMES = 16  # games kept in the flash cache
+SCHEDULE_CHECK_SEC = 60  # how often the main loop considers sleeping
+SCHEDULE_WAKE_LEAD_SEC = 30 * 60  # wake this long before puck drop
+SCHEDULE_MIN_SLEEP_SEC = 20 * 60  # don't bother sleeping for less
+SCHEDULE_MAX_SLEEP_SEC = 12 * 3600  # wake at least this often to refresh
+GAME_WINDOW_SEC = 4 * 3600  # a game is treated as on for this long after start
+
+# Network Retry Policy
+BREAKER_FAILURE_THRESHOLD = 2  # consecutive failures before backing off
+BACKOFF_BASE_SEC = {"dns": 15, "connect": 15, "tls": 10, "http": 30}
+BACKOFF_MAX_SEC = 300
+PROBE_TIMEOUT_SEC = 3
+STALE_AFTER_SEC = 120  # show the stale indicator after this long without data
+COLOR_STALE_INDICATOR = (LOADING_BRIGHTNESS_VALUE, LOADING_BRIGHTNESS_VALUE // 2, 0)
+
+# Status Overlay (drawn over the score by the compositor)
+STATUS_STALE_PIXEL = NUM_LEDS - 1
+STATUS_WIFI_PIXEL = NUM_LEDS - 2
+STATUS_INTERMISSION_PIXEL = NUM_LEDS - 3
+COLOR_WIFI_LOST_INDICATOR = (0, 0, LOADING_BRIGHTNESS_VALUE)
+COLOR_INTERMISSION_INDICATOR = (LOADING_BRIGHTNESS_VALUE // 2,) * 3
+
+# LAN Hub Mode
+HUB_GROUP = "239.255.76.68"  # multicast group for score packets
+HUB_PORT = 5768
+HUB_TIMEOUT_SEC = 30  # follower promotes itself after this much hub silence
+HUB_TAKEOVER_SLOTS = 8  # extra seconds of stagger, chosen by device rank
+
+# Score Relay (tools/score_relay.py)
+RELAY_PORT = 5769  # raw TCP port, HTTP is served on RELAY_PORT + 1
+RELAY_TIMEOUT_SEC = 5
 
 # Power Button Configuration
 DEBOUNCE_SEC = 0.3  # seconds
+DEFAULT_SLEEP_MODE = "light"  # "idle", "light" or "deep"
 
 # Goal Celebration
 CELEBRATION_DURATION_SEC = 5
+# Pre-rendered celebrations (tools/render_effect.py); the pulse is used without
+GOAL_EFFECT_OURS = "goal_ours.fx"
+GOAL_EFFECT_THEIRS = "goal_theirs.fx"
 HORN_BLAST_COUNT = 3
 HORN_BLAST_DURATION_SEC = 1.0
 HORN_PAUSE_DURATION_SEC = 0.4
@@ -39,22 +106,93 @@ BUZZER_DUTY_CYCLE = 512
 # Base Colors (RGB at full brightness)
 COLOR_GREEN_BASE = (0, 50, 0)
 COLOR_RED_BASE = (50, 0, 0)
+COLOR_OTHER_TEAM_BASE = (40, 25, 0)  # other tracked teams, amber
+COLOR_PANEL_TEXT_BASE = (30, 30, 30)  # dash, period and clock on panels
 COLOR_GREEN_CELEBRATION = (0, 255, 0)
 COLOR_RED_CELEBRATION = (255, 0, 0)
 COLOR_BLUE_AP_MODE = (0, 0, LOADING_BRIGHTNESS_VALUE)
 
+# Logging
+DEFAULT_LOG_LEVEL = "info"
+LOG_RING_SIZE = 64  # entries kept in RAM
+LOG_RATE_LIMIT_MS = 10000  # default per call-site interval when site= is given
+LOG_FLUSH_PER_LOOP = 4  # entries written to the UART per main loop pass
+LOG_CRASH_ENTRIES = 32  # newest entries persisted on a crash
+
+# Serial Console
+CONSOLE_MAX_LINE = 64  # characters kept of one command line
+CONSOLE_LINES_PER_LOOP = 4  # commands taken from the serial port per loop pass
+
 # HTTP Server
 DEFAULT_HTTP_PORT = 80
+DISCOVERY_PORT = 5770  # UDP, answers tools/fleet.py discovery probes
+DISCOVERY_PROBE = b"SBFLEET?"
+CONFIG_SERVER_IDLE_SEC = 120  # unload the config page code after this long unused
 
 # Access Point Configuration
 AP_PASSWORD = "configure"
 AP_SSID_PREFIX = "scorebox"
+AP_STA_RETRY_SEC = (5, 10, 20, 40, 60)  # station retry backoff while in AP mode
+AP_LOOP_INTERVAL_MS = 50
+AP_CLIENT_TIMEOUT_SEC = 5
 
 # WiFi Connection
 WIFI_CONNECT_TIMEOUT_SEC = 15
 WIFI_CHECK_INTERVAL_SEC = 0.1  # Check every 0.1 seconds
+WIFI_FAST_TIMEOUT_MS = 1500  # give up on the cached BSSID after this long
+WIFI_LEASE_REUSE_SEC = 3600  # reuse the cached IP instead of DHCP while younger
+CLOCK_VALID_AFTER = 1704067200  # 2024-01-01 (unix); an earlier RTC was never set
+
+# Watchdog and Warm Restarts (device "watchdog": true in config.json)
+WDT_TIMEOUT_MS = 30000  # longer than any blocking step (celebration, Wi-Fi connect)
+WDT_STAMP_MS = 1000  # how often the last sign of life goes to RTC memory
+WDT_MAX_RESTARTS = 5  # crash restarts in a row before staying down for inspection
+WDT_STABLE_SEC = 300  # main loop uptime after which the restart count starts over
+WDT_SLEEP_SLICE_MS = WDT_TIMEOUT_MS // 2  # light sleep wakes to feed the watchdog
+
+# OTA Updates
+OTA_MANIFEST = "manifest.json"  # fetched from the update base URL
+OTA_CHUNK_SIZE = 1024  # bytes streamed to flash at a time
+OTA_CONFIRM_TIMEOUT_SEC = 120  # new code must reach the main loop within this
+
+# Game History (history.bin, served at /history)
+HISTORY_CAPACITY = 2048  # 16-byte records, about two seasons of score events
+HISTORY_PAGE_SIZE = 20  # records per /history page unless ?limit= is given
+HISTORY_PAGE_MAX = 50  # largest ?limit= served
+
+# Heap Profiling (device "heap_profile": true in config.json)
+# Imported in this order, so shared dependencies count towards the first
+HEAP_PROFILE_MODULES = (
+    "urequests",
+    "net_policy",
+    "play_by_play",
+    "score_feed",
+    "game_schedule",
+    "history",
+    "hub",
+    "led_power",
+    "compositor",
+    "color_tables",
+    "power_manager",
+    "rtc_state",
+    "watchdog",
+    "console",
+    "config_listener",
+    "template_loader",
+    "config_server",
+    "wifi_manager",
+)
+HEAP_REPORT_SEC = 300
 
 # File Paths
 CACHE_FILE = "score.txt"
+MOCK_SCORE_FILE = "mock_scores.json"  # read by the mock provider
 CONFIG_FILE = "config.json"
+WIFI_CACHE_FILE = "wifi.json"
+SCHEDULE_FILE = "schedule.bin"
+SCHEDULE_TEAM_FILE = "schedule_{}.bin"  # the other tracked teams' schedules
+HISTORY_FILE = "history.bin"
+LOG_CRASH_FILE = "crash.log"
+OTA_STATE_FILE = "ota.json"
 TEMPLATE_DIR = "/www/"
+EFFECTS_DIR = "/effects/"
@@ -0,0 +1,135 @@
+"""
+Player for pre-rendered LED effects stored on flash
+Effects are rendered on the host by tools/render_effect.py. Each frame
+is read straight into the NeoPixel buffer, so playback costs one flash
+read per frame and allocates nothing while it runs.
+
+File format (big-endian):
+    header: magic b"FX", version, flags (reserved, 0), LED count (H),
+            record count (H), frames per second
+    records: hold (1 byte, frame periods to show it) + LED count * 3
+             bytes in the strip's GRB order
+Identical consecutive frames are stored once with a longer hold
+(run-length encoding over time).
+"""
+
+import struct
+import constants
+import log
+from utils import ticks_ms, ticks_us, ticks_diff, ticks_add, sleep_ms
+
+HEADER_FORMAT = ">2sBBHHB"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+EFFECT_MAGIC = b"FX"
+EFFECT_VERSION = 1
+
+
+def read_header(f):
+    """Returns (flags, led count, record count, fps); raises ValueError"""
+    magic, version, flags, leds, records, fps = struct.unpack(
+        HEADER_FORMAT, f.read(HEADER_SIZE)
+    )
+    if magic != EFFECT_MAGIC or version != EFFECT_VERSION:
+        raise ValueError("Not an effect file")
+    return flags, leds, records, fps
+
+
+class EffectPlayer:
+    def __init__(self, strip):
+        """
+        strip: NeoPixel (or BudgetedStrip) whose buffer frames are read into
+        """
+        self.strip = strip
+        self.hold = bytearray(1)
+        self.stats = {}
+
+    def play(self, path, duration_ms=None, fps=None):
+        """
+        Play an effect file once, or repeat it for duration_ms
+        fps: override the file's frame rate (0 plays as fast as possible)
+        Returns False if the file is missing or doesn't fit the strip.
+        """
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return False
+
+        try:
+            flags, leds, records, file_fps = read_header(f)
+            if leds != self.strip.n:
+                log.warning(
+                    "Effect %s is for %s LEDs, not %s", path, leds, self.strip.n
+                )
+                return False
+            if fps is None:
+                fps = file_fps
+            self._run(f, records, fps, duration_ms)
+        except ValueError as e:
+            log.warning("Effect %s: %s", path, e)
+            return False
+        finally:
+            f.close()
+
+        s = self.stats
+        log.info(
+            "Effect %s: %s frames in %sms, %s fps, %s KB/s, %s late",
+            path,
+            s["frames"],
+            s["elapsed_ms"],
+            s["fps"],
+            s["read_kbps"],
+            s["late"],
+        )
+        return True
+
+    def _run(self, f, records, fps, duration_ms):
+        strip = self.strip
+        buf = strip.buf
+        hold = self.hold
+        frame_ms = 1000 // fps if fps else 0
+        record_size = 1 + len(buf)
+
+        frames = 0
+        late = 0
+        read_bytes = 0
+        read_us = 0
+        start = ticks_ms()
+        deadline = start
+        end = ticks_add(start, duration_ms) if duration_ms else None
+
+        while True:
+            for _ in range(records):
+                t0 = ticks_us()
+                if f.readinto(hold) != 1 or f.readinto(buf) != len(buf):
+                    raise ValueError("Truncated effect file")
+                read_us += ticks_diff(ticks_us(), t0)
+                read_bytes += record_size
+                strip.write()
+                frames += 1
+
+                deadline = ticks_add(deadline, frame_ms * hold[0])
+                wait = ticks_diff(deadline, ticks_ms())
+                if wait > 0:
+                    sleep_ms(wait)
+                elif frame_ms:
+                    late += 1
+                if end is not None and ticks_diff(ticks_ms(), end) >= 0:
+                    break
+            else:
+                if end is not None:
+                    f.seek(HEADER_SIZE)  # Loop until the duration is up
+                    continue
+            break
+
+        elapsed = max(1, ticks_diff(ticks_ms(), start))
+        self.stats = {
+            "frames": frames,
+            "elapsed_ms": elapsed,
+            "fps": frames * 1000 // elapsed,
+            "read_kbps": read_bytes * 1000000 // max(1, read_us) // 1024,
+            "late": late,
+        }
+
+
+def effect_path(name):
+    return constants.EFFECTS_DIR + name
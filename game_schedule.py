@@ -0,0 +1,207 @@
+"""
+Upcoming games for each tracked team, fetched once a day and cached in flash
+Used to deep-sleep between games instead of polling all night
+"""
+
+import gc
+import struct
+import time
+import constants
+import log
+
+START_KEY = b'"startTimeUTC":"'
+DATE_LENGTH = 20  # 2024-10-10T23:00:00Z
+
+# magic, version, game count, fetched-at time; then one uint32 per game
+HEADER_FORMAT = ">2sBBI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+SCHEDULE_MAGIC = b"GS"
+SCHEDULE_VERSION = 1
+
+# Seconds between 1970-01-01 and the platform's time.time() epoch
+# (MicroPython ports built with a 2000 epoch report gmtime(0) as 2000)
+EPOCH_OFFSET = 0 if time.gmtime(0)[0] == 1970 else 946684800
+
+
+def utc_to_seconds(text):
+    """
+    Convert "YYYY-MM-DDTHH:MM:SSZ" to seconds on the time.time() scale
+    Pure arithmetic, so it behaves the same on the device and the host
+    """
+    year = int(text[0:4])
+    month = int(text[5:7])
+    day = int(text[8:10])
+    seconds = int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+
+    # Days since 1970-01-01 (proleptic Gregorian, Howard Hinnant's algorithm)
+    if month <= 2:
+        year -= 1
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+    return days * 86400 + seconds - EPOCH_OFFSET
+
+
+def clock_synced(clock=time.time):
+    """
+    True once the RTC holds a real date (set by NTP, or kept through deep
+    sleep); after power-up it counts from the 2000 epoch again
+    """
+    return clock() + EPOCH_OFFSET >= constants.CLOCK_VALID_AFTER
+
+
+def sync_time():
+    """Set the RTC from NTP, returns True on success"""
+    try:
+        import ntptime
+
+        ntptime.settime()
+        return True
+    except Exception as e:
+        log.warning("NTP sync failed: %s", e)
+        return False
+
+
+def _open_url(url):
+    import urequests
+
+    return urequests.get(url, stream=True)
+
+
+class GameSchedule:
+    def __init__(self, team_abbrev, clock=None, path=None, open_url=None):
+        """
+        team_abbrev: team whose schedule to fetch
+        clock: returns the current time in seconds, defaults to time.time
+        path: flash cache file, defaults to SCHEDULE_FILE
+        open_url: returns an urequests-style response for a URL, defaults
+        to urequests.get (tools/schedule_sim.py passes a fake feed)
+        """
+        self.team_abbrev = team_abbrev
+        self.clock = clock or time.time
+        self.path = path or constants.SCHEDULE_FILE
+        self.open_url = open_url or _open_url
+        self.starts = []
+        self.fetched_at = None
+
+    def load(self):
+        """Load the cached schedule from flash, returns True if found"""
+        try:
+            with open(self.path, "rb") as f:
+                magic, version, count, fetched_at = struct.unpack(
+                    HEADER_FORMAT, f.read(HEADER_SIZE)
+                )
+                if magic != SCHEDULE_MAGIC or version != SCHEDULE_VERSION:
+                    return False
+                self.starts = list(struct.unpack(f">{count}I", f.read(4 * count)))
+                self.fetched_at = fetched_at
+                return True
+        except (OSError, ValueError):
+            return False
+
+    def save(self):
+        try:
+            with open(self.path, "wb") as f:
+                f.write(
+                    struct.pack(
+                        HEADER_FORMAT,
+                        SCHEDULE_MAGIC,
+                        SCHEDULE_VERSION,
+                        len(self.starts),
+                        self.fetched_at,
+                    )
+                )
+                f.write(struct.pack(f">{len(self.starts)}I", *self.starts))
+        except OSError as e:
+            log.warning("Could not save schedule: %s", e)
+
+    def needs_refresh(self):
+        """
+        True once the cache is a day old, or sooner when it holds no
+        upcoming game: the feed covers one week, so a cache fetched late
+        in a week runs dry before the next week's games are in it
+        """
+        if self.fetched_at is None:
+            return True
+        age = self.clock() - self.fetched_at
+        if age < 0 or age >= constants.SCHEDULE_REFRESH_SEC:
+            return True
+        return self.next_game() is None and age >= constants.SCHEDULE_RETRY_SEC
+
+    def refresh(self):
+        """Fetch and cache the upcoming schedule; raises on network errors"""
+        gc.collect()
+        url = constants.SCHEDULE_URL_TEMPLATE.format(self.team_abbrev)
+        response = self.open_url(url)
+        try:
+            if response.status_code != 200:
+                raise OSError(f"HTTP {response.status_code}")
+            self.consume(response.raw.read)
+        finally:
+            response.close()
+        self.save()
+        log.info("Schedule updated: %s upcoming games", len(self.starts))
+
+    def consume(self, read):
+        """
+        Collect game start times from a schedule stream
+        read: callable taking a byte count and returning bytes (b"" at EOF)
+        """
+        now = self.clock()
+        starts = []
+        buf = b""
+        keep = len(START_KEY) + DATE_LENGTH
+        while True:
+            chunk = read(constants.NETWORK_CHUNK_SIZE)
+            if not chunk:
+                break
+            buf += chunk
+            pos = buf.find(START_KEY)
+            while pos >= 0 and pos + keep <= len(buf):
+                text = buf[pos + len(START_KEY) : pos + keep].decode()
+                start = utc_to_seconds(text)
+                # Keep games still in progress as well as future ones
+                if start + constants.GAME_WINDOW_SEC > now and start not in starts:
+                    starts.append(start)
+                pos = buf.find(START_KEY, pos + keep)
+            buf = buf[-keep:]
+
+        starts.sort()
+        self.starts = starts[: constants.SCHEDULE_MAX_GAMES]
+        self.fetched_at = now
+
+    def next_game(self):
+        """Start time of the current or next game, or None"""
+        now = self.clock()
+        for start in self.starts:
+            if start + constants.GAME_WINDOW_SEC > now:
+                return start
+        return None
+
+    def sleep_seconds(self):
+        """
+        How long we can deep-sleep before waking for the next game
+        0 means stay awake: a game is close or on, or we have no schedule.
+        """
+        if self.fetched_at is None:
+            return 0
+        now = self.clock()
+        start = self.next_game()
+        if start is None:
+            # Nothing scheduled; needs_refresh() fetches again on waking
+            return constants.SCHEDULE_MAX_SLEEP_SEC
+        remaining = start - constants.SCHEDULE_WAKE_LEAD_SEC - now
+        if remaining < constants.SCHEDULE_MIN_SLEEP_SEC:
+            return 0
+        return min(remaining, constants.SCHEDULE_MAX_SLEEP_SEC)
+
+
+def combined_sleep_seconds(schedules):
+    """
+    How long we can deep-sleep and still wake for the first game of any
+    of the schedules (one per tracked team); 0 if any of them says awake
+    """
+    seconds = [schedule.sleep_seconds() for schedule in schedules]
+    return 0 if 0 in seconds else min(seconds)
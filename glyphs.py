@@ -0,0 +1,147 @@
+"""
+Panel font compiled by tools/build_glyphs.py; regenerate, don't edit
+12x8 panel wired in columns, serpentine
+"""
+
+WIDTH = 12
+HEIGHT = 8
+LAYOUT = "columns"
+SERPENTINE = True
+TOP = 1  # first panel row of the font
+SPACING = 1
+
+# char: (width, ((forward mask, reverse mask) per wiring line))
+GLYPHS = {
+    "0": (
+        3,
+        (
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+            (b"\x00\x01\x00\x00\x00\x01\x00\x00", b"\x00\x00\x01\x00\x00\x00\x01\x00"),
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+        ),
+    ),
+    "1": (
+        3,
+        (
+            (b"\x00\x00\x01\x00\x00\x01\x00\x00", b"\x00\x00\x01\x00\x00\x01\x00\x00"),
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+            (b"\x00\x00\x00\x00\x00\x01\x00\x00", b"\x00\x00\x01\x00\x00\x00\x00\x00"),
+        ),
+    ),
+    "2": (
+        3,
+        (
+            (b"\x00\x01\x00\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x00\x01\x00"),
+            (b"\x00\x01\x00\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x00\x01\x00"),
+            (b"\x00\x01\x01\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x01\x01\x00"),
+        ),
+    ),
+    "3": (
+        3,
+        (
+            (b"\x00\x01\x00\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x00\x01\x00"),
+            (b"\x00\x01\x00\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x00\x01\x00"),
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+        ),
+    ),
+    "4": (
+        3,
+        (
+            (b"\x00\x01\x01\x01\x00\x00\x00\x00", b"\x00\x00\x00\x00\x01\x01\x01\x00"),
+            (b"\x00\x00\x00\x01\x00\x00\x00\x00", b"\x00\x00\x00\x00\x01\x00\x00\x00"),
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+        ),
+    ),
+    "5": (
+        3,
+        (
+            (b"\x00\x01\x01\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x01\x01\x00"),
+            (b"\x00\x01\x00\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x00\x01\x00"),
+            (b"\x00\x01\x00\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x00\x01\x00"),
+        ),
+    ),
+    "6": (
+        3,
+        (
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+            (b"\x00\x01\x00\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x00\x01\x00"),
+            (b"\x00\x01\x00\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x00\x01\x00"),
+        ),
+    ),
+    "7": (
+        3,
+        (
+            (b"\x00\x01\x00\x00\x00\x00\x00\x00", b"\x00\x00\x00\x00\x00\x00\x01\x00"),
+            (b"\x00\x01\x00\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x00\x01\x00"),
+            (b"\x00\x01\x01\x00\x00\x00\x00\x00", b"\x00\x00\x00\x00\x00\x01\x01\x00"),
+        ),
+    ),
+    "8": (
+        3,
+        (
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+            (b"\x00\x01\x00\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x00\x01\x00"),
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+        ),
+    ),
+    "9": (
+        3,
+        (
+            (b"\x00\x01\x01\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x01\x01\x00"),
+            (b"\x00\x01\x00\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x00\x01\x00"),
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+        ),
+    ),
+    "P": (
+        3,
+        (
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+            (b"\x00\x01\x00\x01\x00\x00\x00\x00", b"\x00\x00\x00\x00\x01\x00\x01\x00"),
+            (b"\x00\x01\x01\x01\x00\x00\x00\x00", b"\x00\x00\x00\x00\x01\x01\x01\x00"),
+        ),
+    ),
+    "O": (
+        3,
+        (
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+            (b"\x00\x01\x00\x00\x00\x01\x00\x00", b"\x00\x00\x01\x00\x00\x00\x01\x00"),
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+        ),
+    ),
+    "T": (
+        3,
+        (
+            (b"\x00\x01\x00\x00\x00\x00\x00\x00", b"\x00\x00\x00\x00\x00\x00\x01\x00"),
+            (b"\x00\x01\x01\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x01\x01\x00"),
+            (b"\x00\x01\x00\x00\x00\x00\x00\x00", b"\x00\x00\x00\x00\x00\x00\x01\x00"),
+        ),
+    ),
+    "S": (
+        3,
+        (
+            (b"\x00\x01\x01\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x01\x01\x00"),
+            (b"\x00\x01\x00\x01\x00\x01\x00\x00", b"\x00\x00\x01\x00\x01\x00\x01\x00"),
+            (b"\x00\x01\x00\x01\x01\x01\x00\x00", b"\x00\x00\x01\x01\x01\x00\x01\x00"),
+        ),
+    ),
+    "-": (
+        2,
+        (
+            (b"\x00\x00\x00\x01\x00\x00\x00\x00", b"\x00\x00\x00\x00\x01\x00\x00\x00"),
+            (b"\x00\x00\x00\x01\x00\x00\x00\x00", b"\x00\x00\x00\x00\x01\x00\x00\x00"),
+        ),
+    ),
+    ":": (
+        1,
+        (
+            (b"\x00\x00\x01\x00\x01\x00\x00\x00", b"\x00\x00\x00\x01\x00\x01\x00\x00"),
+        ),
+    ),
+    " ": (
+        2,
+        (
+            (b"\x00\x00\x00\x00\x00\x00\x00\x00", b"\x00\x00\x00\x00\x00\x00\x00\x00"),
+            (b"\x00\x00\x00\x00\x00\x00\x00\x00", b"\x00\x00\x00\x00\x00\x00\x00\x00"),
+        ),
+    ),
+}
@@ -0,0 +1,183 @@
+"""
+Heap profiling for ESP32 LED Sports Display
+Records how much heap each module import, poll, render and HTTP request
+takes, plus the peak watermark and fragmentation (largest free block).
+
+On the device this uses gc.mem_alloc()/mem_free(); on CPython it uses
+tracemalloc, so the same hooks can be exercised by tools/heap_report.py.
+Off by default; while disabled every hook is a shared no-op.
+
+Usage:
+    import heap_profile
+    heap_profile.enable()
+    with heap_profile.section("poll"):
+        poll_game()
+    heap_profile.report()
+"""
+
+import gc
+import log
+
+try:
+    gc.mem_alloc
+    tracemalloc = None
+except AttributeError:
+    import tracemalloc
+
+enabled = False
+baseline = 0  # bytes allocated when profiling was enabled
+peak = 0  # highest allocation seen
+
+# label -> [count, retained bytes (last), max retained, max transient]
+_records = {}
+_order = []
+
+
+def mem_alloc():
+    if tracemalloc:
+        return tracemalloc.get_traced_memory()[0]
+    return gc.mem_alloc()
+
+
+def mem_free():
+    """Free heap in bytes, None where the host has no fixed heap"""
+    if tracemalloc:
+        return None
+    return gc.mem_free()
+
+
+def largest_free_block(granularity=256):
+    """
+    Largest single allocation that currently succeeds, found by binary
+    search with trial bytearrays. Slow, so only used for reports.
+    Returns None on the host, where it has no meaning.
+    """
+    if tracemalloc:
+        return None
+    gc.collect()
+    low, high = 0, gc.mem_free()
+    while high - low > granularity:
+        mid = (low + high) // 2
+        try:
+            block = bytearray(mid)
+            del block
+            low = mid
+        except MemoryError:
+            high = mid
+    gc.collect()
+    return low
+
+
+def enable():
+    global enabled, baseline, peak
+    if tracemalloc and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    gc.collect()
+    baseline = peak = mem_alloc()
+    enabled = True
+
+
+def _note_peak(value):
+    global peak
+    if value > peak:
+        peak = value
+
+
+class _Section:
+    def __init__(self, label):
+        self.label = label
+
+    def __enter__(self):
+        gc.collect()
+        if tracemalloc:
+            # Sections may nest, but on the host the inner one resets the
+            # outer one's peak
+            tracemalloc.reset_peak()
+        self.start = mem_alloc()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            return False  # Only complete runs are recorded
+        if tracemalloc:
+            high = tracemalloc.get_traced_memory()[1]
+        else:
+            # Without a GC run inside the section this is everything it
+            # allocated; otherwise it undercounts the transient part
+            high = mem_alloc()
+        gc.collect()
+        end = mem_alloc()
+        _note_peak(high)
+        record(self.label, end - self.start, high - self.start)
+        return False
+
+
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+def section(label):
+    """Context manager measuring the heap used by the block it wraps"""
+    if not enabled:
+        return _NULL_SECTION
+    return _Section(label)
+
+
+def record(label, retained, transient):
+    entry = _records.get(label)
+    if entry is None:
+        entry = _records[label] = [0, 0, 0, 0]
+        _order.append(label)
+    entry[0] += 1
+    entry[1] = retained
+    entry[2] = max(entry[2], retained)
+    entry[3] = max(entry[3], transient)
+
+
+def profile_imports(names):
+    """
+    Import modules one at a time under a section each. Run this before
+    the normal imports, which then find the modules already loaded.
+    A dependency shared by several modules counts towards the first.
+    """
+    for name in names:
+        try:
+            with section(f"import {name}"):
+                __import__(name)
+        except ImportError as e:
+            log.warning("Heap profile: %s not importable: %s", name, e)
+
+
+def report():
+    """Log the profile and return its lines"""
+    gc.collect()
+    current = mem_alloc()
+    _note_peak(current)
+    free = mem_free()
+    largest = largest_free_block()
+
+    lines = [
+        f"{'section':<28} {'count':>5} {'kept':>7} {'max kept':>8} {'transient':>9}"
+    ]
+    for label in _order:
+        count, retained, max_retained, transient = _records[label]
+        lines.append(
+            f"{label:<28} {count:>5} {retained:>7} {max_retained:>8} {transient:>9}"
+        )
+    lines.append(f"allocated {current} (baseline {baseline}), peak {peak}")
+    if free is not None:
+        fragmentation = 100 - largest * 100 // free if free else 0
+        lines.append(
+            f"free {free}, largest block {largest}, fragmentation {fragmentation}%"
+        )
+
+    for line in lines:
+        log.info(line)
+    return lines
@@ -0,0 +1,207 @@
+"""
+Game history kept in flash as a circular log of fixed-size records
+One record per score event (goal for or against, correction, catch-up)
+with the time, game ID, scores, period and how late the box reacted.
+Events before the clock is set (NTP) are kept with time 0.
+The file is a small index header followed by up to HISTORY_CAPACITY
+records; once full, the oldest record is overwritten. A range is read
+with a seek and one or two reads, so queries never load the whole file.
+"""
+
+import struct
+import time
+import constants
+import log
+from game_schedule import EPOCH_OFFSET, clock_synced
+
+# magic, version, record size, capacity, records ever written
+HEADER_FORMAT = ">2sBBII"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HISTORY_MAGIC = b"GH"
+HISTORY_VERSION = 1
+
+# time (0 before the clock was set), game ID, event, our score, opponent
+# score, period, latency ms
+RECORD_FORMAT = ">IIBBBBI"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+EVENT_GOAL_FOR = 1
+EVENT_GOAL_AGAINST = 2
+EVENT_CORRECTION = 3  # the score went down (goal overturned, feed fix)
+EVENT_CATCH_UP = 4  # joined a game in progress, no celebration
+EVENT_NAMES = {
+    EVENT_GOAL_FOR: "goal_for",
+    EVENT_GOAL_AGAINST: "goal_against",
+    EVENT_CORRECTION: "correction",
+    EVENT_CATCH_UP: "catch_up",
+}
+
+
+def record_dict(record):
+    """
+    A record from read() as a JSON-friendly dict, time in Unix seconds
+    (None if the clock wasn't set yet)
+    """
+    seq, when, game_id, event, our, opp, period, latency = record
+    return {
+        "seq": seq,
+        "time": when + EPOCH_OFFSET if when else None,
+        "game_id": game_id or None,
+        "event": EVENT_NAMES.get(event, event),
+        "score": [our, opp],
+        "period": period or None,
+        "latency_ms": latency,
+    }
+
+
+class History:
+    def __init__(self, path=None, capacity=None, clock=None):
+        """
+        path: flash file, defaults to HISTORY_FILE
+        capacity: records kept, defaults to HISTORY_CAPACITY
+        clock: returns the current time in seconds, defaults to time.time
+        """
+        self.path = path or constants.HISTORY_FILE
+        self.capacity = capacity or constants.HISTORY_CAPACITY
+        self.clock = clock or time.time
+        self.total = 0  # records ever written, the next record's sequence number
+        self.ready = self.load()
+
+    def load(self):
+        """Read the index header, returns True if the file can be appended to"""
+        try:
+            with open(self.path, "rb") as f:
+                magic, version, size, capacity, total = struct.unpack(
+                    HEADER_FORMAT, f.read(HEADER_SIZE)
+                )
+        except (OSError, ValueError):
+            return False
+        if magic != HISTORY_MAGIC or version != HISTORY_VERSION:
+            return False
+        if size != RECORD_SIZE or capacity != self.capacity:
+            log.warning("History format changed, starting a new one")
+            return False
+        self.total = total
+        return True
+
+    @property
+    def oldest(self):
+        """Sequence number of the oldest record still kept"""
+        return max(0, self.total - self.capacity)
+
+    def _offset(self, seq):
+        return HEADER_SIZE + seq % self.capacity * RECORD_SIZE
+
+    def append(self, game_id, event, our_score, opp_score, period=0, latency_ms=0):
+        # Until NTP has run the RTC counts from the 2000 epoch; such a time
+        # would sort before every real one and mislead find()
+        when = int(self.clock()) if clock_synced(self.clock) else 0
+        record = struct.pack(
+            RECORD_FORMAT,
+            when,
+            game_id or 0,
+            event,
+            min(our_score, 255),
+            min(opp_score, 255),
+            period or 0,
+            max(0, latency_ms),
+        )
+        total = self.total if self.ready else 0
+        try:
+            with open(self.path, "r+b" if self.ready else "wb") as f:
+                # The record goes down before the header that counts it, so
+                # a reset in between only loses this record
+                f.seek(self._offset(total))
+                f.write(record)
+                f.seek(0)
+                f.write(
+                    struct.pack(
+                        HEADER_FORMAT,
+                        HISTORY_MAGIC,
+                        HISTORY_VERSION,
+                        RECORD_SIZE,
+                        self.capacity,
+                        total + 1,
+                    )
+                )
+        except OSError as e:
+            log.warning("Could not write history: %s", e)
+            return
+        self.total = total + 1
+        self.ready = True
+
+    def read(self, start, count):
+        """
+        Records with sequence numbers start to start + count - 1, clipped
+        to those still kept, oldest first. Each is a tuple of (sequence,
+        time, game ID, event, our score, opponent score, period, latency).
+        """
+        start = max(start, self.oldest)
+        end = min(start + count, self.total)
+        records = []
+        if not self.ready or end <= start:
+            return records
+        with open(self.path, "rb") as f:
+            seq = start
+            while seq < end:
+                # Up to the end of the file, then from the top after a wrap
+                n = min(end - seq, self.capacity - seq % self.capacity)
+                f.seek(self._offset(seq))
+                data = f.read(n * RECORD_SIZE)
+                for i in range(n):
+                    fields = struct.unpack_from(RECORD_FORMAT, data, i * RECORD_SIZE)
+                    records.append((seq + i,) + fields)
+                seq += n
+        return records
+
+    def find(self, timestamp):
+        """
+        Sequence number of the first record at or after timestamp, by a
+        binary search that reads one time field per step
+        Records are in write order, so this relies on the clock having
+        only moved forward. A record without a time (written before NTP)
+        counts as at the time of the next record that has one.
+        """
+        lo, hi = self.oldest, self.total
+        if not self.ready:
+            return hi
+        with open(self.path, "rb") as f:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                probe = mid
+                when = 0
+                while probe < hi:
+                    f.seek(self._offset(probe))
+                    when = struct.unpack(">I", f.read(4))[0]
+                    if when:
+                        break
+                    probe += 1
+                if when and when < timestamp:
+                    lo = probe + 1
+                else:
+                    hi = mid
+        return lo
+
+    def page(self, start=None, since=None, limit=None):
+        """
+        One page of records for /history: from sequence number start, or
+        from the first record at or after since (Unix seconds), or else
+        the newest limit records. next is where the following page starts,
+        or None on the last page.
+        """
+        limit = min(limit or constants.HISTORY_PAGE_SIZE, constants.HISTORY_PAGE_MAX)
+        if start is None:
+            if since is not None:
+                start = self.find(since - EPOCH_OFFSET)
+            else:
+                start = self.total - limit
+        start = max(start, self.oldest)
+        records = self.read(start, limit)
+        end = start + len(records)
+        return {
+            "total": self.total,
+            "oldest": self.oldest,
+            "start": start,
+            "next": end if end < self.total else None,
+            "records": [record_dict(r) for r in records],
+        }
@@ -0,0 +1,191 @@
+"""
+LAN hub mode: one device polls the API and multicasts scores
+Followers listen instead of polling; if the hub goes quiet the
+next device in line takes over
+"""
+
+import socket
+import struct
+import hashlib
+import constants
+import log
+from utils import ticks_ms, ticks_diff
+
+# magic, version, sender rank, sequence, team, our score, opp score, game ID
+PACKET_FORMAT = ">2sBII3sbbI"
+PACKET_SIZE = struct.calcsize(PACKET_FORMAT)
+MAC_SIZE = 8
+PACKET_MAGIC = b"SB"
+PACKET_VERSION = 1
+
+
+def _inet_aton(ip):
+    return bytes(int(part) for part in ip.split("."))
+
+
+def device_rank():
+    """Election rank from the MAC address; the lowest rank wins"""
+    import network
+
+    mac = network.WLAN().config("mac")
+    return struct.unpack(">I", mac[-4:])[0]
+
+
+class ScoreHub:
+    def __init__(
+        self, team_abbrev, key, rank=None, iface="0.0.0.0", timeout_sec=None
+    ):
+        """
+        team_abbrev: only packets for this team are used or elected on
+        key: shared secret used to sign packets (str or bytes)
+        rank: election rank, defaults to one derived from the MAC address
+        iface: local IP address to join the multicast group on
+        timeout_sec: hub silence before takeover, defaults to HUB_TIMEOUT_SEC
+        """
+        if timeout_sec is None:
+            timeout_sec = constants.HUB_TIMEOUT_SEC
+        self.team = team_abbrev.encode()[:3]
+        self.rank = device_rank() if rank is None else rank
+        self.iface = iface
+        self.is_hub = False
+        self.hub_rank = None
+        self.sequence = 0
+        self.last_heard = ticks_ms()
+        self.last_sequence = {}
+        self.sock = None
+
+        # Precompute the HMAC pads once, packets are signed on every poll
+        if isinstance(key, str):
+            key = key.encode()
+        if len(key) > 64:
+            key = hashlib.sha256(key).digest()
+        key = key + b"\x00" * (64 - len(key))
+        self._ipad = bytes(b ^ 0x36 for b in key)
+        self._opad = bytes(b ^ 0x5C for b in key)
+
+        # Stagger takeover so followers don't all promote at once
+        self.takeover_ms = int(
+            (timeout_sec + self.rank % constants.HUB_TAKEOVER_SLOTS) * 1000
+        )
+
+    def sign(self, payload):
+        inner = hashlib.sha256(self._ipad + payload).digest()
+        return hashlib.sha256(self._opad + inner).digest()[:MAC_SIZE]
+
+    def open(self):
+        """Bind the multicast socket, returns False if the network isn't up yet"""
+        if self.sock:
+            return True
+        try:
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind(socket.getaddrinfo("0.0.0.0", constants.HUB_PORT)[0][-1])
+            s.setsockopt(
+                socket.IPPROTO_IP,
+                socket.IP_ADD_MEMBERSHIP,
+                _inet_aton(constants.HUB_GROUP) + _inet_aton(self.iface),
+            )
+            if self.iface != "0.0.0.0" and hasattr(socket, "IP_MULTICAST_IF"):
+                # Send out of the same interface we joined on
+                s.setsockopt(
+                    socket.IPPROTO_IP, socket.IP_MULTICAST_IF, _inet_aton(self.iface)
+                )
+            s.setblocking(False)
+        except OSError as e:
+            log.warning("Hub socket not ready: %s", e, site="hub-open")
+            return False
+        self.sock = s
+        self.last_heard = ticks_ms()
+        return True
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        self.is_hub = False
+
+    def publish(self, our_score, opp_score, game_id):
+        """Broadcast the current score (hub only)"""
+        if not self.is_hub or not self.open():
+            return
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        payload = struct.pack(
+            PACKET_FORMAT,
+            PACKET_MAGIC,
+            PACKET_VERSION,
+            self.rank,
+            self.sequence,
+            self.team,
+            our_score,
+            opp_score,
+            game_id or 0,
+        )
+        try:
+            self.sock.sendto(
+                payload + self.sign(payload), (constants.HUB_GROUP, constants.HUB_PORT)
+            )
+        except OSError as e:
+            log.warning("Hub send failed: %s", e, site="hub-send")
+
+    def decode(self, packet):
+        """Verify and unpack a packet, returns None if it isn't for us"""
+        if len(packet) != PACKET_SIZE + MAC_SIZE:
+            return None
+        payload = packet[:PACKET_SIZE]
+        if self.sign(payload) != packet[PACKET_SIZE:]:
+            return None
+        magic, version, rank, seq, team, our, opp, game_id = struct.unpack(
+            PACKET_FORMAT, payload
+        )
+        if magic != PACKET_MAGIC or version != PACKET_VERSION or team != self.team:
+            return None
+        if rank == self.rank:
+            return None  # Our own packet, looped back
+        # Drop replays, unless the sender has been quiet long enough
+        # that it has probably restarted its sequence
+        now = ticks_ms()
+        last = self.last_sequence.get(rank)
+        if last and seq <= last[0] and ticks_diff(now, last[1]) < self.takeover_ms:
+            return None
+        self.last_sequence[rank] = (seq, now)
+        return rank, our, opp, game_id
+
+    def update(self):
+        """
+        Call every loop iteration: drains received packets and runs the
+        election. Returns (our_score, opp_score, game_id) from the newest
+        hub packet, or None if there is nothing new.
+        """
+        if not self.open():
+            return None
+
+        latest = None
+        while True:
+            try:
+                packet = self.sock.recv(PACKET_SIZE + MAC_SIZE + 1)
+            except OSError:
+                break  # EAGAIN, nothing pending
+            if not packet:
+                break
+            record = self.decode(packet)
+            if record is None:
+                continue
+
+            rank = record[0]
+            if self.is_hub:
+                if rank > self.rank:
+                    continue  # They will step down when they hear us
+                log.info("Hub %s outranks us, following", rank)
+                self.is_hub = False
+            self.hub_rank = rank
+            self.last_heard = ticks_ms()
+            latest = record[1:]
+
+        if not self.is_hub and ticks_diff(ticks_ms(), self.last_heard) > (
+            self.takeover_ms
+        ):
+            log.info("No hub heard, taking over as hub (rank %s)", self.rank)
+            self.is_hub = True
+            self.hub_rank = self.rank
+
+        return latest
@@ -0,0 +1,131 @@
+"""
+LED power budget: estimate strip current per frame, scale frames down to
+fit a configured budget and switch the strip relay off while it is dark
+"""
+
+import time
+import constants
+import log
+
+
+class BudgetedStrip:
+    def __init__(self, strip, relay=None, budget_ma=None, idle_off_sec=None):
+        """
+        Wrap a NeoPixel so every write goes through the power model
+        strip: the NeoPixel to drive
+        relay: Pin switching the strip supply (optional)
+        budget_ma: maximum estimated strip current
+        idle_off_sec: all-black time before the relay is switched off
+        """
+        if budget_ma is None:
+            budget_ma = constants.LED_POWER_BUDGET_MA
+        if idle_off_sec is None:
+            idle_off_sec = constants.RELAY_IDLE_OFF_SEC
+        self.strip = strip
+        self.buf = strip.buf
+        self.n = strip.n
+        self.relay = relay
+        self.budget_ma = budget_ma
+        self.idle_off_ms = int(idle_off_sec * 1000)
+        self.idle_ma = self.n * constants.LED_IDLE_MA
+
+        self.black_since = None
+        self.off_since = None
+        self.last_write = time.ticks_ms()
+        self.clip_ma = 0
+
+        # Counters
+        self.frames = 0
+        self.scaled_frames = 0
+        self.peak_ma = 0
+        self.relay_off_ms = 0
+        self.clipped_ma_ms = 0
+
+    # NeoPixel interface
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, index, color):
+        self.strip[index] = color
+
+    def __getitem__(self, index):
+        return self.strip[index]
+
+    def fill(self, color):
+        self.strip.fill(color)
+
+    def estimate_ma(self, channel_sum=None):
+        """Estimated strip current for the current framebuffer"""
+        if channel_sum is None:
+            channel_sum = sum(self.buf)
+        return self.idle_ma + channel_sum * constants.LED_MA_PER_CHANNEL // 255
+
+    def write(self):
+        now = time.ticks_ms()
+        self.clipped_ma_ms += self.clip_ma * time.ticks_diff(now, self.last_write)
+        self.last_write = now
+        self.clip_ma = 0
+        self.frames += 1
+
+        channel_sum = sum(self.buf)
+        if channel_sum == 0:
+            if self.black_since is None:
+                self.black_since = now
+            if self.relay and not self.relay.value():
+                return  # Strip is unpowered, nothing to show anyway
+            self.strip.write()
+            return
+
+        self.black_since = None
+        if self.relay and not self.relay.value():
+            self.relay_on()
+
+        ma = self.estimate_ma(channel_sum)
+        if ma > self.budget_ma:
+            self.scale_to_budget(channel_sum)
+            self.clip_ma = ma - self.budget_ma
+            self.scaled_frames += 1
+            ma = self.budget_ma
+        if ma > self.peak_ma:
+            self.peak_ma = ma
+        self.strip.write()
+
+    def scale_to_budget(self, channel_sum):
+        """Scale the framebuffer in place so the estimate fits the budget"""
+        allowed = (self.budget_ma - self.idle_ma) * 255 // constants.LED_MA_PER_CHANNEL
+        factor = max(0, allowed) * 256 // channel_sum  # 8.8 fixed point
+        buf = self.buf
+        for i in range(len(buf)):
+            buf[i] = buf[i] * factor >> 8
+
+    def relay_on(self):
+        self.relay.on()
+        time.sleep_ms(constants.RELAY_SETTLE_MS)
+        if self.off_since is not None:
+            self.relay_off_ms += time.ticks_diff(time.ticks_ms(), self.off_since)
+            self.off_since = None
+
+    def update(self):
+        """Call from the main loop: switches the relay off after a dark spell"""
+        if self.relay is None or self.black_since is None or not self.relay.value():
+            return
+        if time.ticks_diff(time.ticks_ms(), self.black_since) > self.idle_off_ms:
+            self.relay.off()
+            self.off_since = time.ticks_ms()
+            log.info("Strip dark, relay off")
+
+    def mah_saved(self):
+        """Estimated charge saved by relay gating and budget clipping"""
+        off_ms = self.relay_off_ms
+        if self.off_since is not None:
+            off_ms += time.ticks_diff(time.ticks_ms(), self.off_since)
+        return (off_ms * self.idle_ma + self.clipped_ma_ms) / 3600000
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "scaled_frames": self.scaled_frames,
+            "peak_ma": self.peak_ma,
+            "relay_off_sec": self.relay_off_ms // 1000,
+            "mah_saved": round(self.mah_saved(), 2),
+        }
@@ -0,0 +1,162 @@
+"""
+Lightweight logging for ESP32 LED Sports Display
+Entries go into a preallocated ring buffer in RAM and are flushed to the
+UART lazily from the main loop, so logging doesn't block hot paths
+
+Usage:
+    import log
+    log.info("Connected to %s", ssid)
+    log.error("Network error: %s", e, site="net", every_ms=30000)
+    log.debug("chunk %d", n)  # returns immediately unless DEBUG is enabled
+
+Pass values as arguments, not in an f-string: they are only formatted
+for entries that pass the level and rate limit. The main loop and the
+network thread both log, so the ring is guarded by a lock.
+"""
+
+import _thread
+import constants
+from utils import ticks_ms, ticks_diff
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARN", ERROR: "ERROR"}
+
+level = INFO
+
+# Ring buffer, allocated once at import
+_size = constants.LOG_RING_SIZE
+_times = [0] * _size
+_levels = bytearray(_size)
+_messages = [None] * _size
+_head = 0  # next slot to write
+_count = 0  # entries held (up to _size)
+_unflushed = 0  # newest entries not yet written to the UART
+_dropped = 0  # entries overwritten before they were flushed
+
+# Per call-site rate limiting
+_last_emit = {}
+_suppressed = {}
+
+# The network thread logs alongside the main loop; the lock covers the
+# rate-limit dicts and the ring indices. Not reentrant, so nothing may log
+# from a timer or IRQ callback.
+_lock = _thread.allocate_lock()
+
+
+def set_level(name):
+    """Set the level by name (debug, info, warning or error)"""
+    global level
+    for value, label in LEVEL_NAMES.items():
+        if label.startswith(name.upper()[:4]):
+            level = value
+            return
+
+
+def _log(lvl, msg, args, site, every_ms):
+    global _head, _count, _unflushed, _dropped
+
+    now = ticks_ms()
+    skipped = 0
+    if site is not None:
+        with _lock:
+            last = _last_emit.get(site)
+            if last is not None and ticks_diff(now, last) < every_ms:
+                _suppressed[site] = _suppressed.get(site, 0) + 1
+                return
+            _last_emit[site] = now
+            skipped = _suppressed.pop(site, 0)
+
+    # Formatting happens outside the lock, and only for entries kept
+    if args:
+        try:
+            msg = msg % args
+        except Exception:
+            msg = f"{msg} {args}"
+    if skipped:
+        msg = f"{msg} [{skipped} similar suppressed]"
+
+    with _lock:
+        _times[_head] = now
+        _levels[_head] = lvl
+        _messages[_head] = msg
+        _head = (_head + 1) % _size
+        if _count < _size:
+            _count += 1
+        if _unflushed == _size:
+            _dropped += 1
+        else:
+            _unflushed += 1
+
+
+def debug(msg, *args, site=None, every_ms=constants.LOG_RATE_LIMIT_MS):
+    if level > DEBUG:
+        return
+    _log(DEBUG, msg, args, site, every_ms)
+
+
+def info(msg, *args, site=None, every_ms=constants.LOG_RATE_LIMIT_MS):
+    if level > INFO:
+        return
+    _log(INFO, msg, args, site, every_ms)
+
+
+def warning(msg, *args, site=None, every_ms=constants.LOG_RATE_LIMIT_MS):
+    if level > WARNING:
+        return
+    _log(WARNING, msg, args, site, every_ms)
+
+
+def error(msg, *args, site=None, every_ms=constants.LOG_RATE_LIMIT_MS):
+    _log(ERROR, msg, args, site, every_ms)
+
+
+def _format(index):
+    return f"{_times[index]} {LEVEL_NAMES[_levels[index]]} {_messages[index]}"
+
+
+def flush(limit=None):
+    """
+    Write pending entries to the UART, oldest first
+    limit: at most this many entries, to spread the cost over loop passes
+    """
+    global _unflushed, _dropped
+    if not _unflushed and not _dropped:
+        return
+    # Take the entries under the lock, print them (the slow part) after
+    with _lock:
+        dropped = _dropped
+        _dropped = 0
+        count = _unflushed if limit is None else min(limit, _unflushed)
+        start = (_head - _unflushed) % _size
+        lines = [_format((start + i) % _size) for i in range(count)]
+        _unflushed -= count
+    if dropped:
+        print(f"(log: {dropped} entries lost before flush)")
+    for line in lines:
+        print(line)
+
+
+def entries(last=None):
+    """Yield formatted entries held in the ring buffer, oldest first"""
+    count = _count if last is None else min(last, _count)
+    start = (_head - count) % _size
+    for i in range(count):
+        yield _format((start + i) % _size)
+
+
+def dump(path=None, last=None):
+    """Persist the newest entries to flash, e.g. from a crash handler"""
+    if path is None:
+        path = constants.LOG_CRASH_FILE
+    if last is None:
+        last = constants.LOG_CRASH_ENTRIES
+    try:
+        with open(path, "w") as f:
+            for line in entries(last):
+                f.write(line)
+                f.write("\n")
+    except OSError as e:
+        print(f"Could not write {path}: {e}")
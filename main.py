@@ -1,22 +1,106 @@
-import urequests
+import gc
+import constants
+import heap_profile
+from config import load_config, get_wifi_credentials
+
+# Config is loaded first so profiling mode can measure each import before
+# the imports below find the modules already loaded
+config = load_config()
+if config.get("device", {}).get("heap_profile", False):
+    heap_profile.enable()
+    heap_profile.profile_imports(constants.HEAP_PROFILE_MODULES)
+
 import time
 import machine, neopixel
-import gc
-from config import load_config
+import _thread
 from power_manager import create_power_manager
-import constants
+import watchdog
+from rtc_state import (
+    save_state,
+    load_state,
+    save_link,
+    set_flag,
+    wall_ms,
+    FLAG_WARM,
+    FLAG_TIME_SYNCED,
+)
+from game_schedule import GameSchedule, combined_sleep_seconds, sync_time
+from history import (
+    History,
+    EVENT_GOAL_FOR,
+    EVENT_GOAL_AGAINST,
+    EVENT_CORRECTION,
+    EVENT_CATCH_UP,
+)
+from led_power import BudgetedStrip
+from compositor import Compositor
+import color_tables
+from effect_player import EffectPlayer, effect_path
+from play_by_play import PlayByPlayTracker
+from score_feed import load_provider, team_scores
+from utils import PhaseTimer
+from config_listener import ConfigListener
+from net_policy import (
+    CircuitBreaker,
+    STATE_HALF_OPEN,
+    ERROR_HTTP,
+    classify_error,
+    probe,
+)
+import log
+
+# ticks_ms counts from power-on, so the first phase covers boot.py too
+boot_timer = PhaseTimer("Boot", start=0)
+boot_timer.mark("imports")
 
 # --- CONFIGURATION ---
-config = load_config()
 TEAM_ABBREV = config.get("device", {}).get("team_abbrev", "MIN")
-POLL_INTERVAL = config.get("device", {}).get(
-    "poll_interval", constants.DEFAULT_POLL_INTERVAL
-)
+# Extra teams whose games are shown in rotation with ours
+TRACKED_TEAMS = [TEAM_ABBREV] + [
+    team for team in config.get("device", {}).get("teams", []) if team != TEAM_ABBREV
+]
+# Only the configured league's provider module is imported
+PROVIDER = config.get("device", {}).get("provider", constants.DEFAULT_PROVIDER)
+try:
+    provider = load_provider(PROVIDER, TRACKED_TEAMS)
+except ImportError:
+    log.error("Unknown score provider %s, using NHL", PROVIDER)
+    provider = load_provider(constants.DEFAULT_PROVIDER, TRACKED_TEAMS)
+# The provider's recommended cadence unless one is configured
+POLL_INTERVAL = config.get("device", {}).get("poll_interval", provider.POLL_INTERVAL)
 BRIGHTNESS = config.get("device", {}).get(
     "brightness", constants.DEFAULT_BRIGHTNESS
 )  # 0-100 scale
+HUB_CONFIG = config.get("hub", {})
+RELAY_ADDRESS = config.get("device", {}).get("relay", "")  # "host:port" or ""
+SLEEP_MODE = config.get("device", {}).get("sleep_mode", constants.DEFAULT_SLEEP_MODE)
+SCHEDULE_SLEEP = provider.SCHEDULE and config.get("device", {}).get(
+    "schedule_sleep", True
+)
+DISPLAY = config.get("device", {}).get("display", constants.DEFAULT_DISPLAY)
+WATCHDOG = config.get("device", {}).get("watchdog", True)
+LIGHT_SENSOR = config.get("device", {}).get("light_sensor")  # {"pin": 34} or None
+CONSOLE = config.get("device", {}).get("console", True)
+# Handed to the Wi-Fi manager so it doesn't read config.json again
+WIFI_CREDENTIALS = get_wifi_credentials(config)
+log.set_level(config.get("device", {}).get("log_level", constants.DEFAULT_LOG_LEVEL))
 NUM_LEDS = constants.NUM_LEDS
 
+# --- WARM RESTART ---
+# After a crash restart or a watchdog reset, RTC memory still holds the
+# live state: the score, brightness and Wi-Fi link come from there
+boot_state = load_state()
+warm_boot = WATCHDOG and watchdog.is_warm_boot(boot_state)
+restarts = boot_state["restarts"] + 1 if warm_boot else 0
+# Keep restarting on crashes, unless the box crashes again every time
+auto_restart = WATCHDOG and restarts <= constants.WDT_MAX_RESTARTS
+warm_recovery_ms = None  # last sign of life before the restart to first draw
+if warm_boot:
+    BRIGHTNESS = boot_state["brightness"] or BRIGHTNESS
+    log.warning("Warm restart (%s in a row)", restarts)
+    if not auto_restart:
+        log.error("Crashing on every boot, leaving the watchdog off")
+
 # --- PIXEL MAPPING ---
 # 0-indexed LED numbers for each point.
 # Define the first point for each team manually
@@ -42,9 +126,48 @@ for i in range(2, 7):
 # --- HARDWARE SETUP ---
 relay = machine.Pin(constants.RELAY_PIN, machine.Pin.OUT)
 relay.on()
-time.sleep(0.5)
+time.sleep_ms(constants.RELAY_SETTLE_MS)
+
+# Every write goes through the power model: frames are scaled to the
+# current budget and the relay is switched off while the strip is dark
+np = BudgetedStrip(
+    neopixel.NeoPixel(machine.Pin(constants.DATA_PIN), constants.NUM_LEDS),
+    relay=relay,
+    budget_ma=config.get("device", {}).get(
+        "power_budget_ma", constants.LED_POWER_BUDGET_MA
+    ),
+)
+# Drawing goes to layers; the compositor merges them into the strip
+compositor = Compositor(np)
+score_layer = compositor.score
+animation_layer = compositor.animation
+status_layer = compositor.status
+effect_player = EffectPlayer(animation_layer)
+
+# Matrix panels show the score as text from the precompiled glyph cache
+panel = None
+if DISPLAY == "panel":
+    from panel_text import PanelText
+
+    try:
+        panel = PanelText(score_layer)
+    except ValueError as e:
+        log.warning("Panel display off, using bars: %s", e)
 
-np = neopixel.NeoPixel(machine.Pin(constants.DATA_PIN), constants.NUM_LEDS)
+# Brightness follows the room light when a sensor is fitted
+light = None
+if LIGHT_SENSOR:
+    from auto_brightness import AutoBrightness
+
+    light = AutoBrightness(LIGHT_SENSOR["pin"], BRIGHTNESS, LIGHT_SENSOR.get("curve"))
+    light.start()
+
+# Commands typed on the serial port (or scripted over it) feed the loop
+console = None
+if CONSOLE:
+    from console import Console
+
+    console = Console()
 
 # Attempt to init buzzer (fails safely if not connected)
 buzzer = None
@@ -55,15 +178,71 @@ except:
     pass
 
 # Initialize power manager
-power_mgr = create_power_manager(np)
-print("Power button ready (press to sleep/wake)")
+power_mgr = create_power_manager(
+    compositor.mask,
+    relay=relay,
+    sleep_mode=SLEEP_MODE,
+    on_deep_sleep=lambda: save_state(
+        current_wild_score, current_opp_score, current_game_id
+    ),
+)
+log.info("Power button ready (press to sleep/wake)")
+
+# LAN hub mode: share one API poller between all boxes on the network
+hub = None
+if HUB_CONFIG.get("enabled"):
+    from hub import ScoreHub
+
+    hub = ScoreHub(TEAM_ABBREV, HUB_CONFIG.get("key", ""))
+    log.info("Hub mode enabled (rank %s)", hub.rank)
+
+boot_timer.mark("hardware")
 
 # --- STATE MANAGEMENT ---
+network_ready = False
+time_synced = False
+display_dirty = False
 current_wild_score = 0
 current_opp_score = 0
+current_game_id = None
+pbp_tracker = None
+relay_sequence = None
+score_game_id = None  # game whose score changes follow_score() has seen
+pending_goals = []
+config_listener = None
+other_games = {}  # team -> game for the extra tracked teams playing today
+shown_team = TEAM_ABBREV
+net_breaker = CircuitBreaker()
+status_shown = None  # (stale, Wi-Fi lost, intermission) on the overlay
+colors = color_tables.table(BRIGHTNESS)  # colors scaled to the current level
+sta = None  # station interface, once the network is up
+# One schedule per tracked team, so sleep wakes for any of their games
+game_schedules = [GameSchedule(TEAM_ABBREV)] + [
+    GameSchedule(team, path=constants.SCHEDULE_TEAM_FILE.format(team))
+    for team in TRACKED_TEAMS[1:]
+]
+for game_schedule in game_schedules:
+    game_schedule.load()
+history = History()  # score events in flash, served at /history
+last_poll_ms = None  # when the previous poll started
+
+
+def stash_state():
+    """Crash handler: everything a warm restart needs, into RTC memory"""
+    save_state(
+        current_wild_score,
+        current_opp_score,
+        current_game_id,
+        brightness=BRIGHTNESS,
+        restarts=restarts,
+        alive_ms=wall_ms(),
+    )
+    set_flag(FLAG_WARM)
 
 
 def save_cache():
+    # RTC memory copy lets a wake from deep sleep skip the flash read
+    save_state(current_wild_score, current_opp_score, current_game_id)
     try:
         with open(constants.CACHE_FILE, "w") as f:
             f.write(f"{current_wild_score},{current_opp_score}")
@@ -72,15 +251,22 @@ def save_cache():
 
 
 def load_cache():
-    global current_wild_score, current_opp_score
+    global current_wild_score, current_opp_score, current_game_id
+    state = boot_state
+    if state:
+        current_wild_score = state["our_score"]
+        current_opp_score = state["opp_score"]
+        current_game_id = state["game_id"]
+        log.info("Restored Score: %s - %s", current_wild_score, current_opp_score)
+        return
     try:
         with open(constants.CACHE_FILE, "r") as f:
             data = f.read().split(",")
             current_wild_score = int(data[0])
             current_opp_score = int(data[1])
-            print(f"Loaded Score: {current_wild_score} - {current_opp_score}")
+            log.info("Loaded Score: %s - %s", current_wild_score, current_opp_score)
     except:
-        print("No cache found, starting at 0-0")
+        log.info("No cache found, starting at 0-0")
         current_wild_score = 0
         current_opp_score = 0
 
@@ -88,24 +274,26 @@ def load_cache():
 # --- CORE FUNCTIONS (The Abstractions) ---
 
 
-def scale_brightness(color, brightness_percent):
-    """
-    Scale RGB color by brightness percentage (0-100)
-    color: tuple of (r, g, b)
-    brightness_percent: 0-100
-    returns: tuple of (r, g, b) scaled
-    """
-    scale = brightness_percent / 100.0
-    return tuple(int(c * scale) for c in color)
+def set_brightness(level):
+    """Switch every drawing path to the color table for a new level"""
+    global BRIGHTNESS, colors, display_dirty, status_shown
+    log.info("Brightness %s%% -> %s%%", BRIGHTNESS, level)
+    BRIGHTNESS = level
+    colors = color_tables.table(level)
+    display_dirty = True
+    status_shown = None  # Redraw the status pixels too
+    save_state(
+        current_wild_score, current_opp_score, current_game_id, brightness=level
+    )
 
 
 def play_horn():
     """Simulates a hockey horn using the buzzer."""
     if not buzzer:
-        print("(No buzzer detected, skipping sound)")
+        log.info("(No buzzer detected, skipping sound)")
         return
 
-    print("HONK! HONK! HONK!")
+    log.info("HONK! HONK! HONK!")
     # Three blasts
     for _ in range(constants.HORN_BLAST_COUNT):
         start = time.ticks_ms()
@@ -128,28 +316,101 @@ def play_horn():
 
 def draw_scoreboard():
     """Updates the static LED matrix based on current scores."""
-    np.fill((0, 0, 0))  # Clear
-
-    # Scale base colors by configured brightness
-    green = scale_brightness(constants.COLOR_GREEN_BASE, BRIGHTNESS)
-    red = scale_brightness(constants.COLOR_RED_BASE, BRIGHTNESS)
+    with heap_profile.section("render scoreboard"):
+        _draw_scoreboard()
+
+
+def displayed_score():
+    """Score of the game currently on the strip, ours first"""
+    if shown_team == TEAM_ABBREV or shown_team not in other_games:
+        return current_wild_score, current_opp_score
+    our, opp, _ = team_scores(other_games[shown_team], shown_team)
+    return our, opp
+
+
+def rotate_team():
+    """Show the next tracked team that has a game today"""
+    global shown_team, display_dirty
+    playing = [TEAM_ABBREV] + [t for t in TRACKED_TEAMS[1:] if t in other_games]
+    index = playing.index(shown_team) if shown_team in playing else -1
+    team = playing[(index + 1) % len(playing)]
+    if team != shown_team:
+        shown_team = team
+        display_dirty = True
+
+
+def game_clock():
+    """(period, clock) of our game while it is on, clock None in intermission"""
+    t = pbp_tracker
+    if (
+        shown_team != TEAM_ABBREV
+        or t is None
+        or t.game_state not in constants.LIVE_GAME_STATES
+    ):
+        return None, None
+    return t.period, None if t.in_intermission else t.clock
+
+
+def _draw_scoreboard():
+    score_layer.clear()
+    our_score, opp_score = displayed_score()
+
+    # Colors come scaled to the current brightness; other tracked teams
+    # are drawn in their own color so they can't be mistaken for ours
+    green = colors.ours if shown_team == TEAM_ABBREV else colors.other_team
+    red = colors.theirs
+
+    # Panels: any score, plus the period and clock where they fit
+    if panel:
+        period, clock = game_clock()
+        panel.draw_score(
+            our_score, opp_score, green, red, colors.panel_text, period, clock
+        )
+        score_layer.write()
+        return
 
     # Draw Wild Points (Green)
     # Loop from 1 to current score
-    for i in range(1, current_wild_score + 1):
+    for i in range(1, our_score + 1):
         pixels = WILD_PIXELS.get(i, [])
         for p in pixels:
             if p < constants.NUM_LEDS:
-                np[p] = green
+                score_layer[p] = green
 
     # Draw Opponent Points (Red)
-    for i in range(1, current_opp_score + 1):
+    for i in range(1, opp_score + 1):
         pixels = OPP_PIXELS.get(i, [])
         for p in pixels:
             if p < constants.NUM_LEDS:
-                np[p] = red
+                score_layer[p] = red
 
-    np.write()
+    score_layer.write()
+
+
+def update_status():
+    """
+    Redraw the status overlay when what it shows has changed: stale data,
+    Wi-Fi lost and period intermission each light a pixel over the score
+    """
+    global status_shown
+    status = (
+        net_breaker.is_stale(),
+        sta is not None and not sta.isconnected(),
+        pbp_tracker is not None and pbp_tracker.in_intermission,
+    )
+    if status == status_shown:
+        return
+    status_shown = status
+    stale, wifi_lost, intermission = status
+
+    status_layer.clear()
+    if stale:
+        status_layer[constants.STATUS_STALE_PIXEL] = colors.stale
+    if wifi_lost:
+        status_layer[constants.STATUS_WIFI_PIXEL] = colors.wifi_lost
+    if intermission:
+        status_layer[constants.STATUS_INTERMISSION_PIXEL] = colors.intermission
+    status_layer.write()
 
 
 def trigger_goal(is_wild_goal):
@@ -157,26 +418,30 @@ def trigger_goal(is_wild_goal):
     Runs the full goal celebration.
     is_wild_goal: True for our team (Green), False for enemy (Red)
     """
-    # Base celebration color
-    base_color = (
-        constants.COLOR_GREEN_CELEBRATION
-        if is_wild_goal
-        else constants.COLOR_RED_CELEBRATION
-    )
-    # Apply brightness to celebration
-    color = scale_brightness(base_color, BRIGHTNESS)
+    # Celebration color at the current brightness
+    color = colors.celebration_ours if is_wild_goal else colors.celebration_theirs
     team_name = TEAM_ABBREV if is_wild_goal else "OPPONENT"
 
-    print(f"\nGOAL FOR {team_name}!")
+    log.info("GOAL FOR %s!", team_name)
 
     # Start Sound (in a non-blocking way if possible, but blocking is fine here)
     if buzzer:
         play_horn()
     else:
-        print("No buzzer")
+        log.info("No buzzer")
+
+    # Visual Celebration: a pre-rendered effect from flash if there is one
+    effect = (
+        constants.GOAL_EFFECT_OURS if is_wild_goal else constants.GOAL_EFFECT_THEIRS
+    )
+    duration_ms = constants.CELEBRATION_DURATION_SEC * 1000
+    animation_layer.fill((0, 0, 0))  # Effect frames cover the whole strip
+    if effect_player.play(effect_path(effect), duration_ms=duration_ms):
+        animation_layer.clear()
+        draw_scoreboard()
+        return
 
-    # Visual Celebration (10 seconds)
-    # Pulse effect
+    # Otherwise the built-in pulse effect
     start_time = time.time()
     while (time.time() - start_time) < constants.CELEBRATION_DURATION_SEC:
         # Fade In
@@ -186,8 +451,8 @@ def trigger_goal(is_wild_goal):
                 int(color[1] * (b / 255)),
                 int(color[2] * (b / 255)),
             )
-            np.fill(c_scaled)
-            np.write()
+            animation_layer.fill(c_scaled)
+            animation_layer.write()
             time.sleep(0.02)
         # Fade Out
         for b in range(150, 0, -25):
@@ -196,29 +461,46 @@ def trigger_goal(is_wild_goal):
                 int(color[1] * (b / 255)),
                 int(color[2] * (b / 255)),
             )
-            np.fill(c_scaled)
-            np.write()
+            animation_layer.fill(c_scaled)
+            animation_layer.write()
             time.sleep(0.02)
 
     # Return to scoreboard
+    animation_layer.clear()
     draw_scoreboard()
 
 
-def manual_set_score(wild, opp):
+def manual_set_score(wild, opp, period=None, latency_ms=0):
     """
-    TEST FUNCTION: Call this manually to simulate score changes.
+    Show a new score, celebrating a goal for either side
     Example: manual_set_score(1, 0) -> Triggers Wild Goal
+    period and latency_ms go into the history record of the change.
     """
-    global current_wild_score, current_opp_score
-
-    print(
-        f"DEBUG: Changing score from {current_wild_score}-{current_opp_score} to {wild}-{opp}"
+    global current_wild_score, current_opp_score, shown_team
+    shown_team = TEAM_ABBREV  # A change in our game interrupts the rotation
+
+    log.info(
+        "DEBUG: Changing score from %s-%s to %s-%s",
+        current_wild_score,
+        current_opp_score,
+        wild,
+        opp,
     )
 
     # Detect changes
     if wild > current_wild_score:
-        trigger_goal(is_wild_goal=True)
+        event = EVENT_GOAL_FOR
     elif opp > current_opp_score:
+        event = EVENT_GOAL_AGAINST
+    elif (wild, opp) != (current_wild_score, current_opp_score):
+        event = EVENT_CORRECTION
+    else:
+        event = None
+    if event:
+        history.append(current_game_id, event, wild, opp, period, latency_ms)
+    if event == EVENT_GOAL_FOR:
+        trigger_goal(is_wild_goal=True)
+    elif event == EVENT_GOAL_AGAINST:
         trigger_goal(is_wild_goal=False)
 
     # Update state
@@ -227,152 +509,619 @@ def manual_set_score(wild, opp):
 
     save_cache()
     draw_scoreboard()
-    print("Scoreboard updated.")
+    log.info("Scoreboard updated.")
 
 
 # --- NETWORK LOGIC (Simplified for readability) ---
 def check_network_score():
     """
     Memory-safe function to find the score.
-    Streams the data instead of loading it all at once.
+    Streams the data instead of loading it all at once, picking up the
+    games of every tracked team in the same request.
+    Returns our game (see score_feed), or None on errors or without a game.
     """
-    url = "https://api-web.nhle.com/v1/score/now"
-    score = -1
-    found_team = False
-
-    # 1. Force cleanup before starting the heavy network op
+    global current_game_id, other_games, display_dirty
+
+    # 1. Respect the backoff; after it expires, probe cheaply (DNS + TCP,
+    # no TLS) before paying for a full request
+    if not net_breaker.allow():
+        return None
+    if net_breaker.state == STATE_HALF_OPEN and provider.HOST:
+        failure = probe(provider.HOST)
+        if failure:
+            net_breaker.record_failure(failure)
+            return None
+
+    # 2. Force cleanup before starting the heavy network op
     gc.collect()
 
     try:
         # stream=True is CRITICAL. It keeps the data on the network socket
         # instead of downloading it all to RAM.
-        response = urequests.get(url, stream=True)
+        response = provider.request()
+        if response.status_code != 200:
+            log.error("HTTP error: %s", response.status_code)
+            response.close()
+            net_breaker.record_failure(ERROR_HTTP)
+            return None
+
+        # One pass finds every tracked team's game; reading stops as soon
+        # as all of them have turned up
+        try:
+            games = provider.consume(response.raw.read)
+        finally:
+            response.close()
+        net_breaker.record_success()
 
-        # We will keep a "rolling window" of text to search through
-        buffer = ""
-        found_target = False
+    except Exception as e:
+        log.error("Network error: %s", e, site="network")
+        net_breaker.record_failure(classify_error(e))
+        return None
 
-        # Read the stream in small chunks
-        while True:
-            chunk = response.raw.read(constants.NETWORK_CHUNK_SIZE)
-            if not chunk:
-                break
+    others = {team: game for team, game in games.items() if team != TEAM_ABBREV}
+    if others != other_games:
+        other_games = others
+        display_dirty = True
 
-            # Decode chunk to string and add to buffer
-            try:
-                buffer += chunk.decode("utf-8")
-            except:
-                continue  # Skip decode errors (rare edge case)
-
-            # Keep buffer small to save RAM
-            # But keep enough overlap to catch data split across chunks
-            if len(buffer) > constants.NETWORK_BUFFER_SIZE:
-                buffer = buffer[-constants.NETWORK_BUFFER_SIZE :]
-
-            # SEARCH LOGIC:
-            # We look for our team. The JSON structure usually puts "abbrev"
-            # and "score" close together in the same object.
-            # Example: {"abbrev":"MIN", "score":2, ...}
-
-            if f'"abbrev":"{TEAM_ABBREV}"' in buffer:
-                # We found the Wild! Now look for the score in this same window.
-                # We look for the pattern "score":X
-
-                # Simple string parsing to find "score": followed by a number
-                try:
-                    # Find the position of "abbrev":"MIN"
-                    team_idx = buffer.find(f'"abbrev":"{TEAM_ABBREV}"')
-
-                    # Look at the text AROUND the team name (before and after)
-                    # The score is usually a sibling key
-                    snippet = buffer[:]
-
-                    if '"score":' in snippet:
-                        # Extract the number after "score":
-                        parts = snippet.split('"score":')
-                        # The number is at the start of the second part
-                        # e.g., parts[1] starts with "2, ..." or "2}"
-                        score_part = parts[1]
-
-                        # Grab digits until we hit a comma or bracket
-                        score_str = ""
-                        for char in score_part:
-                            if char.isdigit():
-                                score_str += char
-                            else:
-                                break
-
-                        if score_str:
-                            score = int(score_str)
-                            found_team = True
-                            break  # Stop reading the stream, we got it!
-                except Exception as e:
-                    print(f"Parsing error: {e}")
-
-        response.close()
+    game = games.get(TEAM_ABBREV)
+    if game is not None:
+        # Otherwise our team isn't in today's feed, they probably aren't
+        # playing today
+        current_game_id = game["game_id"]
+    return game
+
+
+def poll_relay():
+    """
+    Read our team's record from the host relay (tools/score_relay.py)
+    A few dozen bytes replace the score/now and play-by-play streams.
+    """
+    global current_game_id, relay_sequence
+    from relay_client import fetch_relay_record, parse_relay_address
+    from relay_record import STATE_NONE
 
+    if not net_breaker.allow():
+        return
+    host, port = parse_relay_address(RELAY_ADDRESS)
+    try:
+        record = fetch_relay_record(host, port, TEAM_ABBREV)
     except Exception as e:
-        print(f"Network error: {e}")
-        return -1
+        log.error("Relay error: %s", e, site="relay")
+        net_breaker.record_failure(classify_error(e))
+        return
+    if record is None:
+        net_breaker.record_failure(ERROR_HTTP)
+        return
+    net_breaker.record_success()
+    if record["state"] == STATE_NONE:
+        # The relay hasn't seen a game for us today; keep the cached score,
+        # as check_network_score() does when we're missing from the feed
+        return
+    if record["sequence"] == relay_sequence:
+        return
+
+    first = relay_sequence is None
+    relay_sequence = record["sequence"]
+    current_game_id = record["game_id"] or None
+    scores = (record["team_score"], record["opp_score"])
+    if scores == (current_wild_score, current_opp_score):
+        return
+    if first:
+        set_score_quietly(*scores)
+        return
+
+    queue_score_change(
+        scores,
+        sort_order=record["sequence"],
+        period=record["period"],
+        time_left=f"{record['clock'] // 60}:{record['clock'] % 60:02d} left",
+    )
+
+
+def queued_score():
+    """The score once every queued goal has been shown"""
+    if pending_goals:
+        latest = pending_goals[-1]
+        return latest["our_score"], latest["opp_score"]
+    return current_wild_score, current_opp_score
+
+
+def queue_score_change(scores, sort_order=None, period=None, time_left=""):
+    """Queue a goal event for a score change seen without the play-by-play"""
+    before = queued_score()
+    if scores == before:
+        return
+    pending_goals.append(
+        {
+            "sort_order": sort_order,
+            "team_id": None,
+            "ours": scores[0] > before[0],
+            "scorer_id": None,
+            "period": period,
+            "time": time_left,
+            "strength": "ev",
+            "our_score": scores[0],
+            "opp_score": scores[1],
+        }
+    )
+
 
-    if found_team:
-        return score
+def follow_score(game):
+    """
+    Queue goals from score changes, for leagues without a play-by-play feed
+    The first poll of a game only catches up, like the play-by-play.
+    """
+    global score_game_id
+    scores = team_scores(game, TEAM_ABBREV)[:2]
+    if score_game_id != game["game_id"]:
+        score_game_id = game["game_id"]
+        if scores != (current_wild_score, current_opp_score):
+            log.info("Caught up on game %s", score_game_id)
+            set_score_quietly(*scores)
+        return
+    queue_score_change(scores)
+
+
+def poll_game():
+    """
+    Find our game and queue any goals scored since the last poll
+    The first poll of a game only catches up, so booting mid-game
+    does not replay every earlier goal.
+    """
+    global last_poll_ms
+    started = time.ticks_ms()
+    queued = len(pending_goals)
+    _poll_game()
+    # New goals weren't in the feed at the previous poll, so how late the
+    # box reacted is counted from when that poll started
+    for goal in pending_goals[queued:]:
+        goal["after_ms"] = started if last_poll_ms is None else last_poll_ms
+    last_poll_ms = started
+
+
+def _poll_game():
+    global pbp_tracker, display_dirty
+
+    if RELAY_ADDRESS:
+        with heap_profile.section("http relay"):
+            poll_relay()
+        return
+
+    with heap_profile.section("http score"):
+        game = check_network_score()
+    if game is None:
+        return
+    if not provider.PLAY_BY_PLAY:
+        follow_score(game)
+        return
+
+    if pbp_tracker is None or pbp_tracker.game_id != current_game_id:
+        pbp_tracker = PlayByPlayTracker(current_game_id, TEAM_ABBREV)
+
+    catching_up = not pbp_tracker.primed
+    try:
+        with heap_profile.section("http play-by-play"):
+            goals = pbp_tracker.poll()
+    except Exception as e:
+        log.error("Play-by-play error: %s", e, site="pbp")
+        net_breaker.record_failure(classify_error(e))
+        return
+
+    if panel:
+        display_dirty = True  # Every poll brings a new period clock
+
+    if catching_up:
+        if goals:
+            last = goals[-1]
+            log.info("Caught up on game %s", current_game_id)
+            set_score_quietly(last["our_score"], last["opp_score"])
+        return
+
+    pending_goals.extend(goals)
+
+
+def set_score_quietly(wild, opp):
+    """Update the scoreboard without a celebration"""
+    global current_wild_score, current_opp_score
+    if (wild, opp) != (current_wild_score, current_opp_score):
+        history.append(current_game_id, EVENT_CATCH_UP, wild, opp)
+    current_wild_score = wild
+    current_opp_score = opp
+    save_cache()
+    draw_scoreboard()
+
+
+def handle_goal(goal):
+    """Celebrate a goal event from the play-by-play feed"""
+    team_name = TEAM_ABBREV if goal["ours"] else "OPPONENT"
+    when = f"P{goal['period']} {goal['time']}" if goal["period"] else "score change"
+    log.info(
+        "Goal event: %s %s (%s) scorer %s",
+        team_name,
+        when,
+        goal["strength"],
+        goal["scorer_id"],
+    )
+    latency = 0
+    if "after_ms" in goal:
+        latency = time.ticks_diff(time.ticks_ms(), goal["after_ms"])
+    manual_set_score(goal["our_score"], goal["opp_score"], goal["period"], latency)
+
+
+def check_schedule():
+    """
+    Refresh the cached schedules once a day and deep-sleep (relay and radio
+    off) until shortly before the next game of any tracked team when
+    nothing is on.
+    Wakes through a normal boot that restores the score from RTC memory.
+    """
+    for game_schedule in game_schedules:
+        if game_schedule.needs_refresh():
+            try:
+                game_schedule.refresh()
+            except Exception as e:
+                log.error("Schedule error for %s: %s", game_schedule.team_abbrev, e)
+                return
+
+    seconds = combined_sleep_seconds(game_schedules)
+    if not seconds or pending_goals:
+        return
+
+    log.info("No game for a while, sleeping %s minutes", seconds // 60)
+    save_state(current_wild_score, current_opp_score, current_game_id)
+    compositor.mask.fill((0, 0, 0))
+    compositor.mask.write()
+    relay.off()
+    import network
+
+    network.WLAN(network.STA_IF).active(False)
+    log.flush()
+    machine.deepsleep(seconds * 1000)
+
+
+def device_status():
+    """Live state for /status, read by tools/fleet.py"""
+    rssi = None
+    if sta is not None and sta.isconnected():
+        try:
+            rssi = sta.status("rssi")
+        except Exception:
+            pass
+    return {
+        "hostname": WIFI_CREDENTIALS[2],
+        "team": TEAM_ABBREV,
+        "provider": provider.NAME,
+        "score": [current_wild_score, current_opp_score],
+        "game_id": current_game_id,
+        "brightness": BRIGHTNESS,
+        "sleeping": power_mgr.is_sleeping,
+        "network": {"ready": network_ready, "stale": net_breaker.is_stale()},
+        "rssi": rssi,
+        "uptime_sec": time.ticks_ms() // 1000,
+        "free_heap": gc.mem_free(),
+        "restarts": restarts,
+        "recovery_ms": warm_recovery_ms,
+        "history": history.total,
+        "display": compositor.stats(),
+        "strip": np.stats(),
+        "light": light.stats() if light else None,
+        "console": console.stats() if console else None,
+    }
+
+
+def apply_settings(settings):
+    """Put device settings changed through /device into effect"""
+    global POLL_INTERVAL, next_poll
+    if "brightness" in settings:
+        if light:
+            light.hold(settings["brightness"])
+        set_brightness(settings["brightness"])
+    if "log_level" in settings:
+        log.set_level(settings["log_level"])
+    if "poll_interval" in settings:
+        POLL_INTERVAL = settings["poll_interval"]
+        sooner = time.ticks_add(time.ticks_ms(), POLL_INTERVAL * 1000)
+        if time.ticks_diff(sooner, next_poll) < 0:
+            next_poll = sooner
+    log.info("Settings applied: %s", settings)
+
+
+def discovery_hello():
+    """Reply to fleet discovery probes"""
+    import json
+
+    hello = {
+        "hostname": WIFI_CREDENTIALS[2],
+        "team": TEAM_ABBREV,
+        "port": constants.DEFAULT_HTTP_PORT,
+    }
+    return json.dumps(hello).encode()
+
+
+def run_command(command):
+    """Run a command from the serial console"""
+    import json
+
+    name, args = command
+    if name == "score":
+        our, opp, period = args
+        queue_score_change((our, opp), period=period)
+    elif name == "goal":
+        our, opp = queued_score()
+        queue_score_change((our + 1, opp) if args[0] else (our, opp + 1))
+    elif name == "brightness":
+        if light:
+            light.hold(args[0])
+        set_brightness(args[0])
+    elif name == "metrics":
+        print(json.dumps(device_status()))
+
+
+def run_demo_sequence():
+    """
+    TEST FUNCTION: Step through a scripted game without the network
+    A console replay file does the same without holding up the loop.
+    """
+    manual_set_score(0, 0)
+    time.sleep(5)
+    manual_set_score(1, 0)
+
+    time.sleep(15)  # Short sleep to allow Shell interrupts
+    manual_set_score(1, 1)
+    time.sleep(15)
+    manual_set_score(2, 1)
+    time.sleep(5)
+    manual_set_score(3, 1)
+
+    manual_set_score(4, 1)
+
+    manual_set_score(5, 1)
+
+    manual_set_score(6, 1)
+    time.sleep(20)
+
+
+def start_network():
+    """
+    Bring up Wi-Fi and set the clock, in a background thread so the cached
+    score stays on display while we connect. The thread ends once the
+    network is up; the config page is answered from the main loop.
+    """
+    global network_ready, sta
+    from wifi_manager import WiFiManager
+
+    # Returns once connected; without a network it stays in AP mode and
+    # keeps retrying until the configured network comes back. A warm
+    # restart goes straight back to the access point and IP it just had.
+    manager = WiFiManager(
+        show_spinner=False,
+        led_strip=animation_layer,
+        link=boot_state["link"] if warm_boot else None,
+        indicator_color=colors.indicator,
+    )
+    connected = manager.connect(WIFI_CREDENTIALS)
+    boot_timer.mark("wifi")
+    boot_timer.report()
+    if not connected:
+        return
+
+    network_ready = True
+    animation_layer.clear()  # Remove the AP mode fill, if it was shown
+    if manager.link:
+        save_link(manager.link)
+
+    # The schedule sleep needs a real wall clock; the RTC keeps it through
+    # a warm restart
+    global time_synced
+    if warm_boot and boot_state["flags"] & FLAG_TIME_SYNCED:
+        time_synced = True
     else:
-        # If we went through the whole stream and didn't find MIN,
-        # they probably aren't playing today.
-        return -2
+        time_synced = sync_time()
+    if time_synced:
+        set_flag(FLAG_TIME_SYNCED)
 
-    pass
+    import network
+
+    sta = network.WLAN(network.STA_IF)
+    ip = sta.ifconfig()[0]
+    log.info("Configuration page at: http://%s", ip)
 
 
 # --- MAIN EXECUTION ---
 load_cache()
+# Only a crash from here on makes the next boot warm; the clock is only
+# trusted again once this boot has synced it
+save_state(
+    current_wild_score,
+    current_opp_score,
+    current_game_id,
+    flags=boot_state["flags"] & FLAG_TIME_SYNCED if warm_boot else 0,
+    restarts=restarts,
+    brightness=BRIGHTNESS,
+)
+boot_timer.mark("cache")
 draw_scoreboard()
+boot_timer.mark("first draw")
+boot_timer.report()
+if warm_boot:
+    warm_recovery_ms = watchdog.recovery_ms(boot_state)
+    log.info(
+        "Warm restart: score back on display %sms after the last sign of life",
+        warm_recovery_ms,
+    )
+
+_thread.start_new_thread(start_network, ())
+
+# Made it to the loop: keep an OTA update that just got installed
+import ota
+
+ota.confirm()
+
+if auto_restart:
+    watchdog.start()
 
 # Loop
+next_poll = time.ticks_ms()
+loop_started = next_poll
+next_schedule_check = time.ticks_add(next_poll, constants.SCHEDULE_CHECK_SEC * 1000)
+next_heap_report = time.ticks_add(next_poll, constants.HEAP_REPORT_SEC * 1000)
+next_rotate = time.ticks_add(next_poll, constants.TEAM_ROTATE_SEC * 1000)
 while True:
     try:
+        watchdog.feed()
+
         # Check for power button press
         state_changed = power_mgr.update()
+        np.update()  # Relay off after a dark spell
 
         # If we just woke from sleep, reconnect WiFi
         if state_changed and not power_mgr.is_sleeping:
-            print("Reconnecting to WiFi after wake...")
-            from wifi_manager import connect_wifi
+            log.info("Reconnecting to WiFi after wake...")
+            from wifi_manager import WiFiManager
 
-            connect_wifi()
+            wake_timer = PhaseTimer("Wake")
             draw_scoreboard()  # Restore display
+            wake_timer.mark("display")
+            # Falling back to AP mode here blocks the loop; the watchdog
+            # then restarts the box, which keeps AP mode in the background
+            WiFiManager(
+                led_strip=animation_layer, indicator_color=colors.indicator
+            ).connect(WIFI_CREDENTIALS)
+            animation_layer.clear()
+            wake_timer.mark("wifi")
+            poll_game()
+            wake_timer.mark("first poll")
+            wake_timer.report()
+            next_poll = time.ticks_add(time.ticks_ms(), POLL_INTERVAL * 1000)
 
         # Skip normal operations if sleeping
         if power_mgr.is_sleeping:
-            time.sleep(0.1)  # Small sleep to reduce CPU usage
+            if config_listener:
+                config_listener.close()  # The socket dies with the radio
+                config_listener = None
+            log.flush()  # The UART is cut off while the chip sleeps
+            # Light/deep sleep until the button is pressed; light sleep
+            # wakes in time to feed the watchdog
+            power_mgr.idle(watchdog.sleep_limit_ms())
             continue
 
         # Normal operation continues below...
-        # 1. Listen for User Input via Thonny Shell
-        # In Thonny, you can type "manual_set_score(1,0)" in the shell
-        # while this loop is sleeping!
+        # 1. Commands from the serial port or the Thonny shell, e.g. "s 1 0"
+        # for a goal or "r demo.txt" to replay a scripted game (h for help).
+        # Score changes join the goal queue and are celebrated below.
+        if console:
+            for command in console.poll():
+                run_command(command)
+
+        # Answer the config page; its code is only loaded while in use
+        if network_ready:
+            if config_listener is None:
+                config_listener = ConfigListener(
+                    constants.DEFAULT_HTTP_PORT,
+                    status=device_status,
+                    hello=discovery_hello(),
+                    apply=apply_settings,
+                )
+                config_listener.open()
+            config_listener.poll()
+
+        # 2. Run Network Check (once Wi-Fi is up)
+        # In hub mode only the elected hub polls; followers take its packets
+        if hub and network_ready:
+            shared = hub.update()
+            if shared and shared[:2] != (current_wild_score, current_opp_score):
+                current_game_id = shared[2] or None
+                manual_set_score(shared[0], shared[1])
+
+        if network_ready and time.ticks_diff(time.ticks_ms(), next_poll) >= 0:
+            if hub is None or hub.is_hub:
+                with heap_profile.section("poll"):
+                    poll_game()
+                if hub:
+                    # Share goals right away, before our own celebration runs
+                    shared = queued_score()
+                    hub.publish(shared[0], shared[1], current_game_id)
+            next_poll = time.ticks_add(time.ticks_ms(), POLL_INTERVAL * 1000)
+
+        # 3. Sleep through the gaps between games
+        if (
+            SCHEDULE_SLEEP
+            and time_synced
+            and time.ticks_diff(time.ticks_ms(), next_schedule_check) >= 0
+        ):
+            check_schedule()
+            next_schedule_check = time.ticks_add(
+                time.ticks_ms(), constants.SCHEDULE_CHECK_SEC * 1000
+            )
+
+        # Rotate between our game and the other tracked teams' games
+        if (
+            len(TRACKED_TEAMS) > 1
+            and time.ticks_diff(time.ticks_ms(), next_rotate) >= 0
+        ):
+            rotate_team()
+            next_rotate = time.ticks_add(
+                time.ticks_ms(), constants.TEAM_ROTATE_SEC * 1000
+            )
 
-        # 2. Run Network Check
-        manual_set_score(0, 0)
-        time.sleep(5)
-        manual_set_score(1, 0)
+        # A new light level swaps the color table and redraws below
+        if light:
+            level = light.update()
+            if level is not None:
+                set_brightness(level)
 
-        time.sleep(15)  # Short sleep to allow Shell interrupts
-        manual_set_score(1, 1)
-        time.sleep(15)
-        manual_set_score(2, 1)
-        time.sleep(5)
-        manual_set_score(3, 1)
+        if display_dirty:
+            display_dirty = False
+            draw_scoreboard()
 
-        manual_set_score(4, 1)
+        # Show or clear the status indicators as things come and go, then
+        # merge whatever layers changed into the strip
+        update_status()
+        compositor.render()
 
-        manual_set_score(5, 1)
+        # 4. Celebrate new goals one at a time
+        if pending_goals:
+            handle_goal(pending_goals.pop(0))
 
-        manual_set_score(6, 1)
-        time.sleep(20)
+        if (
+            heap_profile.enabled
+            and time.ticks_diff(time.ticks_ms(), next_heap_report) >= 0
+        ):
+            heap_profile.report()
+            next_heap_report = time.ticks_add(
+                time.ticks_ms(), constants.HEAP_REPORT_SEC * 1000
+            )
+
+        # Up long enough: the crash restarts in a row are over
+        if restarts and time.ticks_diff(time.ticks_ms(), loop_started) >= (
+            constants.WDT_STABLE_SEC * 1000
+        ):
+            restarts = 0
+            save_state(
+                current_wild_score, current_opp_score, current_game_id, restarts=0
+            )
+
+        # A few log lines per pass keeps UART writes out of the hot paths
+        log.flush(constants.LOG_FLUSH_PER_LOOP)
+
+        time.sleep(0.1)  # Short sleep to allow Shell interrupts
 
     except KeyboardInterrupt:
-        print("\nShutting down...")
+        log.info("Shutting down...")
+        if auto_restart:
+            log.warning("Watchdog still armed, the box restarts shortly")
         power_mgr.enter_sleep_mode()
+        log.flush()
         break
+    except Exception as e:
+        # Keep the last log lines for a post-mortem before going down
+        log.error("Main loop crashed: %s", e)
+        log.dump()
+        if auto_restart:
+            # Warm restart: the next boot takes the live state from RTC
+            # memory and is back on the score in a second or two
+            stash_state()
+            log.flush()
+            machine.reset()
+        log.flush()
+        raise
@@ -0,0 +1,132 @@
+"""
+Retry policy for network polls: exponential backoff with jitter and a
+circuit breaker that tells DNS, connect, TLS and HTTP failures apart
+"""
+
+import errno
+import random
+import socket
+import constants
+import log
+from utils import ticks_ms, ticks_diff, ticks_add
+
+ERROR_DNS = "dns"
+ERROR_CONNECT = "connect"
+ERROR_TLS = "tls"
+ERROR_HTTP = "http"
+
+STATE_CLOSED = "closed"  # polling normally
+STATE_OPEN = "open"  # backing off, no network traffic
+STATE_HALF_OPEN = "half-open"  # backoff over, probe before a full request
+
+CONNECT_ERRNOS = (
+    errno.ECONNREFUSED,
+    errno.ECONNRESET,
+    errno.ECONNABORTED,
+    errno.ETIMEDOUT,
+    errno.EHOSTUNREACH,
+    errno.ENOTCONN,
+)
+
+
+def classify_error(e):
+    """Map an exception from a network request to an ERROR_* kind"""
+    code = e.args[0] if isinstance(e, OSError) and e.args else None
+    if isinstance(code, int):
+        # lwIP getaddrinfo failures surface as EAI_* codes, e.g. -202
+        if 200 <= abs(code) < 300:
+            return ERROR_DNS
+        if code in CONNECT_ERRNOS:
+            return ERROR_CONNECT
+        # mbedTLS errors are large negative codes, e.g. -29312
+        if code <= -0x1000:
+            return ERROR_TLS
+    text = str(e)
+    if "getaddrinfo" in text:
+        return ERROR_DNS
+    if "SSL" in text or "TLS" in text:
+        return ERROR_TLS
+    return ERROR_CONNECT
+
+
+def probe(host, port=443):
+    """
+    Cheap health check: resolve the host and open a TCP connection
+    without the TLS handshake. Returns None if healthy, else an ERROR_* kind
+    """
+    try:
+        addr = socket.getaddrinfo(host, port)[0][-1]
+    except Exception:
+        return ERROR_DNS
+    s = socket.socket()
+    try:
+        s.settimeout(constants.PROBE_TIMEOUT_SEC)
+        s.connect(addr)
+    except Exception:
+        return ERROR_CONNECT
+    finally:
+        s.close()
+    return None
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=None):
+        """
+        threshold: consecutive failures before the circuit opens
+        """
+        if threshold is None:
+            threshold = constants.BREAKER_FAILURE_THRESHOLD
+        self.threshold = threshold
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.last_error = None
+        self.retry_at = 0
+        self.last_success = None
+
+    def allow(self):
+        """
+        Returns True if a request may be attempted now
+        When the backoff expires the circuit goes half-open and the
+        caller should run a probe before the full request.
+        """
+        if self.state != STATE_OPEN:
+            return True
+        if ticks_diff(ticks_ms(), self.retry_at) < 0:
+            return False
+        self.state = STATE_HALF_OPEN
+        return True
+
+    def record_success(self):
+        if self.state != STATE_CLOSED:
+            log.info("Network recovered, circuit closed")
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.last_error = None
+        self.last_success = ticks_ms()
+
+    def record_failure(self, kind):
+        self.failures += 1
+        self.last_error = kind
+        if self.state == STATE_CLOSED and self.failures < self.threshold:
+            return
+
+        # Exponential backoff from a per-error base, with "equal jitter":
+        # half the delay is fixed, the other half random
+        base = constants.BACKOFF_BASE_SEC.get(kind, constants.BACKOFF_MAX_SEC)
+        exponent = min(self.failures - self.threshold, 10)
+        delay = min(constants.BACKOFF_MAX_SEC, base * (1 << max(exponent, 0)))
+        delay_ms = int(delay * 500 + delay * 500 * random.getrandbits(8) / 256)
+
+        self.state = STATE_OPEN
+        self.retry_at = ticks_add(ticks_ms(), delay_ms)
+        log.error("Network %s error, retrying in %ss", kind, delay_ms // 1000)
+
+    def is_stale(self):
+        """True if the score on display may be out of date"""
+        if self.state != STATE_CLOSED:
+            return True
+        if self.last_success is None:
+            return False
+        return ticks_diff(ticks_ms(), self.last_success) > (
+            constants.STALE_AFTER_SEC * 1000
+        )
@@ -0,0 +1,268 @@
+"""
+Delta over-the-air code updates
+Fetches a manifest of file paths and sha256 hashes (written by
+tools/build_mpy.py), compares it with the files on flash and downloads
+only the ones that differ. Each file is streamed to a temporary name and
+verified before anything is replaced; the old versions are kept as .bak
+until the new code reaches the main loop, otherwise boot.py rolls back.
+"""
+
+import gc
+import hashlib
+import json
+import os
+import binascii
+import constants
+import log
+
+NEW_SUFFIX = ".new"
+BAK_SUFFIX = ".bak"
+
+_confirm_timer = None  # resets the box if new code never reaches the loop
+
+
+def file_hash(path):
+    """Hex sha256 of a file, or None if it doesn't exist"""
+    digest = hashlib.sha256()
+    buf = bytearray(constants.OTA_CHUNK_SIZE)
+    view = memoryview(buf)
+    try:
+        with open(path, "rb") as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                digest.update(view[:n])
+    except OSError:
+        return None
+    return binascii.hexlify(digest.digest()).decode()
+
+
+def _exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _make_dirs(path):
+    parts = path.split("/")[:-1]
+    for i in range(1, len(parts) + 1):
+        try:
+            os.mkdir("/".join(parts[:i]))
+        except OSError:
+            pass  # Already there
+
+
+def _open_url(url):
+    import urequests
+
+    response = urequests.get(url, stream=True)
+    if response.status_code != 200:
+        response.close()
+        raise OSError(f"HTTP {response.status_code} for {url}")
+    return response
+
+
+def load_state():
+    try:
+        with open(constants.OTA_STATE_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(state):
+    with open(constants.OTA_STATE_FILE, "w") as f:
+        json.dump(state, f)
+
+
+def _no_progress():
+    pass
+
+
+def plan(manifest, root="", progress=_no_progress):
+    """
+    Compare a manifest with the filesystem
+    Returns (changed paths, stale code files to remove)
+    """
+    files = manifest["files"]
+    changed = []
+    for path in sorted(files):
+        progress()
+        if file_hash(root + path) != files[path]["sha256"]:
+            changed.append(path)
+    # A leftover .py would shadow a new .mpy of the same module (and the
+    # other way round when switching back to source)
+    stale = [
+        name
+        for name in os.listdir(root or ".")
+        if name.endswith((".py", ".mpy")) and name not in files
+    ]
+    return changed, stale
+
+
+def download(url, path, expected, open_url=_open_url, progress=_no_progress):
+    """
+    Stream url into path + NEW_SUFFIX, returns bytes written
+    progress is called for every chunk (the config server feeds the watchdog)
+    """
+    gc.collect()
+    tmp = path + NEW_SUFFIX
+    _make_dirs(path)
+    digest = hashlib.sha256()
+    buf = bytearray(constants.OTA_CHUNK_SIZE)
+    view = memoryview(buf)
+    size = 0
+    response = open_url(url)
+    try:
+        with open(tmp, "wb") as f:
+            while True:
+                n = response.raw.readinto(buf)
+                if not n:
+                    break
+                digest.update(view[:n])
+                f.write(view[:n])
+                size += n
+                progress()
+    finally:
+        response.close()
+
+    if binascii.hexlify(digest.digest()).decode() != expected:
+        _remove(tmp)
+        raise ValueError(f"Hash mismatch for {path}")
+    return size
+
+
+def update(base_url, root="", open_url=_open_url, progress=_no_progress):
+    """
+    Apply the manifest at base_url. Returns (files changed, bytes fetched);
+    the caller resets the device when files changed.
+    Nothing on flash is replaced until every download has been verified.
+    progress is called per file hashed and per chunk downloaded, so a
+    long update can keep the watchdog fed.
+    """
+    if not base_url.endswith("/"):
+        base_url += "/"
+
+    response = open_url(base_url + constants.OTA_MANIFEST)
+    try:
+        manifest = json.loads(response.raw.read())
+    finally:
+        response.close()
+
+    changed, stale = plan(manifest, root, progress)
+    if not changed and not stale:
+        log.info("OTA: already up to date")
+        return 0, 0
+
+    fetched = 0
+    try:
+        for path in changed:
+            fetched += download(
+                base_url + path,
+                root + path,
+                manifest["files"][path]["sha256"],
+                open_url,
+                progress,
+            )
+    except Exception:
+        for path in changed:
+            _remove(root + path + NEW_SUFFIX)
+        raise
+
+    # Swap in: keep the old versions until the new code proves itself.
+    # The state is written first, so a reset partway through leaves
+    # boot.py the list of what to put back
+    added = [path for path in changed if not _exists(root + path)]
+    replaced = [path for path in changed if path not in added] + stale
+    for path in replaced:
+        _remove(root + path + BAK_SUFFIX)  # Only this update's backups count
+    state = {"replaced": replaced, "added": added, "boots": 0, "swapped": False}
+    save_state(state)
+    for path in changed:
+        target = root + path
+        if path not in added:
+            os.rename(target, target + BAK_SUFFIX)
+        os.rename(target + NEW_SUFFIX, target)
+    for name in stale:
+        os.rename(root + name, root + name + BAK_SUFFIX)
+    state["swapped"] = True
+    save_state(state)
+
+    log.info(
+        "OTA: %s files updated, %s removed, %s bytes fetched",
+        len(changed),
+        len(stale),
+        fetched,
+    )
+    return len(changed) + len(stale), fetched
+
+
+def rollback(state, root=""):
+    """
+    Put the .bak files back and drop files the update added. Works on a
+    swap that was cut short: a file without a .bak was never replaced.
+    """
+    for path in state.get("added", []):
+        _remove(root + path)
+        _remove(root + path + NEW_SUFFIX)
+    for path in state.get("replaced", []):
+        _remove(root + path + NEW_SUFFIX)
+        if _exists(root + path + BAK_SUFFIX):
+            _remove(root + path)
+            os.rename(root + path + BAK_SUFFIX, root + path)
+    _remove(constants.OTA_STATE_FILE)
+    log.warning("OTA: new code did not start, rolled back")
+
+
+def check_pending():
+    """
+    Call from boot.py. After an update the new code gets one boot to reach
+    the main loop; a timer resets the box if it hangs or drops to the REPL.
+    Returns True if a rollback happened (the caller should reset).
+    """
+    state = load_state()
+    if state is None:
+        return False
+    # A reset in the middle of the swap leaves a mix of old and new files
+    if state["boots"] >= 1 or not state.get("swapped", True):
+        rollback(state)
+        return True
+
+    state["boots"] += 1
+    save_state(state)
+
+    import machine
+
+    global _confirm_timer
+    _confirm_timer = machine.Timer(0)
+    _confirm_timer.init(
+        mode=machine.Timer.ONE_SHOT,
+        period=constants.OTA_CONFIRM_TIMEOUT_SEC * 1000,
+        callback=lambda t: machine.reset(),
+    )
+    return False
+
+
+def confirm():
+    """Call once the main loop runs: keeps the update and drops the backups"""
+    global _confirm_timer
+    state = load_state()
+    if state is None:
+        return
+    if _confirm_timer:
+        _confirm_timer.deinit()
+        _confirm_timer = None
+    for path in state.get("replaced", []):
+        _remove(path + BAK_SUFFIX)
+    _remove(constants.OTA_STATE_FILE)
+    log.info("OTA: update confirmed")
@@ -0,0 +1,125 @@
+"""
+Score, period and clock text for 2D LED matrix panels
+Glyphs come precompiled from glyphs.py (tools/build_glyphs.py) as one mask
+per wiring line, in strip order, for the panel's layout. Each line is
+colored once and cached, so drawing a glyph is one slice copy per line
+into the layer buffer with no per-pixel coordinate math.
+"""
+
+from glyphs import GLYPHS, WIDTH, HEIGHT, LAYOUT, SERPENTINE, TOP, SPACING
+
+COLUMNS = LAYOUT == "columns"
+
+
+def period_label(period):
+    """P1-P3, then OT (SO has no period number in the feed)"""
+    if period is None:
+        return ""
+    return f"P{period}" if period <= 3 else "OT"
+
+
+class PanelText:
+    def __init__(self, layer):
+        """
+        layer: compositor layer (or strip) at least WIDTH x HEIGHT pixels long
+        """
+        if WIDTH * HEIGHT > layer.n:
+            raise ValueError(
+                f"glyphs.py is for a {WIDTH}x{HEIGHT} panel, strip has {layer.n}"
+            )
+        self.layer = layer
+        self.lines = {}  # (mask, color) -> colored line in GRB bytes
+
+    def _line(self, mask, color):
+        key = (mask, color)
+        line = self.lines.get(key)
+        if line is None:
+            r, g, b = color
+            colored = bytearray(3 * len(mask))
+            for i in range(len(mask)):
+                if mask[i]:
+                    colored[3 * i] = g
+                    colored[3 * i + 1] = r
+                    colored[3 * i + 2] = b
+            line = bytes(colored)
+            self.lines[key] = line
+        return line
+
+    def width(self, text):
+        """Columns taken by text, spacing included"""
+        total = -SPACING
+        for char in text:
+            glyph = GLYPHS.get(char)
+            if glyph:
+                total += glyph[0] + SPACING
+        return max(0, total)
+
+    def draw(self, text, x, color):
+        """
+        Draw text with its left edge at panel column x; characters without
+        a glyph are skipped and text past the right edge is cut at a glyph
+        Returns the column after the text.
+        """
+        buf = self.layer.buf
+        for char in text:
+            glyph = GLYPHS.get(char)
+            if glyph is None:
+                continue
+            width, lines = glyph
+            if x + width > WIDTH:
+                break
+            if COLUMNS:
+                # One line per glyph column, covering the panel column
+                for column in range(x, x + width):
+                    forward, reverse = lines[column - x]
+                    mask = reverse if SERPENTINE and column & 1 else forward
+                    line = self._line(mask, color)
+                    start = 3 * column * HEIGHT
+                    buf[start : start + len(line)] = line
+            else:
+                # One line per font row, covering the glyph's width
+                for row in range(TOP, TOP + len(lines)):
+                    forward, reverse = lines[row - TOP]
+                    if SERPENTINE and row & 1:
+                        mask = reverse
+                        start = row * WIDTH + WIDTH - x - width
+                    else:
+                        mask = forward
+                        start = row * WIDTH + x
+                    line = self._line(mask, color)
+                    start *= 3
+                    buf[start : start + len(line)] = line
+            x += width + SPACING
+        return x
+
+    def draw_score(
+        self, our, opp, our_color, opp_color, dash_color, period=None, clock=None
+    ):
+        """
+        Blank the layer and draw "our-opp" from the left edge, then the
+        period and clock on the right if the panel has room: the clock is
+        dropped first, then the period. The dash goes if even the score
+        alone is too wide (two-digit scores on a narrow panel).
+        """
+        layer = self.layer
+        layer.fill((0, 0, 0))
+        ours = str(our)
+        theirs = str(opp)
+
+        dash = "-"
+        used = self.width(ours + dash + theirs)
+        if used > WIDTH:
+            dash = ""
+            used = self.width(ours + theirs)
+
+        x = self.draw(ours, 0, our_color)
+        if dash:
+            x = self.draw(dash, x, dash_color)
+        self.draw(theirs, x, opp_color)
+
+        label = period_label(period)
+        room = WIDTH - used - 2 * SPACING
+        for extra in (f"{label} {clock}" if label and clock else label, label):
+            if extra and self.width(extra) <= room:
+                self.draw(extra, WIDTH - self.width(extra), dash_color)
+                break
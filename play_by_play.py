@@ -0,0 +1,269 @@
+"""
+Incremental play-by-play consumer for the NHL gamecenter feed
+Remembers the last processed event and only reports new goals
+"""
+
+import gc
+import constants
+
+PLAYS_KEY = b'"plays":['
+PLAY_START = b'{"eventId":'
+SORT_KEY = b'"sortOrder":'
+GOAL_TYPE = b'"typeDescKey":"goal"'
+GAME_STATE_KEY = b'"gameState":'
+INTERMISSION_KEY = b'"inIntermission":'
+PERIOD_KEY = b'"periodDescriptor":{"number":'
+CLOCK_KEY = b'"timeRemaining":'
+TEAM_KEYS = ((b'"awayTeam":', False), (b'"homeTeam":', True))
+
+# Bytes kept from the header between chunks, enough to hold a team
+# object's "id" and "abbrev" if the key is split across two reads
+HEADER_TAIL = 320
+
+
+def _read_int(buf, start):
+    """
+    Parse an integer at buf[start:] without allocating a substring
+    Returns the value, or None if there are no digits or the number
+    runs to the end of buf (it may continue in the next chunk)
+    """
+    value = 0
+    digits = 0
+    i = start
+    n = len(buf)
+    while i < n:
+        c = buf[i]
+        if c < 48 or c > 57:
+            break
+        value = value * 10 + (c - 48)
+        digits += 1
+        i += 1
+    if not digits or i == n:
+        return None
+    return value
+
+
+def _find_int(buf, key, start=0):
+    """Find key in buf and return the integer that follows it"""
+    idx = buf.find(key, start)
+    if idx < 0:
+        return None
+    return _read_int(buf, idx + len(key))
+
+
+def _find_str(buf, key, start=0):
+    """Find key in buf and return the quoted string that follows it"""
+    idx = buf.find(key, start)
+    if idx < 0:
+        return None
+    idx += len(key)
+    if idx < len(buf) and buf[idx] == 34:  # opening quote
+        idx += 1
+    end = buf.find(b'"', idx)
+    if end < 0:
+        return None
+    return buf[idx:end].decode()
+
+
+def goal_strength(situation, scored_by_home):
+    """
+    Classify a goal from its 4-digit situation code
+    Digits are: away goalie, away skaters, home skaters, home goalie
+    Returns "en" (empty net), "pp" (power play), "sh" (short handed) or "ev"
+    """
+    if not situation or len(situation) != 4:
+        return "ev"
+    away_goalie = int(situation[0])
+    away_skaters = int(situation[1])
+    home_skaters = int(situation[2])
+    home_goalie = int(situation[3])
+
+    if scored_by_home:
+        own, opp, opp_goalie = home_skaters, away_skaters, away_goalie
+    else:
+        own, opp, opp_goalie = away_skaters, home_skaters, home_goalie
+
+    if opp_goalie == 0:
+        return "en"
+    if own > opp:
+        return "pp"
+    if own < opp:
+        return "sh"
+    return "ev"
+
+
+class PlayByPlayTracker:
+    def __init__(self, game_id, team_abbrev):
+        """
+        Track one game's play-by-play feed
+        game_id: NHL game ID (e.g. 2024020123)
+        team_abbrev: our team, used to label goals as ours or the opponent's
+        """
+        self.game_id = game_id
+        self.team_abbrev = team_abbrev
+        self.last_sort_order = -1
+        self.primed = False
+        self.game_state = None
+        self.home_team_id = None
+        self.away_team_id = None
+        self.home_abbrev = None
+        self.in_intermission = False
+        self.period = None
+        self.clock = None  # "MM:SS" left in the period, as of the last poll
+        self._skipping = False
+
+    def url(self):
+        return constants.PBP_URL_TEMPLATE.format(self.game_id)
+
+    def poll(self):
+        """
+        Fetch the play-by-play feed and return new goal events
+        Raises on network errors so the caller decides how to report them
+        """
+        import urequests
+
+        gc.collect()
+        response = urequests.get(self.url(), stream=True)
+        try:
+            return self.consume(response.raw.read)
+        finally:
+            response.close()
+
+    def consume(self, read):
+        """
+        Scan a play-by-play stream and return goal events newer than
+        the last processed event
+        read: callable taking a byte count and returning bytes (b"" at EOF)
+        """
+        goals = []
+        buf = b""
+        in_plays = False
+        self._skipping = False
+
+        while True:
+            chunk = read(constants.NETWORK_CHUNK_SIZE)
+            if not chunk:
+                break
+            buf += chunk
+
+            if not in_plays:
+                idx = buf.find(PLAYS_KEY)
+                if idx < 0:
+                    self._scan_header(buf)
+                    buf = buf[-HEADER_TAIL:]
+                    continue
+                # Plays carry their own period and clock keys; only the
+                # bytes before them belong to the header
+                self._scan_header(buf[:idx])
+                in_plays = True
+                buf = buf[idx + len(PLAYS_KEY) :]
+
+            buf = self._scan_plays(buf, goals)
+
+        # The last play has no following boundary, finish it at EOF
+        if in_plays and buf and not self._skipping:
+            self._finish_play(buf, goals)
+
+        self.primed = True
+        return goals
+
+    def _scan_header(self, buf):
+        """Pick up team IDs and game state from the document header"""
+        for key, is_home in TEAM_KEYS:
+            idx = buf.find(key)
+            if idx < 0:
+                continue
+            team_id = _find_int(buf, b'"id":', idx)
+            abbrev = _find_str(buf, b'"abbrev":', idx)
+            if team_id is None or abbrev is None:
+                continue
+            if is_home:
+                self.home_team_id = team_id
+                self.home_abbrev = abbrev
+            else:
+                self.away_team_id = team_id
+
+        state = _find_str(buf, GAME_STATE_KEY)
+        if state:
+            self.game_state = state
+
+        # From the period and clock objects, ahead of the plays
+        period = _find_int(buf, PERIOD_KEY)
+        if period:
+            self.period = period
+        clock = _find_str(buf, CLOCK_KEY)
+        if clock:
+            self.clock = clock
+        idx = buf.find(INTERMISSION_KEY)
+        if idx >= 0 and idx + len(INTERMISSION_KEY) + 5 <= len(buf):
+            value = idx + len(INTERMISSION_KEY)
+            self.in_intermission = buf[value : value + 4] == b"true"
+
+    def _scan_plays(self, buf, goals):
+        """
+        Split complete plays off the front of buf
+        Returns the unfinished remainder, never longer than PBP_MAX_PLAY_BYTES
+        """
+        while True:
+            # While skipping, buf is a tail that may begin with a boundary
+            nxt = buf.find(PLAY_START, 0 if self._skipping else 1)
+            if nxt < 0:
+                break
+            if self._skipping:
+                self._skipping = False
+            else:
+                self._finish_play(buf[:nxt], goals)
+            buf = buf[nxt:]
+
+        keep = len(PLAY_START) - 1
+        if self._skipping:
+            # Only hold on to enough bytes to spot a split boundary
+            return buf[-keep:]
+
+        # Already-seen plays are dropped as soon as their sortOrder is known
+        sort_order = _find_int(buf, SORT_KEY)
+        if sort_order is not None and sort_order <= self.last_sort_order:
+            self._skipping = True
+            return buf[-keep:]
+
+        if len(buf) > constants.PBP_MAX_PLAY_BYTES:
+            # Oversized play (or trailing roster data): judge it on what
+            # we have and skip the rest to keep memory bounded
+            self._finish_play(buf, goals)
+            self._skipping = True
+            return buf[-keep:]
+
+        return buf
+
+    def _finish_play(self, play, goals):
+        """Record a complete play, appending it to goals if it is a new goal"""
+        sort_order = _find_int(play, SORT_KEY)
+        if sort_order is None or sort_order <= self.last_sort_order:
+            return
+        self.last_sort_order = sort_order
+
+        if play.find(GOAL_TYPE) < 0:
+            return
+        goals.append(self._goal_event(play, sort_order))
+
+    def _goal_event(self, play, sort_order):
+        """Extract the interesting fields of a goal play"""
+        team_id = _find_int(play, b'"eventOwnerTeamId":')
+        away_score = _find_int(play, b'"awayScore":') or 0
+        home_score = _find_int(play, b'"homeScore":') or 0
+        scored_by_home = team_id is not None and team_id == self.home_team_id
+        we_are_home = self.home_abbrev == self.team_abbrev
+
+        return {
+            "sort_order": sort_order,
+            "team_id": team_id,
+            "ours": scored_by_home == we_are_home,
+            "scorer_id": _find_int(play, b'"scoringPlayerId":'),
+            "period": _find_int(play, b'"number":'),
+            "time": _find_str(play, b'"timeInPeriod":'),
+            "strength": goal_strength(
+                _find_str(play, b'"situationCode":'), scored_by_home
+            ),
+            "our_score": home_score if we_are_home else away_score,
+            "opp_score": away_score if we_are_home else home_score,
+        }
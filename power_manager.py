@@ -7,15 +7,27 @@ import machine
 import time
 import network
 import constants
+import log
+
+SLEEP_IDLE = "idle"  # stay awake with the CPU polling (no power saving)
+SLEEP_LIGHT = "light"  # ESP32 light sleep, RAM kept, wakes on the button
+SLEEP_DEEP = "deep"  # ESP32 deep sleep, state kept in RTC memory, reboots on wake
 
 
 class PowerManager:
-    def __init__(self, led_strip=None):
+    def __init__(self, led_strip=None, relay=None, sleep_mode=None, on_deep_sleep=None):
         """
         Initialize power manager
-        led_strip: NeoPixel object to control
+        led_strip: NeoPixel object to control, or the compositor's mask
+        layer, which blanks the strip over whatever the other layers show
+        relay: Pin switching the LED strip supply, turned off while asleep
+        sleep_mode: SLEEP_IDLE, SLEEP_LIGHT or SLEEP_DEEP
+        on_deep_sleep: called just before deep sleep to stash live state
         """
         self.led_strip = led_strip
+        self.relay = relay
+        self.sleep_mode = sleep_mode or constants.DEFAULT_SLEEP_MODE
+        self.on_deep_sleep = on_deep_sleep
         self.is_sleeping = False
         self.wlan_sta = network.WLAN(network.STA_IF)
         self.wlan_ap = network.WLAN(network.AP_IF)
@@ -28,26 +40,34 @@ class PowerManager:
 
         # Debounce tracking
         self.last_press_time = 0
-        self.debounce_sec = constants.DEBOUNCE_SEC
+        self.debounce_ms = int(constants.DEBOUNCE_SEC * 1000)
+        self.pressed = False
+
+        # Presses are caught by the IRQ even while the main loop is busy
+        # celebrating a goal; check_button just collects the flag
+        self.power_button.irq(trigger=machine.Pin.IRQ_FALLING, handler=self._on_press)
 
-        print(f"Power Manager initialized. Button on GPIO {constants.POWER_BUTTON_PIN}")
+        log.info(
+            "Power Manager initialized. Button on GPIO %s, %s sleep",
+            constants.POWER_BUTTON_PIN,
+            self.sleep_mode,
+        )
+
+    def _on_press(self, pin):
+        """Button IRQ handler: debounce only, no allocation"""
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.last_press_time) > self.debounce_ms:
+            self.last_press_time = now
+            self.pressed = True
 
     def check_button(self):
         """
         Check if power button was pressed
         Returns True if button was pressed (with debouncing)
         """
-        current_time = time.ticks_ms()
-
-        # Button is pressed when value is 0 (active LOW)
-        if self.power_button.value() == 0:
-            # Check debounce
-            if time.ticks_diff(current_time, self.last_press_time) > (
-                self.debounce_sec * 1000
-            ):
-                self.last_press_time = current_time
-                return True
-
+        if self.pressed:
+            self.pressed = False
+            return True
         return False
 
     def enter_sleep_mode(self):
@@ -55,47 +75,53 @@ class PowerManager:
         if self.is_sleeping:
             return
 
-        print("\n" + "=" * 50)
-        print("Entering Sleep Mode")
-        print("=" * 50)
+        log.info("Entering Sleep Mode")
 
         # Turn off LEDs
         if self.led_strip:
             self.led_strip.fill((0, 0, 0))
             self.led_strip.write()
-            print("LEDs turned off")
+            log.info("LEDs turned off")
+
+        # Cut the strip supply, WS2812s draw ~1mA each even when black
+        if self.relay:
+            self.relay.off()
 
         # Disconnect WiFi
         if self.wlan_sta.isconnected():
-            print("Disconnecting WiFi...")
+            log.info("Disconnecting WiFi...")
             self.wlan_sta.disconnect()
 
         # Deactivate WiFi radios to save power
         self.wlan_sta.active(False)
         self.wlan_ap.active(False)
-        print("WiFi deactivated")
+        log.info("WiFi deactivated")
 
         self.is_sleeping = True
-        print("Sleep mode active. Press power button to wake.")
-        print("=" * 50 + "\n")
+        log.info("Sleep mode active. Press power button to wake.")
 
     def exit_sleep_mode(self):
         """Exit sleep mode and restore normal operation"""
         if not self.is_sleeping:
             return
 
-        print("\n" + "=" * 50)
-        print("Waking from Sleep Mode")
-        print("=" * 50)
+        log.info("Waking from Sleep Mode")
 
         self.is_sleeping = False
 
+        # Lift the blackout; the caller redraws the display
+        if self.led_strip and hasattr(self.led_strip, "clear"):
+            self.led_strip.clear()
+
+        if self.relay:
+            self.relay.on()
+            time.sleep_ms(constants.RELAY_SETTLE_MS)
+
         # Reactivate WiFi
-        print("Reactivating WiFi...")
+        log.info("Reactivating WiFi...")
         self.wlan_sta.active(True)
 
-        print("Wake complete. Resuming normal operation.")
-        print("=" * 50 + "\n")
+        log.info("Wake complete. Resuming normal operation.")
 
         # Return True to signal that WiFi needs reconnection
         return True
@@ -108,19 +134,51 @@ class PowerManager:
             self.enter_sleep_mode()
             return False
 
+    def idle(self, max_ms=None):
+        """
+        Call from the main loop while sleeping
+        Light sleep returns after the button wakes the chip, or after
+        max_ms so the caller can feed the watchdog; deep sleep does not
+        return (the chip reboots on wake).
+        """
+        if self.sleep_mode == SLEEP_IDLE:
+            time.sleep(0.1)
+            return
+
+        import esp32
+
+        # Don't sleep while the button is still held, it would wake us at once
+        while self.power_button.value() == 0:
+            time.sleep_ms(10)
+
+        esp32.wake_on_ext0(pin=self.power_button, level=esp32.WAKEUP_ALL_LOW)
+
+        if self.sleep_mode == SLEEP_DEEP:
+            if self.on_deep_sleep:
+                self.on_deep_sleep()
+            machine.deepsleep()
+
+        if max_ms:
+            machine.lightsleep(max_ms)
+        else:
+            machine.lightsleep()
+        # Pin IRQs don't fire for the edge that woke us from light sleep
+        if machine.wake_reason() == machine.EXT0_WAKE:
+            self._on_press(self.power_button)
+
     def update(self):
         """
         Call this in your main loop to check for button presses
         Returns True if state changed and WiFi reconnection is needed
         """
         if self.check_button():
-            print("Power button pressed!")
+            log.info("Power button pressed!")
             return self.toggle_power()
         return False
 
 
-def create_power_manager(led_strip):
+def create_power_manager(led_strip, relay=None, sleep_mode=None, on_deep_sleep=None):
     """
     Convenience function to create a power manager
     """
-    return PowerManager(led_strip)
+    return PowerManager(led_strip, relay, sleep_mode, on_deep_sleep)
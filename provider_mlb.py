@@ -0,0 +1,60 @@
+"""
+MLB score provider: today's schedule from the Stats API
+The schedule's team objects carry IDs rather than abbreviations, so the
+configured abbreviations are mapped through TEAM_IDS.
+"""
+
+from score_feed import ScoreFeed
+from play_by_play import _find_int
+
+TEAM_IDS = {
+    "ATH": 133,
+    "ATL": 144,
+    "AZ": 109,
+    "BAL": 110,
+    "BOS": 111,
+    "CHC": 112,
+    "CIN": 113,
+    "CLE": 114,
+    "COL": 115,
+    "CWS": 145,
+    "DET": 116,
+    "HOU": 117,
+    "KC": 118,
+    "LAA": 108,
+    "LAD": 119,
+    "MIA": 146,
+    "MIL": 158,
+    "MIN": 142,
+    "NYM": 121,
+    "NYY": 147,
+    "PHI": 143,
+    "PIT": 134,
+    "SD": 135,
+    "SEA": 136,
+    "SF": 137,
+    "STL": 138,
+    "TB": 139,
+    "TEX": 140,
+    "TOR": 141,
+    "WSH": 120,
+}
+ABBREVS = {team_id: abbrev for abbrev, team_id in TEAM_IDS.items()}
+TEAM_ID_KEY = b'"team":{"id":'
+
+
+class Provider(ScoreFeed):
+    NAME = "MLB"
+    URL = "https://statsapi.mlb.com/api/v1/schedule?sportId=1"
+    HOST = "statsapi.mlb.com"
+    POLL_INTERVAL = 20  # runs come slower than goals, and the API is shared
+
+    GAME_START = b'{"gamePk":'
+    GAME_ID_DIGITS = 6
+    GAME_STATE_KEY = b'"abstractGameState":'  # "Preview", "Live", "Final"
+    AWAY_KEY = b'"away":'
+    HOME_KEY = b'"home":'
+
+    def team_fields(self, team):
+        abbrev = ABBREVS.get(_find_int(team, TEAM_ID_KEY))
+        return abbrev, _find_int(team, self.SCORE_KEY) or 0
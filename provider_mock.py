@@ -0,0 +1,32 @@
+"""
+Local mock score provider for testing without the network
+Reads an NHL score/now style document from flash on every poll; edit the
+file (e.g. with mpremote) to change scores and trigger celebrations.
+"""
+
+import constants
+import provider_nhl
+
+
+class FileResponse:
+    """Just enough of a urequests response for ScoreFeed.poll()"""
+
+    status_code = 200
+
+    def __init__(self, path):
+        self.raw = open(path, "rb")
+
+    def close(self):
+        self.raw.close()
+
+
+class Provider(provider_nhl.Provider):
+    NAME = "mock"
+    URL = constants.MOCK_SCORE_FILE
+    HOST = None  # nothing to probe
+    POLL_INTERVAL = 5
+    PLAY_BY_PLAY = False
+    SCHEDULE = False
+
+    def request(self):
+        return FileResponse(self.URL)
@@ -0,0 +1,20 @@
+"""
+NBA score provider: the CDN's today's scoreboard
+Game IDs are quoted ("0022400123") and read without their leading zeros.
+"""
+
+from score_feed import ScoreFeed
+
+
+class Provider(ScoreFeed):
+    NAME = "NBA"
+    URL = "https://cdn.nba.com/static/json/liveData/scoreboard/todaysScoreboard_00.json"
+    HOST = "cdn.nba.com"
+    POLL_INTERVAL = 15  # the CDN file is refreshed about this often
+
+    GAME_START = b'{"gameId":"'
+    GAME_ID_DIGITS = 10
+    GAME_STATE_KEY = b'"gameStatusText":'  # "Q3 5:12", "Final", ...
+    AWAY_KEY = b'"awayTeam":'
+    HOME_KEY = b'"homeTeam":'
+    ABBREV_KEY = b'"teamTricode":'
@@ -0,0 +1,22 @@
+"""
+NHL score provider: the score/now feed, with goals from the play-by-play
+"""
+
+import constants
+from score_feed import ScoreFeed
+
+
+class Provider(ScoreFeed):
+    NAME = "NHL"
+    URL = constants.SCORE_URL
+    HOST = constants.API_HOST
+    POLL_INTERVAL = 10
+    PLAY_BY_PLAY = True
+    SCHEDULE = True
+
+    GAME_START = b'{"id":'
+    GAME_ID_DIGITS = 10  # 2024020123; nested broadcast and team ids are shorter
+    GAME_STATE_KEY = b'"gameState":'
+    AWAY_KEY = b'"awayTeam":'
+    HOME_KEY = b'"homeTeam":'
+    ABBREV_KEY = b'"abbrev":'
@@ -0,0 +1,41 @@
+"""
+Device-side client for the host score relay (tools/score_relay.py)
+Reads one fixed-size record instead of streaming the NHL JSON feed
+"""
+
+import socket
+import constants
+from relay_record import RECORD_SIZE, unpack_record
+
+
+def parse_relay_address(address):
+    """Split "host:port" into (host, port), using the default relay port"""
+    if ":" in address:
+        host, port = address.rsplit(":", 1)
+        return host, int(port)
+    return address, constants.RELAY_PORT
+
+
+def fetch_relay_record(host, port, team_abbrev):
+    """
+    Ask the relay for our team's record
+    Returns the record dict, or None if the reply was not a valid record
+    Raises OSError on network failures
+    """
+    addr = socket.getaddrinfo(host, port)[0][-1]
+    s = socket.socket()
+    try:
+        s.settimeout(constants.RELAY_TIMEOUT_SEC)
+        s.connect(addr)
+        s.send(team_abbrev.encode() + b"\n")
+
+        data = b""
+        while len(data) < RECORD_SIZE:
+            chunk = s.recv(RECORD_SIZE - len(data))
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        s.close()
+
+    return unpack_record(data)
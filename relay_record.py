@@ -0,0 +1,61 @@
+"""
+Fixed-size binary score record served by the host-side relay
+Shared by the device client and tools/score_relay.py
+"""
+
+import struct
+
+# magic, version, game state, team, opponent, team score, opponent score,
+# period, clock seconds remaining, game ID, sequence number
+RECORD_FORMAT = ">2sBB3s3sBBBHII"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+RECORD_MAGIC = b"SR"
+RECORD_VERSION = 1
+
+# Game states
+STATE_NONE = 0  # team not playing today
+STATE_PRE = 1
+STATE_LIVE = 2
+STATE_INTERMISSION = 3
+STATE_FINAL = 4
+
+
+def pack_record(
+    team, opponent, team_score, opp_score, state, period, clock, game_id, sequence
+):
+    return struct.pack(
+        RECORD_FORMAT,
+        RECORD_MAGIC,
+        RECORD_VERSION,
+        state,
+        team.encode(),
+        opponent.encode(),
+        team_score,
+        opp_score,
+        period,
+        clock,
+        game_id,
+        sequence,
+    )
+
+
+def unpack_record(data):
+    """
+    Returns a dict of the record fields, or None if data is not a record
+    """
+    if len(data) != RECORD_SIZE:
+        return None
+    fields = struct.unpack(RECORD_FORMAT, data)
+    if fields[0] != RECORD_MAGIC or fields[1] != RECORD_VERSION:
+        return None
+    return {
+        "state": fields[2],
+        "team": fields[3].decode(),
+        "opponent": fields[4].decode(),
+        "team_score": fields[5],
+        "opp_score": fields[6],
+        "period": fields[7],
+        "clock": fields[8],
+        "game_id": fields[9],
+        "sequence": fields[10],
+    }
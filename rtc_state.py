@@ -0,0 +1,157 @@
+"""
+Live state kept in RTC memory, which survives deep sleep and soft resets
+Lets a wake, or a warm restart after a crash or watchdog reset, restore
+the scoreboard and rejoin Wi-Fi without re-reading flash
+"""
+
+import struct
+import time
+import machine
+import ubinascii
+import log
+
+# magic, version, flags, restarts, our score, opponent score, brightness,
+# Wi-Fi channel, game ID, last sign of life (wall clock ms), BSSID, IP,
+# netmask, gateway, DNS
+STATE_FORMAT = ">2sBBBBBBBII6s4s4s4s4s"
+STATE_SIZE = struct.calcsize(STATE_FORMAT)
+STATE_MAGIC = b"RS"
+STATE_VERSION = 2
+
+FLAG_WARM = 1  # next boot is a warm restart after a crash
+FLAG_TIME_SYNCED = 2  # the RTC clock was set by NTP and survives the reset
+
+NO_ADDRESS = bytes(4)
+
+_state = {
+    "flags": 0,
+    "restarts": 0,
+    "our_score": 0,
+    "opp_score": 0,
+    "brightness": 0,
+    "game_id": None,
+    "alive_ms": 0,
+    "link": None,
+}
+
+
+def wall_ms():
+    """Wall clock milliseconds, wrapped to 32 bits; runs across resets"""
+    return time.time_ns() // 1000000 & 0xFFFFFFFF
+
+
+def _ip(text):
+    return bytes(int(part) for part in text.split("."))
+
+
+def _ip_text(data):
+    return ".".join(str(b) for b in data)
+
+
+def _write():
+    s = _state
+    link = s["link"]
+    if link:
+        bssid = ubinascii.unhexlify(link["bssid"])
+        channel = link["channel"]
+        addresses = [_ip(a) for a in link["ifconfig"]]
+    else:
+        bssid = bytes(6)
+        channel = 0
+        addresses = [NO_ADDRESS] * 4
+    try:
+        machine.RTC().memory(
+            struct.pack(
+                STATE_FORMAT,
+                STATE_MAGIC,
+                STATE_VERSION,
+                s["flags"],
+                s["restarts"],
+                s["our_score"],
+                s["opp_score"],
+                s["brightness"],
+                channel,
+                s["game_id"] or 0,
+                s["alive_ms"],
+                bssid,
+                *addresses,
+            )
+        )
+    except Exception as e:
+        log.warning("Could not save RTC state: %s", e)
+
+
+def save_state(our_score, opp_score, game_id, **fields):
+    """
+    Store the live score; fields updates any other entry (flags, restarts,
+    brightness, alive_ms). Entries not given keep their last value.
+    """
+    _state["our_score"] = our_score
+    _state["opp_score"] = opp_score
+    _state["game_id"] = game_id
+    _state.update(fields)
+    _write()
+
+
+def save_link(link):
+    """Remember the Wi-Fi link (a wifi.json cache entry) for a warm restart"""
+    _state["link"] = link
+    _write()
+
+
+def set_flag(flag, on=True):
+    if on:
+        _state["flags"] |= flag
+    else:
+        _state["flags"] &= ~flag
+    _write()
+
+
+def stamp():
+    """Record a sign of life, for measuring recovery after a hang"""
+    _state["alive_ms"] = wall_ms()
+    _write()
+
+
+def load_state():
+    """
+    Returns a dict with flags, restarts, our_score, opp_score, brightness,
+    game_id, alive_ms and link (a Wi-Fi link cache entry, or None), or
+    None if RTC memory is empty (power-on) or holds something else
+    The link is marked warm: its IP lease was in use right before the
+    reset, so it can be reused without DHCP (main.py only hands it to
+    the Wi-Fi manager on a warm boot).
+    """
+    data = machine.RTC().memory()
+    if len(data) != STATE_SIZE:
+        return None
+    fields = struct.unpack(STATE_FORMAT, data)
+    magic, version, flags, restarts, our, opp, brightness, channel = fields[:8]
+    if magic != STATE_MAGIC or version != STATE_VERSION:
+        return None
+    game_id, alive_ms, bssid = fields[8:11]
+    addresses = fields[11:]
+
+    link = None
+    if channel and addresses[0] != NO_ADDRESS:
+        link = {
+            "bssid": ubinascii.hexlify(bssid).decode(),
+            "channel": channel,
+            "ifconfig": [_ip_text(a) for a in addresses],
+            "warm": True,
+        }
+    _state.update(
+        flags=flags,
+        restarts=restarts,
+        our_score=our,
+        opp_score=opp,
+        brightness=brightness,
+        game_id=game_id or None,
+        alive_ms=alive_ms,
+        link=link,
+    )
+    return dict(_state)
+
+
+def clear_state():
+    machine.RTC().memory(b"")
@@ -0,0 +1,236 @@
+"""
+Single-pass consumer for league scoreboard feeds, and the provider loader
+Pulls the state of every game involving any of a set of teams out of one
+streamed response, so tracking more teams costs no extra requests.
+
+Each league is a provider module (provider_nhl.py, provider_nba.py, ...)
+whose Provider class subclasses ScoreFeed and declares:
+    NAME, URL, HOST: league name, scoreboard endpoint, host to probe
+    POLL_INTERVAL: recommended seconds between polls
+    PLAY_BY_PLAY: goals come from the NHL play-by-play feed; otherwise
+                  they are detected from score changes
+    SCHEDULE: the NHL schedule can be used to sleep between games
+    the keys of its streaming extractor (GAMES_KEY, GAME_START, ...)
+Only the configured provider is imported, so unused parsers cost no heap.
+"""
+
+import gc
+import constants
+from play_by_play import _read_int, _find_int, _find_str
+
+
+def _object_end(buf, start):
+    """
+    Index just past the JSON object opening at buf[start], or -1 if it is
+    not complete yet. Braces inside strings are skipped.
+    """
+    depth = 0
+    in_string = False
+    i = start
+    n = len(buf)
+    while i < n:
+        c = buf[i]
+        if in_string:
+            if c == 92:  # backslash: skip the escaped byte
+                i += 1
+            elif c == 34:
+                in_string = False
+        elif c == 34:
+            in_string = True
+        elif c == 123:
+            depth += 1
+        elif c == 125:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return -1
+
+
+def team_scores(game, team_abbrev):
+    """(our score, opponent score, opponent abbrev) for one team in a game"""
+    if game["home"] == team_abbrev:
+        return game["home_score"], game["away_score"], game["away"]
+    return game["away_score"], game["home_score"], game["home"]
+
+
+def load_provider(name, teams):
+    """
+    Import the provider module for a league ("nhl", "nba", "mlb", "mock")
+    and return its feed; raises ImportError for an unknown league
+    """
+    module = __import__("provider_" + name)
+    return module.Provider(teams)
+
+
+class ScoreFeed:
+    NAME = None
+    URL = None
+    HOST = None
+    POLL_INTERVAL = constants.DEFAULT_POLL_INTERVAL
+    PLAY_BY_PLAY = False
+    SCHEDULE = False
+
+    # Streaming extractor
+    GAMES_KEY = b'"games":['
+    GAME_START = None  # opens each game object, followed by its numeric ID
+    GAME_ID_DIGITS = 1  # fewest digits in a game ID; shorter ones are nested
+    GAME_STATE_KEY = None
+    AWAY_KEY = None
+    HOME_KEY = None
+    ABBREV_KEY = None  # inside the team objects
+    SCORE_KEY = b'"score":'
+
+    def __init__(self, teams):
+        """
+        teams: team abbreviations to track, e.g. ("MIN", "WPG")
+        """
+        self.teams = tuple(dict.fromkeys(teams))  # unique, in order
+        self._skipping = False
+        # Bytes needed after a boundary to read the whole game ID
+        self.boundary_span = len(self.GAME_START) + self.GAME_ID_DIGITS + 1
+
+    def request(self):
+        """Open the scoreboard; returns a streaming urequests response"""
+        import urequests
+
+        return urequests.get(self.URL, stream=True)
+
+    def poll(self):
+        """
+        Fetch the scoreboard and return {team: game} for every tracked
+        team playing today; raises on network errors
+        """
+        gc.collect()
+        response = self.request()
+        try:
+            if response.status_code != 200:
+                raise OSError(f"HTTP {response.status_code}")
+            return self.consume(response.raw.read)
+        finally:
+            response.close()
+
+    def consume(self, read):
+        """
+        Scan a scoreboard stream for games involving the tracked teams
+        read: callable taking a byte count and returning bytes (b"" at EOF)
+        Returns {team: game} where game is a dict with game_id, state, away,
+        home, away_score and home_score. Stops reading once every tracked
+        team has been found.
+        """
+        found = {}
+        games_key = self.GAMES_KEY
+        buf = b""
+        in_games = False
+        self._skipping = False
+
+        while len(found) < len(self.teams):
+            chunk = read(constants.NETWORK_CHUNK_SIZE)
+            if not chunk:
+                break
+            buf += chunk
+
+            if not in_games:
+                idx = buf.find(games_key)
+                if idx < 0:
+                    buf = buf[-len(games_key) :]
+                    continue
+                in_games = True
+                buf = buf[idx + len(games_key) :]
+
+            buf = self._scan_games(buf, found)
+
+        if in_games and buf and not self._skipping:
+            self._finish_game(buf, found)
+        return found
+
+    def _next_boundary(self, buf, start):
+        """
+        Index of the next game object at or after start; -1 if none, or
+        -2 if a candidate is too close to the end of buf to tell
+        """
+        game_start = self.GAME_START
+        while True:
+            idx = buf.find(game_start, start)
+            if idx < 0:
+                return -1
+            if idx + self.boundary_span > len(buf):
+                return -2
+            # Count the digits (quoted IDs keep their leading zeros)
+            digits = idx + len(game_start)
+            end = digits
+            while end < len(buf) and 48 <= buf[end] <= 57:
+                end += 1
+            if end == len(buf):
+                return -2
+            if end - digits >= self.GAME_ID_DIGITS:
+                return idx
+            start = digits
+
+    def _scan_games(self, buf, found):
+        """
+        Split complete games off the front of buf
+        Returns the unfinished remainder, never much longer than
+        SCORE_MAX_GAME_BYTES
+        """
+        while True:
+            nxt = self._next_boundary(buf, 0 if self._skipping else 1)
+            if nxt < 0:
+                break
+            if self._skipping:
+                self._skipping = False
+            else:
+                self._finish_game(buf[:nxt], found)
+            buf = buf[nxt:]
+
+        keep = self.boundary_span
+        if self._skipping:
+            return buf[-keep:]
+
+        # Everything we need sits before the per-game goal and broadcast
+        # lists, so stop holding the game once both teams are complete
+        done = self._finish_game(buf, found)
+        if done or len(buf) > constants.SCORE_MAX_GAME_BYTES:
+            self._skipping = True
+            return buf[-keep:]
+        return buf
+
+    def _finish_game(self, buf, found):
+        """
+        Record the game at the start of buf if both team objects are
+        complete; returns True once the game has been dealt with
+        """
+        away = self._team(buf, self.AWAY_KEY)
+        home = self._team(buf, self.HOME_KEY)
+        if away is None or home is None:
+            return False
+
+        tracked = [t for t in (away[0], home[0]) if t in self.teams]
+        if tracked:
+            game = {
+                "game_id": _read_int(buf, len(self.GAME_START)),
+                "state": _find_str(buf, self.GAME_STATE_KEY),
+                "away": away[0],
+                "home": home[0],
+                "away_score": away[1],
+                "home_score": home[1],
+            }
+            for team in tracked:
+                found[team] = game
+        return True
+
+    def _team(self, buf, key):
+        """(abbrev, score) for the team object after key, None if incomplete"""
+        idx = buf.find(key)
+        if idx < 0:
+            return None
+        start = idx + len(key)
+        end = _object_end(buf, start)
+        if end < 0:
+            return None
+        return self.team_fields(buf[start:end])
+
+    def team_fields(self, team):
+        """(abbrev, score) from one complete team object"""
+        # Future games have no score yet
+        return _find_str(team, self.ABBREV_KEY), _find_int(team, self.SCORE_KEY) or 0
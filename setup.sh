@@ -1,3 +1,4 @@
 rm -rf venv
 python3 -m venv venv
 pip install thonny
+pip install "mpy-cross==1.27.*" mpremote  # tools/build_mpy.py
@@ -1,6 +1,7 @@
 """HTML Template Loader for MicroPython"""
 
 import constants
+import log
 
 
 def load_template(filename):
@@ -9,7 +10,7 @@ def load_template(filename):
         with open(f"{constants.TEMPLATE_DIR}{filename}", "r") as f:
             return f.read()
     except Exception as e:
-        print(f"Error loading template {filename}: {e}")
+        log.error("Error loading template %s: %s", filename, e)
         return None
 
 
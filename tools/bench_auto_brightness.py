@@ -0,0 +1,158 @@
+"""
+Simulate auto-brightness through a sunset and measure its overhead
+Runs on the host with CPython. Feeds auto_brightness.py a light trace
+(daylight falling to a lamp-lit room, with sensor noise and lamp flicker)
+at the timer's sample rate. It counts level switches against following
+the raw reading without the average and hysteresis, and times sample(),
+update() and a color table switch against the main loop's 100 ms pass.
+Finally a level set by hand (console b 80) is checked to hold in steady
+light, to give way when the room light changes and to time out.
+
+    python tools/bench_auto_brightness.py [--minutes 60] [--noise 0.08]
+
+Host times are far below the ESP32's (roughly 50-100x); the fraction of
+the loop is what to compare with the device's stats().
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import constants  # noqa: E402
+import color_tables  # noqa: E402
+from auto_brightness import AutoBrightness, curve_level  # noqa: E402
+
+LOOP_MS = 100  # main loop pass, the time.sleep(0.1) at its end
+DAYLIGHT = 45000  # read_u16 readings
+LAMP = 3000
+
+
+def light_trace(minutes, noise, rng):
+    """One reading per sample period: a sunset over the first two thirds"""
+    samples = minutes * 60 * 1000 // constants.LIGHT_SAMPLE_MS
+    for i in range(samples):
+        t = min(1.0, i / (samples * 2 / 3))
+        light = LAMP + (DAYLIGHT - LAMP) * (1 + math.cos(math.pi * t)) / 2
+        flicker = 1 + noise * rng.uniform(-1, 1)  # sensor noise and lamp flicker
+        yield max(0, min(65535, int(light * flicker)))
+
+
+def timed(fn, repeats=10000):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1e6 / repeats
+
+
+def naive_level(reading):
+    step = constants.BRIGHTNESS_STEP
+    return (curve_level(constants.LIGHT_CURVE, reading) + step // 2) // step * step
+
+
+def passes_held(auto, reading, clock, passes):
+    """Loop passes (on the fake clock) until update() overrides the hold"""
+    samples_per_loop = max(1, LOOP_MS // constants.LIGHT_SAMPLE_MS)
+    for n in range(passes):
+        for _ in range(samples_per_loop):
+            auto.sample()
+        clock[0] += LOOP_MS
+        if auto.update() is not None:
+            return n + 1
+    return None
+
+
+def check_hold():
+    """A level set by hand against steady, changing and long-steady light"""
+    reading = [LAMP]
+    clock = [0]
+    auto = AutoBrightness(
+        None, naive_level(LAMP), read=lambda: reading[0], clock=lambda: clock[0]
+    )
+    for _ in range(100):
+        auto.sample()
+    auto.update()
+    problems = []
+    minute = 60 * 1000 // LOOP_MS
+
+    auto.hold(80)
+    if passes_held(auto, reading, clock, 10 * minute) is not None:
+        problems.append("b 80 was undone in steady light")
+    reading[0] = DAYLIGHT  # The curtains open
+    if passes_held(auto, reading, clock, minute) is None:
+        problems.append("the hold outlasted a change in the room light")
+    while passes_held(auto, reading, clock, minute) is not None:
+        pass  # Until the average has settled on daylight
+    auto.hold(30)
+    hold_passes = constants.LIGHT_HOLD_SEC * 1000 // LOOP_MS
+    undone = passes_held(auto, reading, clock, hold_passes + minute)
+    if undone is None or undone < hold_passes:
+        problems.append(f"the hold ran out after {undone} passes, not {hold_passes}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--noise", type=float, default=0.08)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    trace = list(light_trace(args.minutes, args.noise, rng))
+    reading = [0]
+    auto = AutoBrightness(None, naive_level(trace[0]), read=lambda: reading[0])
+    samples_per_loop = max(1, LOOP_MS // constants.LIGHT_SAMPLE_MS)
+
+    switches = []
+    naive_switches = 0
+    naive = auto.level
+    for i, value in enumerate(trace):
+        reading[0] = value
+        auto.sample()
+        if (i + 1) % samples_per_loop == 0:
+            level = auto.update()
+            if level is not None:
+                switches.append(level)
+        raw = naive_level(value)
+        if raw != naive:
+            naive = raw
+            naive_switches += 1
+
+    print(
+        f"{args.minutes} min sunset, {len(trace)} samples, noise +/-{args.noise:.0%}"
+    )
+    print(f"Level switches: {len(switches)} (raw reading: {naive_switches})")
+    print(f"Levels: {' '.join(str(level) for level in switches)}")
+
+    # The device's stats() counts whole microseconds, too coarse here
+    sample_us = timed(auto.sample)
+    update_us = timed(auto.update)
+    # A switch is a table lookup (built once per level) instead of scaling
+    # every base color at each draw
+    lookup_us = timed(lambda: color_tables.table(35))
+    build_us = timed(lambda: color_tables.ColorTable(35))
+
+    per_loop = sample_us * samples_per_loop + update_us
+    print()
+    print(f"sample(): {sample_us:.2f} us, on the timer")
+    print(f"update(): {update_us:.2f} us, every loop pass")
+    print(
+        f"Per {LOOP_MS} ms loop pass: {per_loop:.2f} us, "
+        f"{per_loop / (LOOP_MS * 1000):.4%} of the loop"
+    )
+    print(f"Color table switch: {lookup_us:.2f} us, building a table {build_us:.1f} us")
+
+    problems = check_hold()
+    print()
+    print("Manual level hold: " + ("ok" if not problems else "FAILED"))
+    for problem in problems:
+        print(f"    {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark the display compositor
+Runs on the host with CPython: builds the layer mixes the device uses and
+reports compositing time per frame (the strip write excluded), plus the
+cost of a render() call when nothing has changed.
+
+    python tools/bench_compositor.py [LEDS]
+
+Host times are far below the ESP32's; compare the rows with each other.
+On the device compositor.stats() has the same figures, and debug logging
+prints them per frame.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from compositor import Compositor  # noqa: E402
+
+REPEATS = 2000
+
+
+class FrameSink:
+    """Stands in for the NeoPixel: a buffer and a write() that does nothing"""
+
+    def __init__(self, n):
+        self.n = n
+        self.buf = bytearray(n * 3)
+
+    def write(self):
+        pass
+
+
+def score_only(c):
+    for p in range(40):
+        c.score[p] = (0, 25, 0)
+
+
+def with_status(c):
+    score_only(c)
+    c.status[c.n - 1] = (13, 6, 0)
+    c.status[c.n - 2] = (0, 0, 13)
+
+
+def celebration(c):
+    with_status(c)
+    c.animation.fill((0, 128, 0))
+
+
+def dimmed(c):
+    with_status(c)
+    for p in range(0, c.n, 2):
+        c.mask[p] = (128, 128, 128)
+
+
+def asleep(c):
+    with_status(c)
+    c.mask.fill((0, 0, 0))
+
+
+SCENES = (
+    ("score", score_only),
+    ("score + status", with_status),
+    ("celebration", celebration),
+    ("sparse mask", dimmed),
+    ("sleep mask", asleep),
+)
+
+
+def main():
+    leds = int(sys.argv[1]) if len(sys.argv) > 1 else 96
+    print(f"{leds} LEDs, {REPEATS} frames per scene")
+    print(f"{'scene':<16} {'avg us':>8} {'peak us':>8} {'idle us':>8}")
+
+    for name, draw in SCENES:
+        c = Compositor(FrameSink(leds))
+        draw(c)
+        for _ in range(REPEATS):
+            c.render(force=True)
+        stats = c.stats()
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            c.render()
+        idle = (time.perf_counter() - start) * 1e6 / REPEATS
+
+        print(
+            f"{name:<16} {stats['avg_us']:>8} {stats['peak_us']:>8} {idle:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
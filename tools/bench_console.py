@@ -0,0 +1,133 @@
+"""
+Measure the serial console's cost per main loop pass
+Runs on the host with CPython. A pipe stands in for the serial port.
+Times an idle poll() (what every loop pass pays), a pass that takes a
+command, and parsing alone, then writes a burst of scripted commands and
+counts the passes taken to drain it. Finally a replay file with waits is
+stepped through at the loop's 100 ms pass.
+
+    python tools/bench_console.py [--burst 200]
+
+Host times are far below the ESP32's (roughly 50-100x); compare them with
+the 100 ms loop pass rather than in absolute terms.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import constants  # noqa: E402
+from console import Console, parse  # noqa: E402
+
+LOOP_MS = 100  # main loop pass, the time.sleep(0.1) at its end
+REPEATS = 20000
+SCRIPT = ("s 1 0", "g them", "b 40", "s 2 1 3", "g", "m")
+REPLAY = """# Scripted period
+s 0 0 1
+w 300
+g
+w 500
+g them
+b 25
+w 200
+s 3 1 2
+"""
+
+
+def timed(fn, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1e6 / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=200)
+    args = parser.parse_args()
+
+    read_fd, write_fd = os.pipe()
+    stream = open(read_fd, "rb", buffering=0)
+    replies = []
+    console = Console(stream, out=replies.append)
+    problems = []
+
+    idle_us = timed(console.poll)
+    line = b"s 2 1 3\n"
+
+    def one_command():
+        os.write(write_fd, line)
+        return console.poll()
+
+    command_us = timed(one_command)
+    # The pipe write itself is the host's cost, not the console's
+    write_us = timed(lambda: os.write(write_fd, line) and os.read(read_fd, 8))
+    parse_us = timed(lambda: parse("s 2 1 3"))
+    if one_command() != (("score", (2, 1, 3)),):
+        problems.append("s 2 1 3 didn't parse to a score command")
+
+    loop_share = idle_us / (LOOP_MS * 1000)
+    print(f"idle poll(): {idle_us:.2f} us, {loop_share:.4%} of the loop")
+    print(
+        f"poll() taking a command: {command_us - write_us:.2f} us "
+        f"(parse {parse_us:.2f} us)"
+    )
+
+    # A burst written at once is drained a few commands per pass
+    script = "\n".join(SCRIPT[i % len(SCRIPT)] for i in range(args.burst)) + "\n"
+    taken = []
+    passes = 0
+    os.write(write_fd, script.encode())
+    while len(taken) < args.burst and passes < args.burst:
+        taken += console.poll()
+        passes += 1
+    print(
+        f"Burst of {args.burst} commands: {len(taken)} taken in {passes} passes, "
+        f"{constants.CONSOLE_LINES_PER_LOOP} per pass"
+    )
+    if len(taken) != args.burst:
+        problems.append(f"burst: {len(taken)} commands taken of {args.burst}")
+
+    # Bad input is answered, not raised into the loop
+    replies.clear()
+    os.write(write_fd, b"x 1\ns 1\nb 150\n")
+    if console.poll() or len(replies) != 3:
+        problems.append("bad commands weren't all refused")
+
+    work = tempfile.mkdtemp(prefix="console-")
+    try:
+        path = os.path.join(work, "period.txt")
+        with open(path, "w") as f:
+            f.write(REPLAY)
+        os.write(write_fd, f"r {path}\n".encode())
+        start = time.perf_counter()
+        replayed = []
+        while time.perf_counter() - start < 3:
+            for command in console.poll():
+                replayed.append((round(time.perf_counter() - start, 1), command))
+            if not console.replay_file and replayed:
+                break
+            time.sleep(LOOP_MS / 1000)
+    finally:
+        shutil.rmtree(work)
+    print(f"Replay of {os.path.basename(path)}:")
+    for at, command in replayed:
+        print(f"    {at:>4.1f}s {command}")
+    expected = [parse(line) for line in REPLAY.splitlines()]
+    expected = [c for c in expected if c and c[0] != "wait"]
+    if [command for _, command in replayed] != expected:
+        problems.append("replay ran other commands")
+
+    stream.close()
+    os.close(write_fd)
+    print("All checks passed" if not problems else f"FAILED: {problems}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
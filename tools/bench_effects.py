@@ -0,0 +1,103 @@
+"""
+Benchmark effect playback for several strip lengths
+Runs on the host with CPython: renders a chase effect per strip length,
+plays it flat out to measure read throughput and then at its frame rate
+to check it is sustained. The strip is a plain bytearray sink, so the
+numbers cover the file reads and the player loop, not the WS2812 write
+(about 30 us per LED on the device, i.e. ~3 ms for 96 LEDs).
+Each effect is also played into the compositor's animation layer, as on
+the device, checking that every distinct frame reaches the strip.
+
+    python tools/bench_effects.py [FPS]
+
+On the device the player logs the same figures after every effect.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from compositor import Compositor  # noqa: E402
+from effect_player import EffectPlayer  # noqa: E402
+from render_effect import chase, encode, write_effect  # noqa: E402
+
+STRIP_LENGTHS = (48, 96, 144, 300)
+FRAMES = 90
+
+
+class FrameSink:
+    """Stands in for the NeoPixel: a buffer and a write() that does nothing"""
+
+    def __init__(self, n):
+        self.n = n
+        self.buf = bytearray(n * 3)
+        self.writes = 0
+
+    def write(self):
+        self.writes += 1
+
+
+class RecordingSink(FrameSink):
+    """Keeps every frame written, to count the distinct ones"""
+
+    def __init__(self, n):
+        super().__init__(n)
+        self.frames = set()
+
+    def write(self):
+        super().write()
+        self.frames.add(bytes(self.buf))
+
+
+def frames_through_layer(path, leds):
+    """(strip writes, distinct frames) playing path into the animation layer"""
+    sink = RecordingSink(leds)
+    compositor = Compositor(sink)
+    compositor.animation.fill((0, 0, 0))  # As trigger_goal() does
+    EffectPlayer(compositor.animation).play(path, fps=0)
+    return sink.writes, len(sink.frames)
+
+
+def main():
+    fps = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    problems = []
+    print(
+        f"{'LEDs':>5} {'bytes':>8} {'max fps':>8} {'read KB/s':>10} "
+        f"{'at ' + str(fps) + ' fps':>10} {'late':>5}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for leds in STRIP_LENGTHS:
+            path = os.path.join(tmp, f"chase{leds}.fx")
+            frames = list(chase(leds, FRAMES, [(0, 255, 0)]))
+            records = write_effect(path, leds, fps, frames)
+            player = EffectPlayer(FrameSink(leds))
+
+            player.play(path, duration_ms=1000, fps=0)
+            flat_out = player.stats
+            player.play(path, duration_ms=1000)
+            paced = player.stats
+            print(
+                f"{leds:>5} {os.path.getsize(path):>8} {flat_out['fps']:>8} "
+                f"{flat_out['read_kbps']:>10} {paced['fps']:>10} {paced['late']:>5}"
+            )
+
+            # One strip write per record, and every frame shows up
+            writes, distinct = frames_through_layer(path, leds)
+            expected = len({encode(frame, 100) for frame in frames})
+            if writes != records or distinct != expected:
+                problems.append(
+                    f"{leds} LEDs through the animation layer: {writes} writes "
+                    f"of {records}, {distinct} distinct frames of {expected}"
+                )
+    for problem in problems:
+        print(f"FAILED: {problem}")
+    if not problems:
+        print("Animation layer: every effect frame reached the strip")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
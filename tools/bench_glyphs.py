@@ -0,0 +1,146 @@
+"""
+Benchmark panel text drawn from the precompiled glyph cache
+Runs on the host with CPython. Compiles the font for the given panel into
+a temporary glyphs.py, draws a few score lines with panel_text.py and,
+for comparison, with per-pixel coordinate math from the same font. The
+two must produce identical buffers.
+
+    python tools/bench_glyphs.py [--width 32] [--height 8] [--layout rows]
+
+Host times are far below the ESP32's; the ratio between the two columns
+is what carries over.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from build_glyphs import FONT, FONT_HEIGHT, SPACING, render_module  # noqa: E402
+
+SCORES = (
+    (3, 2, None, None),
+    (7, 4, 2, "12:34"),
+    (10, 7, 3, "0:42"),
+    (2, 2, 4, "4:59"),
+)
+REPEATS = 2000
+
+
+class FrameSink:
+    """Stands in for a compositor layer: a buffer and fill()"""
+
+    def __init__(self, n):
+        self.n = n
+        self.buf = bytearray(3 * n)
+
+    def fill(self, color):
+        self.buf[:] = bytes(3 * self.n)
+
+
+def pixel_index(x, y, width, height, layout, serpentine):
+    if layout == "columns":
+        return x * height + (height - 1 - y if serpentine and x & 1 else y)
+    return y * width + (width - 1 - x if serpentine and y & 1 else x)
+
+
+def naive_draw(buf, text, x, color, panel):
+    """Reference: look up each font pixel and map it to an LED index"""
+    width, height, layout, serpentine = panel
+    top = (height - FONT_HEIGHT) // 2
+    r, g, b = color
+    for char in text:
+        rows = FONT.get(char)
+        if rows is None:
+            continue
+        glyph_width = len(rows[0])
+        if x + glyph_width > width:
+            break
+        for dy, row in enumerate(rows):
+            for dx, bit in enumerate(row):
+                if bit == "#":
+                    i = 3 * pixel_index(x + dx, top + dy, *panel)
+                    buf[i] = g
+                    buf[i + 1] = r
+                    buf[i + 2] = b
+        x += glyph_width + SPACING
+    return x
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) * 1e6 / REPEATS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=32)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--layout", choices=("columns", "rows"), default="columns")
+    args = parser.parse_args()
+    panel = (args.width, args.height, args.layout, True)
+
+    build = tempfile.mkdtemp(prefix="glyphs-")
+    with open(os.path.join(build, "glyphs.py"), "w") as f:
+        f.write(render_module(*panel))
+    sys.path.insert(0, build)
+    sys.path.insert(1, ROOT)
+    panel_text = importlib.import_module("panel_text")
+
+    sink = FrameSink(args.width * args.height)
+    text = panel_text.PanelText(sink)
+    reference = bytearray(len(sink.buf))
+    colors = ((0, 50, 0), (50, 0, 0), (30, 30, 30))
+
+    print(f"{args.width}x{args.height} {args.layout} panel, {REPEATS} draws each")
+    print(
+        f"{'text':<16} {'glyphs':>6} {'cache us':>9} {'per-pixel us':>13} "
+        f"{'same':>5}"
+    )
+    for our, opp, period, clock in SCORES:
+        label = f"{our}-{opp} " + panel_text.period_label(period)
+        if clock:
+            label += f" {clock}"
+        # Keep the cached draw's frame to compare with the reference
+        text.draw_score(our, opp, *colors, period, clock)
+        drawn = bytes(sink.buf)
+
+        def cached():
+            text.draw_score(our, opp, *colors, period, clock)
+
+        def per_pixel():
+            reference[:] = bytes(len(reference))
+            x = naive_draw(reference, str(our), 0, colors[0], panel)
+            if text.width(f"{our}-{opp}") <= args.width:
+                x = naive_draw(reference, "-", x, colors[2], panel)
+            naive_draw(reference, str(opp), x, colors[1], panel)
+            extra = panel_text.period_label(period)
+            room = args.width - text.width(label.split()[0]) - 2 * SPACING
+            if clock and text.width(f"{extra} {clock}") <= room:
+                extra = f"{extra} {clock}"
+            if extra and text.width(extra) <= room:
+                naive_draw(
+                    reference, extra, args.width - text.width(extra), colors[2], panel
+                )
+
+        cache_us = timed(cached)
+        pixel_us = timed(per_pixel)
+        glyph_count = sum(1 for c in label if c in FONT and c != " ")
+        same = drawn == bytes(reference)
+        print(
+            f"{label:<16} {glyph_count:>6} {cache_us:>9.1f} {pixel_us:>13.1f} "
+            f"{'yes' if same else 'NO':>5}"
+        )
+    print(f"Colored lines cached: {len(text.lines)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Benchmark the flash game history with a full season of records
+Runs on the host with CPython. Appends a season of score events (regular
+season and a full playoff run) to a temporary history.bin one at a time,
+as the box does, then times page and time-range queries against loading
+and filtering the whole file. The same season is also written to a
+history smaller than the season, to check queries across the wrap, and
+with some games recorded before the clock was set, as after a power cut
+with no NTP yet.
+
+    python tools/bench_history.py [--games 110] [--events 7]
+
+Host file writes go to the page cache rather than flash, so append times
+on the device are dominated by the flash write; the query columns show
+how much less each query reads.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import constants  # noqa: E402
+from history import (  # noqa: E402
+    History,
+    HEADER_SIZE,
+    RECORD_FORMAT,
+    RECORD_SIZE,
+    EVENT_GOAL_FOR,
+    EVENT_GOAL_AGAINST,
+    EVENT_CATCH_UP,
+)
+from game_schedule import EPOCH_OFFSET  # noqa: E402
+
+SEASON_START = 1728590400 - EPOCH_OFFSET  # 2024-10-10 20:00 UTC
+GAME_SPACING_SEC = 2 * 86400
+UNSYNCED_EVERY = 9  # games started after a power cut, before NTP
+UNSYNCED_EVENTS = 3  # events of such a game before the clock was set
+REPEATS = 200
+
+
+def season(games, events):
+    """(time, game ID, event, our, opp, period, latency) for a season"""
+    rng = random.Random(1)
+    records = []
+    for game in range(games):
+        game_id = 2024020001 + game
+        when = SEASON_START + game * GAME_SPACING_SEC
+        our = opp = 0
+        records.append((when, game_id, EVENT_CATCH_UP, 0, 0, 1, 0))
+        for _ in range(events - 1):
+            when += rng.randrange(120, 900)
+            if rng.random() < 0.5:
+                our += 1
+                event = EVENT_GOAL_FOR
+            else:
+                opp += 1
+                event = EVENT_GOAL_AGAINST
+            period = min(4, 1 + (when - SEASON_START) % 3)
+            latency = rng.randrange(2000, 15000)
+            records.append((when, game_id, event, our, opp, period, latency))
+    return records
+
+
+def write(path, records, capacity):
+    clock = [0]
+    history = History(path, capacity, clock=lambda: clock[0])
+    times = []
+    for when, game_id, event, our, opp, period, latency in records:
+        clock[0] = when
+        start = time.perf_counter()
+        history.append(game_id, event, our, opp, period, latency)
+        times.append((time.perf_counter() - start) * 1e6)
+    return history, times
+
+
+def naive_since(path, timestamp, limit):
+    """Reference: load the whole file, unpack every record, then filter"""
+    with open(path, "rb") as f:
+        data = f.read()
+    total = struct.unpack_from(">I", data, 8)[0]
+    capacity = (len(data) - HEADER_SIZE) // RECORD_SIZE
+    oldest = max(0, total - capacity)
+    records = []
+    for seq in range(oldest, total):
+        offset = HEADER_SIZE + seq % capacity * RECORD_SIZE
+        records.append((seq,) + struct.unpack_from(RECORD_FORMAT, data, offset))
+    return [r for r in records if r[1] >= timestamp][:limit]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = fn()
+    elapsed = (time.perf_counter() - start) * 1e6 / REPEATS
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def check_wrap(path, records, capacity):
+    """Pages and time ranges over a wrapped file match the kept records"""
+    history, _ = write(path, records, capacity)
+    kept = [(seq,) + r for seq, r in enumerate(records)][-capacity:]
+    problems = []
+    for start in (0, history.oldest, history.oldest + 1, len(records) - 7):
+        got = history.read(start, 50)
+        first = max(start, history.oldest)
+        want = [r for r in kept if first <= r[0] < first + 50]
+        if got != want:
+            problems.append(f"read({start}, 50) differs")
+    for _, when, *_ in kept[::97]:
+        want = [r for r in kept if r[1] >= when][0][0]
+        if history.find(when) != want:
+            problems.append(f"find({when}) differs")
+    return problems
+
+
+def check_unsynced(path, records):
+    """
+    Records written before the clock was set have no time, and find()
+    still lands on the first record at or after each timestamp
+    """
+    boot = []
+    for i, (when, *fields) in enumerate(records):
+        game = fields[0] - 2024020001
+        first = i == 0 or records[i - 1][1] != fields[0]
+        index = 0 if first else index + 1
+        unsynced = game % UNSYNCED_EVERY == 0 and index < UNSYNCED_EVENTS
+        # The RTC counts from its 2000 epoch after the power cut
+        boot.append((index * 60 - EPOCH_OFFSET if unsynced else when, *fields))
+    history, _ = write(path, boot, len(boot))
+    problems = []
+    got = history.read(0, len(boot))
+    if [r[1] for r in got] != [0 if w < SEASON_START else w for w, *_ in boot]:
+        problems.append("records before the clock was set kept a time")
+    if history.page(start=0, limit=1)["records"][0]["time"] is not None:
+        problems.append("page() gave a time for a record without one")
+    # A record without a time counts as at the next record's time
+    times = [r[1] for r in got]
+    for seq in range(len(times) - 2, -1, -1):
+        times[seq] = times[seq] or times[seq + 1]
+    for when in sorted(set(times))[::7] + [SEASON_START - 1, times[-1] + 1]:
+        want = next((seq for seq, t in enumerate(times) if t >= when), len(times))
+        if history.find(when) != want:
+            problems.append(f"find({when}) gave {history.find(when)}, not {want}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=82 + 28)
+    parser.add_argument("--events", type=int, default=7)
+    args = parser.parse_args()
+    records = season(args.games, args.events)
+    capacity = constants.HISTORY_CAPACITY
+
+    work = tempfile.mkdtemp(prefix="history-")
+    try:
+        path = os.path.join(work, constants.HISTORY_FILE)
+        history, times = write(path, records, capacity)
+        times.sort()
+        size = os.path.getsize(path)
+        full = HEADER_SIZE + capacity * RECORD_SIZE
+        print(
+            f"{len(records)} records ({args.games} games), "
+            f"file {size / 1024:.1f} KB of {full / 1024:.1f} KB"
+        )
+        print(
+            f"append: median {times[len(times) // 2]:.1f} us, "
+            f"p99 {times[len(times) * 99 // 100]:.1f} us, max {times[-1]:.1f} us"
+        )
+
+        mid_season = records[len(records) // 2][0]
+        limit = constants.HISTORY_PAGE_SIZE
+        queries = (
+            ("newest page", lambda: history.page()["records"]),
+            ("oldest page", lambda: history.page(start=0)["records"]),
+            ("since mid-season", lambda: history.read(history.find(mid_season), limit)),
+        )
+        reference = naive_since(path, mid_season, limit)
+
+        print()
+        print(f"{'query':<18} {'records':>7} {'us':>8} {'peak KB':>8}")
+        for label, query in queries:
+            result, us, peak = timed(query)
+            print(f"{label:<18} {len(result):>7} {us:>8.1f} {peak / 1024:>8.1f}")
+        result, us, peak = timed(lambda: naive_since(path, mid_season, limit))
+        label = "since, whole file"
+        print(f"{label:<18} {len(result):>7} {us:>8.1f} {peak / 1024:>8.1f}")
+        same = history.read(history.find(mid_season), limit) == reference
+        print(f"Range query matches the whole-file scan: {'yes' if same else 'NO'}")
+
+        wrap_capacity = len(records) * 2 // 3
+        problems = check_wrap(os.path.join(work, "wrap.bin"), records, wrap_capacity)
+        status = "ok" if not problems else f"{len(problems)} FAILED"
+        print(f"Wrapped history ({wrap_capacity} records kept): {status}")
+        for problem in problems:
+            print(f"    {problem}")
+
+        unsynced = check_unsynced(os.path.join(work, "unsynced.bin"), records)
+        status = "ok" if not unsynced else f"{len(unsynced)} FAILED"
+        print(f"Records from before NTP: {status}")
+        for problem in unsynced:
+            print(f"    {problem}")
+        problems += unsynced
+    finally:
+        shutil.rmtree(work)
+    return 1 if problems or not same else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""
+Benchmark the play-by-play tracker against a full-game feed
+Runs on the host with CPython:
+
+    python tools/bench_play_by_play.py [--seed 1] [--polls 60]
+    curl -o pbp.json https://api-web.nhle.com/v1/gamecenter/2024020123/play-by-play
+    python tools/bench_play_by_play.py --feed pbp.json --team MIN
+
+Without --feed, a game is generated with the gamecenter feed's field
+order: a header with the live period and clock ahead of the plays (each
+with its own period and clock), then the roster and summary behind them.
+
+The game is replayed as it would be seen live: each simulated poll
+serves the feed truncated to a growing number of plays, with the header
+brought up to the last of them. Every poll is checked: the goals found
+are the new goals in the feed, and the period and clock are the
+header's. Times and peak allocation are compared with json.loads of the
+whole feed, which the box can't afford.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from play_by_play import PlayByPlayTracker, goal_strength  # noqa: E402
+
+HOME = (30, "MIN", "Wild", "Minnesota")
+AWAY = (16, "CHI", "Blackhawks", "Chicago")
+PERIOD_SEC = 20 * 60
+PLAY_GAP_SEC = (3, 25)  # game time between plays
+PENALTY_SEC = 120
+# Play types by weight, as (typeCode, typeDescKey)
+PLAY_TYPES = (
+    ((502, "faceoff"), 10),
+    ((503, "hit"), 8),
+    ((506, "shot-on-goal"), 9),
+    ((507, "missed-shot"), 5),
+    ((508, "blocked-shot"), 5),
+    ((504, "giveaway"), 3),
+    ((525, "takeaway"), 2),
+    ((516, "stoppage"), 6),
+    ((509, "penalty"), 1),
+)
+GOAL_CHANCE = 0.09  # of a shot on goal
+SHOT_TYPES = ("wrist", "snap", "slap", "backhand", "tip-in", "deflected")
+
+
+def mmss(seconds):
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def player(team_id, rng):
+    return team_id * 100000 + 8470000 + rng.randrange(23)
+
+
+def team_header(team):
+    team_id, abbrev, name, place = team
+    logo = f"https://assets.nhle.com/logos/nhl/svg/{abbrev}"
+    return {
+        "id": team_id,
+        "commonName": {"default": name},
+        "abbrev": abbrev,
+        "placeName": {"default": place},
+        "placeNameWithPreposition": {"default": place, "fr": f"de {place}"},
+        "score": 0,
+        "sog": 0,
+        "logo": f"{logo}_light.svg",
+        "darkLogo": f"{logo}_dark.svg",
+    }
+
+
+def situation(home_skaters, away_skaters, home_goalie=1, away_goalie=1):
+    """Situation code: away goalie, away skaters, home skaters, home goalie"""
+    return f"{away_goalie}{away_skaters}{home_skaters}{home_goalie}"
+
+
+def generate(seed):
+    """A regulation game, shaped like the gamecenter play-by-play feed"""
+    rng = random.Random(seed)
+    game_id = 2024020000 + seed % 1000
+    plays = []
+    score = {HOME[0]: 0, AWAY[0]: 0}
+    event_id = 50
+    sort_order = 8
+    for period in (1, 2, 3):
+        elapsed = 0
+        short = {HOME[0]: 0, AWAY[0]: 0}  # power play ends, game seconds
+        types = [((520, "period-start"), 0)]
+        while elapsed < PERIOD_SEC:
+            kinds, weights = zip(*PLAY_TYPES)
+            types.append((rng.choices(kinds, weights)[0], elapsed))
+            elapsed += rng.randint(*PLAY_GAP_SEC)
+        types.append(((521, "period-end"), PERIOD_SEC))
+        for (code, key), at in types:
+            owner = rng.choice((HOME[0], AWAY[0]))
+            skaters = {t: 4 if short[t] > at else 5 for t in short}
+            # The trailing team pulls its goalie late in the third
+            pulled = period == 3 and at > PERIOD_SEC - 90
+            diff = score[HOME[0]] - score[AWAY[0]]
+            home_goalie = 0 if pulled and diff == -1 else 1
+            away_goalie = 0 if pulled and diff == 1 else 1
+            details = {}
+            if key == "faceoff":
+                details = {
+                    "eventOwnerTeamId": owner,
+                    "losingPlayerId": player(owner ^ 14, rng),
+                    "winningPlayerId": player(owner, rng),
+                    "xCoord": 0,
+                    "yCoord": 0,
+                    "zoneCode": "N",
+                }
+            elif key in ("shot-on-goal", "missed-shot", "blocked-shot"):
+                if key == "shot-on-goal" and rng.random() < GOAL_CHANCE:
+                    key, code = "goal", 505
+                details = {
+                    "xCoord": rng.randint(-99, 99),
+                    "yCoord": rng.randint(-42, 42),
+                    "zoneCode": "O",
+                    "shotType": rng.choice(SHOT_TYPES),
+                }
+                if key == "goal":
+                    score[owner] += 1
+                    details.update(
+                        scoringPlayerId=player(owner, rng),
+                        scoringPlayerTotal=rng.randint(1, 9),
+                        assist1PlayerId=player(owner, rng),
+                        assist1PlayerTotal=rng.randint(1, 12),
+                        eventOwnerTeamId=owner,
+                        goalieInNetId=player(owner ^ 14, rng),
+                        awayScore=score[AWAY[0]],
+                        homeScore=score[HOME[0]],
+                        highlightClipSharingUrl=f"https://nhl.com/video/{game_id}",
+                        highlightClip=6360000000000 + event_id,
+                    )
+                else:
+                    details.update(
+                        shootingPlayerId=player(owner, rng),
+                        goalieInNetId=player(owner ^ 14, rng),
+                        eventOwnerTeamId=owner,
+                    )
+                    if key == "missed-shot":
+                        details["reason"] = rng.choice(("wide-of-net", "high"))
+            elif key == "penalty":
+                short[owner] = at + PENALTY_SEC
+                details = {
+                    "xCoord": rng.randint(-99, 99),
+                    "yCoord": rng.randint(-42, 42),
+                    "zoneCode": rng.choice("ODN"),
+                    "typeCode": "MIN",
+                    "descKey": rng.choice(("tripping", "hooking", "slashing")),
+                    "duration": 2,
+                    "committedByPlayerId": player(owner, rng),
+                    "drawnByPlayerId": player(owner ^ 14, rng),
+                    "eventOwnerTeamId": owner,
+                }
+            elif key == "stoppage":
+                details = {"reason": rng.choice(("offside", "icing", "puck-frozen"))}
+            elif key in ("hit", "giveaway", "takeaway"):
+                details = {
+                    "xCoord": rng.randint(-99, 99),
+                    "yCoord": rng.randint(-42, 42),
+                    "zoneCode": rng.choice("ODN"),
+                    "eventOwnerTeamId": owner,
+                    "playerId": player(owner, rng),
+                }
+            play = {
+                "eventId": event_id,
+                "periodDescriptor": {
+                    "number": period,
+                    "periodType": "REG",
+                    "maxRegulationPeriods": 3,
+                },
+                "timeInPeriod": mmss(at),
+                "timeRemaining": mmss(PERIOD_SEC - at),
+                "situationCode": situation(
+                    skaters[HOME[0]], skaters[AWAY[0]], home_goalie, away_goalie
+                ),
+                "homeTeamDefendingSide": "left" if period % 2 else "right",
+                "typeCode": code,
+                "typeDescKey": key,
+                "sortOrder": sort_order,
+            }
+            if details:
+                play["details"] = details
+            if key == "goal":
+                play["pptReplayUrl"] = f"https://wsr.nhle.com/{game_id}/{event_id}"
+            plays.append(play)
+            event_id += rng.randint(1, 4)
+            sort_order += rng.randint(1, 12)
+
+    roster = [
+        {
+            "teamId": team[0],
+            "playerId": player(team[0], rng) + i,
+            "firstName": {"default": f"Player{i}"},
+            "lastName": {"default": f"{team[2]}{i}"},
+            "sweaterNumber": i + 2,
+            "positionCode": "GCDLR"[i % 5],
+            "headshot": f"https://assets.nhle.com/mugs/nhl/20242025/{team[1]}/{i}.png",
+        }
+        for team in (HOME, AWAY)
+        for i in range(20)
+    ]
+    return {
+        "id": game_id,
+        "season": 20242025,
+        "gameType": 2,
+        "limitedScoring": False,
+        "gameDate": "2024-10-24",
+        "venue": {"default": "Xcel Energy Center"},
+        "venueLocation": {"default": "St. Paul"},
+        "startTimeUTC": "2024-10-25T00:00:00Z",
+        "easternUTCOffset": "-04:00",
+        "venueUTCOffset": "-05:00",
+        "tvBroadcasts": [
+            {"id": n, "market": m, "countryCode": c, "network": net}
+            for n, m, c, net in (
+                (1, "H", "US", "FDSNNO"),
+                (2, "A", "US", "CHSN"),
+                (3, "N", "CA", "SNO"),
+            )
+        ],
+        "gameState": "LIVE",
+        "gameScheduleState": "OK",
+        "periodDescriptor": {
+            "number": 1,
+            "periodType": "REG",
+            "maxRegulationPeriods": 3,
+        },
+        "awayTeam": team_header(AWAY),
+        "homeTeam": team_header(HOME),
+        "shootoutInUse": True,
+        "otInUse": True,
+        "clock": {
+            "timeRemaining": "20:00",
+            "secondsRemaining": PERIOD_SEC,
+            "running": False,
+            "inIntermission": False,
+        },
+        "displayPeriod": 1,
+        "maxPeriods": 5,
+        "plays": plays,
+        "rosterSpots": roster,
+        "regPeriods": 3,
+        "summary": {"iceSurface": {"awayTeam": {}, "homeTeam": {}}},
+    }
+
+
+def snapshot(doc, plays):
+    """
+    The feed as the API would serve it after the first plays: the header's
+    period, clock and score brought up to the last of them
+    """
+    partial = dict(doc)
+    partial["plays"] = doc["plays"][:plays]
+    if partial["plays"]:
+        last = partial["plays"][-1]
+        period = last.get("periodDescriptor")
+        if period:
+            partial["periodDescriptor"] = dict(period)
+            partial["displayPeriod"] = period["number"]
+        if "timeRemaining" in last and "clock" in doc:
+            minutes, seconds = last["timeRemaining"].split(":")
+            partial["clock"] = dict(
+                doc["clock"],
+                timeRemaining=last["timeRemaining"],
+                secondsRemaining=int(minutes) * 60 + int(seconds),
+            )
+        goals = [p for p in partial["plays"] if p.get("typeDescKey") == "goal"]
+        for side, key in (("awayTeam", "awayScore"), ("homeTeam", "homeScore")):
+            score = goals[-1]["details"].get(key, 0) if goals else 0
+            partial[side] = dict(doc[side], score=score)
+    return json.dumps(partial, separators=(",", ":")).encode()
+
+
+def expected_goals(doc, team):
+    """(our score, opponent score, strength) of each goal, from json.loads"""
+    home = doc["homeTeam"]
+    we_are_home = home["abbrev"] == team
+    goals = []
+    for play in doc["plays"]:
+        if play.get("typeDescKey") != "goal":
+            continue
+        details = play.get("details", {})
+        home_goal = details.get("eventOwnerTeamId") == home["id"]
+        scores = details.get("homeScore", 0), details.get("awayScore", 0)
+        our, opp = scores if we_are_home else scores[::-1]
+        strength = goal_strength(play.get("situationCode"), home_goal)
+        goals.append((our, opp, strength))
+    return goals
+
+
+def full_parse(payload, last_sort_order):
+    """Reference: load the whole feed and pick out the new goals"""
+    doc = json.loads(payload)
+    return [
+        p
+        for p in doc["plays"]
+        if p["sortOrder"] > last_sort_order and p["typeDescKey"] == "goal"
+    ]
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--feed", help="recorded play-by-play JSON")
+    parser.add_argument("--team", help="our team (default: the home team)")
+    parser.add_argument("--polls", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1, help="generated game")
+    args = parser.parse_args()
+
+    if args.feed:
+        with open(args.feed, "rb") as f:
+            doc = json.load(f)
+    else:
+        doc = generate(args.seed)
+    team = args.team or doc["homeTeam"]["abbrev"]
+    polls = args.polls
+
+    total_plays = len(doc["plays"])
+    tracker = PlayByPlayTracker(doc["id"], team)
+    source = args.feed or f"generated, seed {args.seed}"
+    print(f"Game {doc['id']} ({source}): {total_plays} plays, {polls} polls, {team}")
+    print(
+        f"{'poll':>4} {'plays':>6} {'bytes':>8} {'ms':>8} {'peak KB':>8} "
+        f"{'json ms':>8} {'json KB':>8} goals"
+    )
+
+    problems = []
+    found = []
+    worst = [0, 0]
+    totals = [0, 0]
+    last_sort_order = -1
+    for poll in range(1, polls + 1):
+        plays = total_plays * poll // polls
+        payload = snapshot(doc, plays)
+        stream = io.BytesIO(payload)
+        goals, elapsed, peak = measure(lambda: tracker.consume(stream.read))
+        reference, json_ms, json_peak = measure(
+            lambda: full_parse(payload, last_sort_order)
+        )
+        last_sort_order = tracker.last_sort_order
+
+        worst = [max(worst[0], peak), max(worst[1], json_peak)]
+        totals = [totals[0] + elapsed, totals[1] + json_ms]
+        found += [(g["our_score"], g["opp_score"], g["strength"]) for g in goals]
+        if len(goals) != len(reference):
+            problems.append(
+                f"poll {poll}: {len(goals)} goals, feed has {len(reference)}"
+            )
+        header = json.loads(payload)
+        want = (header["periodDescriptor"]["number"], header["clock"]["timeRemaining"])
+        if (tracker.period, tracker.clock) != want:
+            got = (tracker.period, tracker.clock)
+            problems.append(f"poll {poll}: period and clock {got}, header has {want}")
+        labels = " ".join(
+            f"{g['our_score']}-{g['opp_score']}({g['strength']})" for g in goals
+        )
+        print(
+            f"{poll:>4} {plays:>6} {len(payload):>8} {elapsed:>8.2f} "
+            f"{peak / 1024:>8.1f} {json_ms:>8.2f} {json_peak / 1024:>8.1f} {labels}"
+        )
+
+    if found != expected_goals(doc, team):
+        problems.append("goals differ from the feed's")
+    print(f"Goals reported: {len(found)}")
+    print(
+        f"Tracker: {totals[0] / polls:.2f} ms per poll, "
+        f"worst peak {worst[0] / 1024:.1f} KB"
+    )
+    print(
+        f"json.loads: {totals[1] / polls:.2f} ms per poll, "
+        f"worst peak {worst[1] / 1024:.1f} KB"
+    )
+    print("All checks passed" if not problems else f"{len(problems)} problems:")
+    for problem in problems:
+        print(f"    {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Benchmark the multi-team score feed parser against the number of teams
+Runs on the host with CPython:
+
+    curl -o now.json https://api-web.nhle.com/v1/score/now
+    python tools/bench_score_feed.py now.json
+
+Without a file a synthetic 16-game slate shaped like score/now is used.
+Each row tracks one more team (taken from the last games in the feed
+first, the worst case for the early exit) and reports parse time, peak
+allocation and bytes read. Tracking any number of teams is still one
+request; the last column is what one request per team would cost.
+"""
+
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from provider_nhl import Provider as ScoreFeed  # noqa: E402
+
+TEAMS = (
+    "ANA BOS BUF CAR CBJ CGY CHI COL DAL DET EDM FLA LAK MIN MTL NJD "
+    "NSH NYI NYR OTT PHI PIT SEA SJS STL TBL TOR UTA VAN VGK WPG WSH"
+).split()
+REPEATS = 20
+
+
+def synthetic_feed(games=16):
+    """A slate with the nested names, broadcasts and goals of the real feed"""
+    slate = []
+    for n in range(games):
+        away, home = TEAMS[2 * n], TEAMS[2 * n + 1]
+        goals = [
+            {
+                "period": 1 + g % 3,
+                "timeInPeriod": f"{g:02d}:30",
+                "playerId": 8470000 + g,
+                "name": {"default": f"P. Player{g}"},
+                "teamAbbrev": away if g % 2 else home,
+                "strength": "ev",
+                "awayScore": g // 2,
+                "homeScore": (g + 1) // 2,
+                "assists": [{"playerId": 8480000 + g, "name": {"default": "A. Assist"}}],
+            }
+            for g in range(n % 7)
+        ]
+        slate.append(
+            {
+                "id": 2024020100 + n,
+                "season": 20242025,
+                "gameType": 2,
+                "gameDate": "2024-11-05",
+                "venue": {"default": f"Arena {n}"},
+                "startTimeUTC": "2024-11-06T00:00:00Z",
+                "tvBroadcasts": [
+                    {"id": 280 + n, "market": "A", "countryCode": "US", "network": "ESPN+"},
+                    {"id": 410 + n, "market": "H", "countryCode": "CA", "network": "SN"},
+                ],
+                "gameState": "LIVE" if n % 3 else "FUT",
+                "awayTeam": {
+                    "id": 10 + n,
+                    "name": {"default": f"{away} Team", "fr": f"Equipe {away}"},
+                    "abbrev": away,
+                    "score": n % 4,
+                    "sog": 20 + n,
+                    "logo": f"https://assets.nhle.com/logos/nhl/svg/{away}_light.svg",
+                },
+                "homeTeam": {
+                    "id": 40 + n,
+                    "name": {"default": f"{home} Team", "fr": f"Equipe {home}"},
+                    "abbrev": home,
+                    "score": (n + 1) % 5,
+                    "sog": 18 + n,
+                    "logo": f"https://assets.nhle.com/logos/nhl/svg/{home}_light.svg",
+                },
+                "gameCenterLink": f"/gamecenter/{away.lower()}-vs-{home.lower()}",
+                "clock": {"timeRemaining": "12:34", "running": True},
+                "period": 2,
+                "goals": goals,
+            }
+        )
+    doc = {
+        "prevDate": "2024-11-04",
+        "currentDate": "2024-11-05",
+        "gameWeek": [{"date": "2024-11-05", "numberOfGames": games}],
+        "games": slate,
+    }
+    return json.dumps(doc, separators=(",", ":")).encode()
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            payload = f.read()
+    else:
+        payload = synthetic_feed()
+
+    teams = []
+    for game in reversed(json.loads(payload)["games"]):
+        teams += [game["awayTeam"]["abbrev"], game["homeTeam"]["abbrev"]]
+    print(f"Feed: {len(payload)} bytes, {len(teams) // 2} games")
+    print(f"{'teams':>5} {'found':>5} {'ms':>8} {'peak KB':>8} {'read KB':>8} {'1/team KB':>10}")
+
+    for count in (1, 2, 3, 4, 6, 8, len(teams)):
+        feed = ScoreFeed(teams[:count])
+        best = None
+        for _ in range(REPEATS):
+            stream = io.BytesIO(payload)
+            start = time.perf_counter()
+            found = feed.consume(stream.read)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+
+        stream = io.BytesIO(payload)
+        tracemalloc.start()
+        feed.consume(stream.read)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        read_kb = stream.tell() / 1024
+        print(
+            f"{count:>5} {len(found):>5} {best:>8.2f} {peak / 1024:>8.1f} "
+            f"{read_kb:>8.1f} {count * len(payload) / 1024:>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Compile the panel font into glyphs.py for one LED matrix layout
+Runs on the host with CPython:
+
+    python tools/build_glyphs.py --width 32 --height 8 --layout columns
+    mpremote cp glyphs.py :
+
+The font is 3x5 pixels: digits, P, O, T, S, "-", ":" and space. Each glyph
+is stored as one mask per wiring line, already in strip order for both
+directions of a serpentine panel. A wiring line is a panel column for
+panels wired in columns and a row for panels wired in rows. panel_text.py
+then draws a glyph with one slice copy per line and no coordinate math.
+
+Layouts:
+    columns: LED 0 top left, running down the first column (the common
+             8xN panels); serpentine panels reverse every other column
+    rows: LED 0 top left, running along the first row
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+FONT_HEIGHT = 5
+SPACING = 1  # blank columns between glyphs
+
+FONT = {
+    "0": ("###", "#.#", "#.#", "#.#", "###"),
+    "1": (".#.", "##.", ".#.", ".#.", "###"),
+    "2": ("###", "..#", "###", "#..", "###"),
+    "3": ("###", "..#", "###", "..#", "###"),
+    "4": ("#.#", "#.#", "###", "..#", "..#"),
+    "5": ("###", "#..", "###", "..#", "###"),
+    "6": ("###", "#..", "###", "#.#", "###"),
+    "7": ("###", "..#", ".#.", ".#.", ".#."),
+    "8": ("###", "#.#", "###", "#.#", "###"),
+    "9": ("###", "#.#", "###", "..#", "###"),
+    "P": ("###", "#.#", "###", "#..", "#.."),
+    "O": ("###", "#.#", "#.#", "#.#", "###"),
+    "T": ("###", ".#.", ".#.", ".#.", ".#."),
+    "S": ("###", "#..", "###", "..#", "###"),
+    "-": ("..", "..", "##", "..", ".."),
+    ":": (".", "#", ".", "#", "."),
+    " ": ("..", "..", "..", "..", ".."),
+}
+
+
+def glyph_lines(rows, layout, height, top):
+    """
+    Masks for each wiring line of one glyph as (forward, reverse) pairs
+    columns: one mask per glyph column, covering the whole panel column
+    rows: one mask per font row, covering the glyph's width
+    """
+    width = len(rows[0])
+    lines = []
+    if layout == "columns":
+        for x in range(width):
+            column = bytearray(height)
+            for y, row in enumerate(rows):
+                column[top + y] = row[x] == "#"
+            lines.append((bytes(column), bytes(reversed(column))))
+    else:
+        for row in rows:
+            mask = bytes(c == "#" for c in row)
+            lines.append((mask, bytes(reversed(mask))))
+    return width, tuple(lines)
+
+
+def literal(data):
+    """Double-quoted bytes literal, one escape per byte"""
+    return 'b"' + "".join(f"\\x{b:02x}" for b in data) + '"'
+
+
+def render_module(width, height, layout, serpentine):
+    top = (height - FONT_HEIGHT) // 2
+    out = [
+        '"""',
+        "Panel font compiled by tools/build_glyphs.py; regenerate, don't edit",
+        f"{width}x{height} panel wired in {layout}"
+        + (", serpentine" if serpentine else ""),
+        '"""',
+        "",
+        f"WIDTH = {width}",
+        f"HEIGHT = {height}",
+        f'LAYOUT = "{layout}"',
+        f"SERPENTINE = {serpentine}",
+        f"TOP = {top}  # first panel row of the font",
+        f"SPACING = {SPACING}",
+        "",
+        "# char: (width, ((forward mask, reverse mask) per wiring line))",
+        "GLYPHS = {",
+    ]
+    for char, rows in FONT.items():
+        glyph_width, lines = glyph_lines(rows, layout, height, top)
+        out.append(f'    "{char}": (')
+        out.append(f"        {glyph_width},")
+        out.append("        (")
+        for forward, reverse in lines:
+            out.append(f"            ({literal(forward)}, {literal(reverse)}),")
+        out.append("        ),")
+        out.append("    ),")
+    out.append("}")
+    return "\n".join(out) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=12, help="panel columns")
+    parser.add_argument("--height", type=int, default=8, help="panel rows")
+    parser.add_argument("--layout", choices=("columns", "rows"), default="columns")
+    parser.add_argument(
+        "--progressive",
+        action="store_true",
+        help="every line runs the same way (not serpentine)",
+    )
+    parser.add_argument("-o", "--output", default=os.path.join(ROOT, "glyphs.py"))
+    args = parser.parse_args()
+
+    if args.height < FONT_HEIGHT:
+        print(f"Panels need at least {FONT_HEIGHT} rows")
+        return 1
+    source = render_module(
+        args.width, args.height, args.layout, not args.progressive
+    )
+    with open(args.output, "w") as f:
+        f.write(source)
+    print(
+        f"{args.output}: {len(FONT)} glyphs for a {args.width}x{args.height} "
+        f"{args.layout} panel, {len(source)} bytes"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Cross-compile the firmware to .mpy bytecode and write a deploy manifest
+Runs on the host with CPython; needs mpy-cross matching the firmware
+version (pip install "mpy-cross==1.27.*") and mpremote for --deploy and
+--compare:
+
+    python tools/build_mpy.py                       # build/mpy + manifest
+    python tools/build_mpy.py --source              # build/py, no compiling
+    python tools/build_mpy.py --deploy /dev/ttyUSB0
+    python tools/build_mpy.py --compare /dev/ttyUSB0
+    python tools/build_mpy.py --frozen              # frozen_manifest.py
+
+MicroPython only runs main.py and boot.py from source, so main.py is
+compiled as app.mpy and replaced by a one-line main.py that imports it.
+
+--compare deploys the source build and then the .mpy build. After each it
+resets the board --boots times (3) over the serial line and reads the boot
+timer main.py logs at the first draw ("Boot: imports ..ms, ... first draw
+..ms (total ..ms)"), then runs tools/import_probe.py for the import time
+and heap of each module. Both are printed side by side. Resetting uses
+the RTS line wired to EN on ESP32 dev boards, through pyserial (installed
+with mpremote).
+
+--frozen writes a manifest for building a firmware image with the modules
+frozen in. The checked-in ESP32_GENERIC .bin is stock firmware and is not
+modified; build a new image from a MicroPython checkout with:
+
+    make -C ports/esp32 BOARD=ESP32_GENERIC FROZEN_MANIFEST=<repo>/build/frozen_manifest.py
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUILD = os.path.join(ROOT, "build")
+
+# Host-side helpers that never run on the device
+EXCLUDE = {"config_helper.py"}
+# Kept as source: MicroPython runs these by file name
+SOURCE_ONLY = {"boot.py", "main.py"}
+MAIN_MODULE = "app"
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+BOOTS = 3
+BOOT_TIMEOUT_SEC = 30
+BOOT_LINE = re.compile(r"Boot: (.*first draw \d+ms) \(total (\d+)ms\)")
+
+
+def firmware_modules():
+    """Top-level .py files that are deployed to the device"""
+    return sorted(
+        name
+        for name in os.listdir(ROOT)
+        if name.endswith(".py") and name not in EXCLUDE
+    )
+
+
+def stage_sources(dest):
+    """Copy the sources with main.py renamed, ready to compile or freeze"""
+    os.makedirs(dest, exist_ok=True)
+    for name in firmware_modules():
+        target = f"{MAIN_MODULE}.py" if name == "main.py" else name
+        shutil.copyfile(os.path.join(ROOT, name), os.path.join(dest, target))
+    return sorted(os.listdir(dest))
+
+
+def mpy_cross_version():
+    result = subprocess.run(
+        ["mpy-cross", "--version"], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(out, fmt, compiler=None):
+    """Record every deployable file with its size and sha256"""
+    files = {}
+    for base, _, names in os.walk(out):
+        for name in sorted(names):
+            path = os.path.join(base, name)
+            rel = os.path.relpath(path, out).replace(os.sep, "/")
+            if rel == MANIFEST:
+                continue
+            files[rel] = {"size": os.path.getsize(path), "sha256": sha256(path)}
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "format": fmt,
+        "compiler": compiler,
+        "files": dict(sorted(files.items())),
+    }
+    with open(os.path.join(out, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return manifest
+
+
+def copy_www(out):
+    shutil.copytree(os.path.join(ROOT, "www"), os.path.join(out, "www"))
+
+
+def build_source():
+    """Plain source deployment, for comparison and for debugging"""
+    out = os.path.join(BUILD, "py")
+    shutil.rmtree(out, ignore_errors=True)
+    os.makedirs(out)
+    for name in firmware_modules():
+        shutil.copyfile(os.path.join(ROOT, name), os.path.join(out, name))
+    copy_www(out)
+    return out, write_manifest(out, "py")
+
+
+def build_mpy():
+    out = os.path.join(BUILD, "mpy")
+    staging = os.path.join(BUILD, "src")
+    shutil.rmtree(out, ignore_errors=True)
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(out)
+
+    for name in stage_sources(staging):
+        src = os.path.join(staging, name)
+        if name in SOURCE_ONLY - {"main.py"}:
+            shutil.copyfile(src, os.path.join(out, name))
+            continue
+        target = os.path.join(out, name[:-3] + ".mpy")
+        # -s keeps tracebacks pointing at the original file name
+        source_name = "main.py" if name == f"{MAIN_MODULE}.py" else name
+        subprocess.run(
+            ["mpy-cross", "-s", source_name, "-o", target, src], check=True
+        )
+
+    with open(os.path.join(out, "main.py"), "w") as f:
+        f.write(f"import {MAIN_MODULE}\n")
+    copy_www(out)
+    return out, write_manifest(out, "mpy", mpy_cross_version())
+
+
+def write_frozen_manifest():
+    """Manifest for FROZEN_MANIFEST= in a MicroPython firmware build"""
+    staging = os.path.join(BUILD, "src")
+    shutil.rmtree(staging, ignore_errors=True)
+    modules = [n for n in stage_sources(staging) if n not in SOURCE_ONLY]
+    path = os.path.join(BUILD, "frozen_manifest.py")
+    with open(path, "w") as f:
+        f.write('include("$(PORT_DIR)/boards/manifest.py")\n')
+        f.write(f"freeze({staging!r}, (\n")
+        for name in modules:
+            f.write(f"    {name!r},\n")
+        f.write("))\n")
+    return path
+
+
+def mpremote(port, *args, check=True):
+    return subprocess.run(
+        ["mpremote", "connect", port, *args],
+        capture_output=True,
+        text=True,
+        check=check,
+    )
+
+
+def device_files(port):
+    result = mpremote(port, "fs", "ls", ":")
+    lines = result.stdout.splitlines()[1:]  # first line echoes the command
+    return {line.split()[-1] for line in lines if line.strip()}
+
+
+def deploy(port, out, manifest):
+    """Copy a build to the device, removing files the other format left"""
+    wanted = set(manifest["files"]) | {MANIFEST}
+    for name in sorted(device_files(port)):
+        # A leftover .py shadows the .mpy of the same module
+        if name.endswith((".py", ".mpy")) and name not in wanted:
+            mpremote(port, "fs", "rm", f":{name}", check=False)
+
+    mpremote(port, "fs", "mkdir", ":www", check=False)
+    for rel in sorted(wanted):
+        mpremote(port, "fs", "cp", os.path.join(out, rel), f":{rel}")
+    print(f"Deployed {len(wanted)} files ({manifest['format']}) to {port}")
+
+
+def probe(port):
+    probe_script = os.path.join(ROOT, "tools", "import_probe.py")
+    result = mpremote(port, "soft-reset", "run", probe_script)
+    rows = {}
+    for line in result.stdout.splitlines():
+        if line.startswith("PROBE "):
+            row = json.loads(line[6:])
+            rows[row["module"]] = row
+    return rows
+
+
+def boot_phases(port):
+    """
+    Hard-reset the board and return main.py's boot phases up to the first
+    draw, in ms, with "total" counted from power-on
+    """
+    import serial  # pyserial, a dependency of mpremote
+
+    with serial.Serial(port, 115200, timeout=1) as uart:
+        uart.dtr = False  # IO0 high: boot the firmware, not the bootloader
+        uart.rts = True  # EN low
+        time.sleep(0.1)
+        uart.reset_input_buffer()
+        uart.rts = False
+        deadline = time.monotonic() + BOOT_TIMEOUT_SEC
+        while time.monotonic() < deadline:
+            line = uart.readline().decode("utf-8", "replace")
+            match = BOOT_LINE.search(line)
+            if match:
+                phases = {}
+                for part in match.group(1).split(", "):
+                    name, ms = part.rsplit(" ", 1)
+                    phases[name] = int(ms[:-2])
+                phases["total"] = int(match.group(2))
+                return phases
+    raise RuntimeError(f"No boot timer line from {port} in {BOOT_TIMEOUT_SEC}s")
+
+
+def boot_times(port, boots):
+    """Median of each boot phase over several resets"""
+    runs = [boot_phases(port) for _ in range(boots)]
+    return {
+        phase: sorted(run[phase] for run in runs)[boots // 2] for phase in runs[0]
+    }
+
+
+def compare(port, boots=BOOTS):
+    results = {}
+    boot = {}
+    for fmt, builder in (("py", build_source), ("mpy", build_mpy)):
+        out, manifest = builder()
+        deploy(port, out, manifest)
+        boot[fmt] = boot_times(port, boots)
+        results[fmt] = probe(port)
+
+    print(f"Boot to first draw, median of {boots} resets")
+    print(f"{'phase':<18} {'py ms':>8} {'mpy ms':>8}")
+    for phase, ms in boot["py"].items():
+        print(f"{phase:<18} {ms:>8} {boot['mpy'].get(phase, ''):>8}")
+    print()
+    print("Imports on a soft reset, one module at a time")
+    print(
+        f"{'module':<18} {'py ms':>8} {'mpy ms':>8} "
+        f"{'py peak':>8} {'mpy peak':>8} {'py kept':>8} {'mpy kept':>8}"
+    )
+    for module, src in results["py"].items():
+        mpy = results["mpy"].get(module, {})
+        if "error" in src or "error" in mpy:
+            print(f"{module:<18} {src.get('error') or mpy.get('error')}")
+            continue
+        print(
+            f"{module:<18} {src['ms']:>8.1f} {mpy['ms']:>8.1f} "
+            f"{src['transient']:>8} {mpy['transient']:>8} "
+            f"{src['kept']:>8} {mpy['kept']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", action="store_true", help="source build only")
+    parser.add_argument("--frozen", action="store_true", help="write frozen manifest")
+    parser.add_argument("--deploy", metavar="PORT", help="copy the build to a device")
+    parser.add_argument("--compare", metavar="PORT", help="py vs mpy on a device")
+    parser.add_argument(
+        "--boots", type=int, default=BOOTS, help="resets per build with --compare"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare, args.boots)
+        return 0
+    if args.frozen:
+        print(f"Wrote {write_frozen_manifest()}")
+        return 0
+
+    out, manifest = build_source() if args.source else build_mpy()
+    total = sum(entry["size"] for entry in manifest["files"].values())
+    print(f"Built {len(manifest['files'])} files, {total} bytes, in {out}")
+    if args.deploy:
+        deploy(args.deploy, out, manifest)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
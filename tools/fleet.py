@@ -0,0 +1,327 @@
+"""
+Read and change settings on a fleet of boxes from one command
+Runs on the host with CPython (asyncio, no other dependencies):
+
+    python tools/fleet.py --discover status
+    python tools/fleet.py --sweep 192.168.1.0/24 --pattern "wildsensor*" config
+    python tools/fleet.py --hosts 192.168.1.20,192.168.1.21 set brightness=30
+    python tools/fleet.py --hosts-file boxes.txt set sleep_mode=deep --restart
+
+Boxes are found by a UDP discovery probe (each box answers with its
+hostname), by sweeping a subnet for /status, or from a list. --pattern
+keeps the boxes whose hostname matches a shell pattern. Requests go out
+concurrently, at most --parallel at a time. Each is retried up to
+--retries times with jittered backoff, but a 4xx reply is final. set
+writes through /device, which only restarts a box with --restart.
+
+Prints a line per box and a summary: ok and failed counts, retries,
+latency percentiles and wall time. --json prints the results instead.
+tools/fleet_sim.py runs it against hundreds of simulated boxes.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import ipaddress
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import constants  # noqa: E402
+
+DEFAULT_PARALLEL = 32
+DEFAULT_RETRIES = 2
+DEFAULT_TIMEOUT_SEC = 5
+RETRY_BACKOFF_SEC = 0.5  # doubled per attempt, with +/-50% jitter
+DISCOVERY_WAIT_SEC = 2
+DISCOVERY_PROBES = 3  # probes are UDP; a box answers each one it gets
+SWEEP_TIMEOUT_SEC = 1
+BROADCAST = "255.255.255.255"
+
+
+class Box:
+    def __init__(self, host, port=constants.DEFAULT_HTTP_PORT, hostname=None):
+        self.host = host
+        self.port = port
+        self.hostname = hostname
+
+    def __str__(self):
+        address = self.host
+        if self.port != constants.DEFAULT_HTTP_PORT:
+            address += f":{self.port}"
+        return f"{self.hostname} ({address})" if self.hostname else address
+
+
+class HTTPError(Exception):
+    def __init__(self, status, body):
+        super().__init__(f"HTTP {status}: {body[:60].decode(errors='replace')}")
+        self.status = status
+
+
+def parse_box(text):
+    host, _, port = text.strip().partition(":")
+    return Box(host, int(port) if port else constants.DEFAULT_HTTP_PORT)
+
+
+async def http_request(box, method, path, body=None):
+    """
+    One request and its JSON reply; the request goes out in a single
+    write, as the box reads it with one recv()
+    """
+    reader, writer = await asyncio.open_connection(box.host, box.port)
+    try:
+        data = b"" if body is None else json.dumps(body).encode()
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {box.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode() + data)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    if not response:
+        raise ConnectionError("empty reply")
+    head, _, payload = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    if status != 200:
+        raise HTTPError(status, payload)
+    return json.loads(payload)
+
+
+def get_status(box):
+    return http_request(box, "GET", "/status")
+
+
+def get_config(box):
+    return http_request(box, "GET", "/config.json")
+
+
+def set_settings(settings, restart=False):
+    path = "/device?restart=1" if restart else "/device"
+    return lambda box: http_request(box, "POST", path, settings)
+
+
+async def fan_out(boxes, request, parallel, retries, timeout):
+    """
+    Run request(box) against every box, at most parallel at a time
+    Waiting out a retry's backoff doesn't hold a slot. Returns a result
+    dict per box, in the order given.
+    """
+    slots = asyncio.Semaphore(parallel)
+
+    async def one(box):
+        attempts = 0
+        start = time.perf_counter()
+        while True:
+            attempts += 1
+            refused = False
+            async with slots:
+                try:
+                    value = await asyncio.wait_for(request(box), timeout)
+                    error = None
+                except HTTPError as e:
+                    error = e
+                    refused = e.status < 500  # Retrying won't change the answer
+                except (OSError, ValueError, IndexError, asyncio.TimeoutError) as e:
+                    error = e
+            if error is None or refused or attempts > retries:
+                break
+            backoff = RETRY_BACKOFF_SEC * 2 ** (attempts - 1)
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.5))
+        result = {
+            "box": box,
+            "ok": error is None,
+            "attempts": attempts,
+            "ms": (time.perf_counter() - start) * 1000,
+        }
+        if error is None:
+            result["value"] = value
+        else:
+            result["error"] = str(error) or type(error).__name__
+        return result
+
+    return await asyncio.gather(*(one(box) for box in boxes))
+
+
+async def discover(address=BROADCAST, port=None, wait=None):
+    """Boxes answering a UDP discovery probe sent to address"""
+    if port is None:
+        port = constants.DISCOVERY_PORT
+    if wait is None:
+        wait = DISCOVERY_WAIT_SEC
+    found = {}
+
+    class Probe(asyncio.DatagramProtocol):
+        def datagram_received(self, data, addr):
+            try:
+                hello = json.loads(data)
+                port = int(hello.get("port", constants.DEFAULT_HTTP_PORT))
+                box = Box(addr[0], port, hello.get("hostname"))
+            except (ValueError, TypeError, AttributeError):
+                return
+            found[(box.host, box.port)] = box
+
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        Probe, local_addr=("0.0.0.0", 0), allow_broadcast=True
+    )
+    try:
+        for _ in range(DISCOVERY_PROBES):
+            transport.sendto(constants.DISCOVERY_PROBE, (address, port))
+            await asyncio.sleep(wait / DISCOVERY_PROBES)
+    finally:
+        transport.close()
+    return list(found.values())
+
+
+async def sweep(network, parallel, port=constants.DEFAULT_HTTP_PORT):
+    """Boxes in a subnet that answer /status, named from their reply"""
+    boxes = [Box(str(ip), port) for ip in ipaddress.ip_network(network).hosts()]
+    results = await fan_out(boxes, get_status, parallel, 0, SWEEP_TIMEOUT_SEC)
+    found = []
+    for result in results:
+        if result["ok"] and isinstance(result["value"], dict):
+            box = result["box"]
+            box.hostname = result["value"].get("hostname")
+            found.append(box)
+    return found
+
+
+def parse_settings(pairs):
+    """key=value pairs; values are JSON where they parse, else text"""
+    settings = {}
+    for pair in pairs:
+        key, sep, text = pair.partition("=")
+        if not sep:
+            raise ValueError(f"expected key=value, got {pair}")
+        try:
+            settings[key] = json.loads(text)
+        except ValueError:
+            settings[key] = text
+    return settings
+
+
+def describe(command, value):
+    if command == "status":
+        our, opp = value.get("score", (0, 0))
+        return (
+            f"{value.get('team')} {our}-{opp}, brightness {value.get('brightness')}%, "
+            f"up {value.get('uptime_sec')}s, heap {value.get('free_heap')}, "
+            f"rssi {value.get('rssi')}, restarts {value.get('restarts')}"
+        )
+    if command == "config":
+        return json.dumps(value.get("device", {}), sort_keys=True)
+    changed = value.get("changed") or "nothing changed"
+    pending = value.get("pending_restart")
+    pending = f", after a restart {pending}" if pending else ""
+    unknown = f", unknown {value['unknown']}" if value.get("unknown") else ""
+    restart = ", restarting" if value.get("restart") else ""
+    return f"{changed}{pending}{unknown}{restart}"
+
+
+def summarize(results, wall_sec, parallel):
+    ok = [r for r in results if r["ok"]]
+    retries = sum(r["attempts"] - 1 for r in results)
+    line = (
+        f"{len(results)} boxes: {len(ok)} ok, {len(results) - len(ok)} failed, "
+        f"{retries} retries, {wall_sec:.2f}s wall at {parallel} parallel"
+    )
+    if ok:
+        ms = sorted(r["ms"] for r in ok)
+        line += (
+            f"; latency p50 {ms[len(ms) // 2]:.1f} ms, "
+            f"p95 {ms[len(ms) * 95 // 100]:.1f} ms, max {ms[-1]:.1f} ms"
+        )
+    return line
+
+
+async def find_boxes(args):
+    boxes = []
+    if args.hosts:
+        boxes += [parse_box(h) for h in args.hosts.split(",") if h.strip()]
+    if args.hosts_file:
+        with open(args.hosts_file) as f:
+            boxes += [parse_box(line) for line in f if line.strip()]
+    if args.discover:
+        address, _, port = args.discover.partition(":")
+        port = int(port) if port else constants.DISCOVERY_PORT
+        boxes += await discover(address, port, args.wait)
+    if args.sweep:
+        boxes += await sweep(args.sweep, args.parallel)
+    if args.pattern:
+        boxes = [b for b in boxes if fnmatch.fnmatch(b.hostname or "", args.pattern)]
+    return boxes
+
+
+async def run(args):
+    boxes = await find_boxes(args)
+    if not boxes:
+        print("No boxes found")
+        return 1
+    if args.command == "status":
+        request = get_status
+    elif args.command == "config":
+        request = get_config
+    else:
+        request = set_settings(parse_settings(args.settings), args.restart)
+
+    start = time.perf_counter()
+    results = await fan_out(
+        boxes, request, args.parallel, args.retries, args.timeout
+    )
+    wall = time.perf_counter() - start
+
+    if args.json:
+        for result in results:
+            result["box"] = str(result["box"])
+        print(json.dumps(results, indent=1))
+    else:
+        for result in results:
+            if result["ok"]:
+                detail = describe(args.command, result["value"])
+            else:
+                detail = (
+                    f"FAILED after {result['attempts']} attempts: {result['error']}"
+                )
+            print(f"{str(result['box']):<36} {detail}")
+        print(summarize(results, wall, args.parallel))
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    where = parser.add_argument_group("boxes")
+    where.add_argument("--hosts", help="comma-separated host[:port] list")
+    where.add_argument("--hosts-file", help="file with one host[:port] per line")
+    where.add_argument(
+        "--discover",
+        nargs="?",
+        const=BROADCAST,
+        metavar="ADDRESS[:PORT]",
+        help="send a UDP discovery probe (default: LAN broadcast)",
+    )
+    where.add_argument("--sweep", metavar="CIDR", help="try /status on every address")
+    where.add_argument("--pattern", help="only boxes whose hostname matches")
+    where.add_argument("--wait", type=float, default=DISCOVERY_WAIT_SEC)
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SEC)
+    parser.add_argument("--json", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="live state of each box")
+    commands.add_parser("config", help="device settings of each box")
+    set_parser = commands.add_parser("set", help="change device settings")
+    set_parser.add_argument("settings", nargs="+", metavar="KEY=VALUE")
+    set_parser.add_argument("--restart", action="store_true")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
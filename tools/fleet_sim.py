@@ -0,0 +1,304 @@
+"""
+Run tools/fleet.py against a fleet of simulated boxes on localhost
+Runs on the host with CPython. Starts one HTTP server per box on
+127.0.0.1, answering /status, /config.json and POST /device the way
+config_server.py does (settings merge through config.apply_device_settings),
+plus one UDP socket answering discovery probes for the whole fleet. Some
+boxes are slow, some drop connections and some accept but never reply.
+
+    python tools/fleet_sim.py [--boxes 200] [--slow 0.1] [--flaky 0.1] [--dead 2]
+
+Discovers the fleet, reads status and config, sets brightness, checks that
+every reachable box took the setting, and times status reads at several
+parallel limits.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import constants  # noqa: E402
+import fleet  # noqa: E402
+from config import DEFAULT_CONFIG, LIVE_SETTINGS, apply_device_settings  # noqa: E402
+
+LATENCY_MS = (5, 30)  # a box on Wi-Fi answering one request
+SLOW_MS = (300, 900)
+FLAKY_DROP = 0.3  # share of requests a flaky box drops
+TIMEOUT_SEC = 1.5
+PARALLEL_LEVELS = (4, 16, 64, 256)
+FAULTS = ("slow", "flaky", "dead")
+
+
+class SimBox:
+    def __init__(self, index, fault, rng):
+        self.config = copy.deepcopy(DEFAULT_CONFIG)
+        self.config["wifi"].update(
+            ssid="rink", password="secret", hostname=f"wildsensor-{index:03d}"
+        )
+        self.config["hub"].update(enabled=True, key="hub-secret")
+        self.brightness = self.config["device"]["brightness"]  # shown now
+        self.fault = fault
+        self.rng = rng
+        self.restarts = 0
+        self.requests = 0
+        self.port = None
+        self.server = None
+
+    @property
+    def hostname(self):
+        return self.config["wifi"]["hostname"]
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def status(self):
+        device = self.config["device"]
+        return {
+            "hostname": self.hostname,
+            "team": device["team_abbrev"],
+            "score": [self.rng.randrange(5), self.rng.randrange(5)],
+            "brightness": self.brightness,
+            "uptime_sec": self.rng.randrange(60, 86400),
+            "free_heap": self.rng.randrange(60000, 90000),
+            "rssi": self.rng.randrange(-80, -40),
+            "restarts": self.restarts,
+        }
+
+    def route(self, request, body):
+        """The response for a request, as config_server.py would send it"""
+        line = request.split("\r\n", 1)[0]
+        if line.startswith("GET /status"):
+            return 200, self.status()
+        if line.startswith("GET /config.json"):
+            config = copy.deepcopy(self.config)
+            config["wifi"].pop("password", None)
+            config["hub"].pop("key", None)
+            return 200, config
+        if line.startswith("POST /device"):
+            try:
+                settings = json.loads(body)
+            except ValueError:
+                settings = None
+            if not isinstance(settings, dict):
+                return 400, "Expected a JSON object"
+            try:
+                changed, unknown = apply_device_settings(self.config, settings)
+            except ValueError as e:
+                return 400, str(e)
+            live = {k: v for k, v in changed.items() if k in LIVE_SETTINGS}
+            pending = {k: v for k, v in changed.items() if k not in live}
+            self.brightness = live.get("brightness", self.brightness)
+            restart = bool(changed) and "restart=1" in line
+            if restart:
+                self.restarts += 1
+            return 200, {
+                "changed": live,
+                "pending_restart": pending,
+                "unknown": unknown,
+                "restart": restart,
+            }
+        return 404, "Not Found"
+
+    async def handle(self, reader, writer):
+        self.requests += 1
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for header in head.split(b"\r\n"):
+                name, _, value = header.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            body = await reader.readexactly(length)
+
+            if self.fault == "dead":
+                await reader.read()  # Never answers, until the client gives up
+                return
+            if self.fault == "flaky" and self.rng.random() < FLAKY_DROP:
+                return  # Closed without a reply
+            delay = SLOW_MS if self.fault == "slow" else LATENCY_MS
+            await asyncio.sleep(self.rng.uniform(*delay) / 1000)
+
+            status, payload = self.route(head.decode(), body)
+            if status == 200:
+                reply = http_reply(200, "OK", json.dumps(payload))
+            else:
+                reply = http_reply(status, "Error", payload)
+            writer.write(reply)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def http_reply(status, reason, body):
+    return (
+        f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+        f"Connection: close\r\n\r\n{body}"
+    ).encode()
+
+
+class Responder(asyncio.DatagramProtocol):
+    """Answers discovery probes for every simulated box"""
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if data != constants.DISCOVERY_PROBE:
+            return
+        for box in self.boxes:
+            hello = {"hostname": box.hostname, "team": "MIN", "port": box.port}
+            self.transport.sendto(json.dumps(hello).encode(), addr)
+
+
+def faults(count, slow, flaky, dead, rng):
+    kinds = ["dead"] * dead
+    kinds += ["slow"] * int(count * slow) + ["flaky"] * int(count * flaky)
+    kinds += [None] * max(0, count - len(kinds))
+    rng.shuffle(kinds)
+    return kinds[:count]
+
+
+def report(label, results, wall, parallel):
+    print(f"{label}: {fleet.summarize(results, wall, parallel)}")
+
+
+async def timed_fan_out(boxes, request, parallel, retries=fleet.DEFAULT_RETRIES):
+    start = time.perf_counter()
+    results = await fleet.fan_out(boxes, request, parallel, retries, TIMEOUT_SEC)
+    return results, time.perf_counter() - start
+
+
+async def simulate(args):
+    rng = random.Random(1)
+    boxes = [
+        SimBox(i, fault, random.Random(i))
+        for i, fault in enumerate(
+            faults(args.boxes, args.slow, args.flaky, args.dead, rng)
+        )
+    ]
+    for box in boxes:
+        await box.start()
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: Responder(boxes), local_addr=("127.0.0.1", 0)
+    )
+    probe_port = transport.get_extra_info("sockname")[1]
+    counts = {kind: sum(b.fault == kind for b in boxes) for kind in FAULTS}
+    print(
+        f"{len(boxes)} simulated boxes: "
+        + ", ".join(f"{n} {kind}" for kind, n in counts.items())
+    )
+
+    problems = []
+    try:
+        found = await fleet.discover("127.0.0.1", probe_port, wait=0.3)
+        print(f"Discovery: {len(found)} of {len(boxes)} boxes answered")
+        if len(found) != len(boxes):
+            problems.append("discovery missed boxes")
+        found.sort(key=lambda b: b.hostname)
+
+        parallel = fleet.DEFAULT_PARALLEL
+        results, wall = await timed_fan_out(found, fleet.get_status, parallel)
+        report("status", results, wall, parallel)
+        results, wall = await timed_fan_out(found, fleet.get_config, parallel)
+        report("config", results, wall, parallel)
+        if any("password" in r["value"]["wifi"] for r in results if r["ok"]):
+            problems.append("config.json leaked a Wi-Fi password")
+        if any("key" in r["value"]["hub"] for r in results if r["ok"]):
+            problems.append("config.json leaked the hub key")
+
+        settings = fleet.parse_settings(
+            ["brightness=30", "schedule_sleep=false", "colour=blue"]
+        )
+        request = fleet.set_settings(settings)
+        results, wall = await timed_fan_out(found, request, parallel)
+        report("set", results, wall, parallel)
+
+        # Every box that answered took the settings, only the dead ones didn't;
+        # brightness at once, the schedule sleep after a restart
+        by_name = {box.hostname: box for box in boxes}
+        for result in results:
+            box = by_name[result["box"].hostname]
+            applied = box.config["device"]["brightness"] == 30
+            if result["ok"] and not applied:
+                problems.append(f"{box.hostname} answered but kept its brightness")
+            if result["ok"] and (
+                result["value"]["changed"] != {"brightness": 30}
+                or result["value"]["pending_restart"] != {"schedule_sleep": False}
+            ):
+                problems.append(f"{box.hostname} misreported what it applied")
+            if result["ok"] and result["value"]["unknown"] != ["colour"]:
+                problems.append(f"{box.hostname} didn't report the unknown setting")
+            gave_up = result["attempts"] > fleet.DEFAULT_RETRIES
+            if not result["ok"] and box.fault != "dead" and not gave_up:
+                error = result["error"]
+                problems.append(f"{box.hostname} ({box.fault}) failed: {error}")
+            if box.restarts:
+                problems.append(f"{box.hostname} restarted without --restart")
+        applied = sum(b.config["device"]["brightness"] == 30 for b in boxes)
+        shown = sum(b.brightness == 30 for b in boxes)
+        print(f"Applied on {applied} of {len(boxes)} boxes, {shown} showing it")
+
+        # A bad value is refused by every box (not retried), nothing saved
+        settings = fleet.parse_settings(["brightness=abc", "sleep_mode=deep"])
+        request = fleet.set_settings(settings)
+        results, wall = await timed_fan_out(found, request, parallel)
+        report("set bad value", results, wall, parallel)
+        for result in results:
+            box = by_name[result["box"].hostname]
+            if result["ok"]:
+                problems.append(f"{box.hostname} took brightness=abc")
+            elif box.fault is None and result["attempts"] != 1:
+                problems.append(f"{box.hostname} retried a refused setting")
+            if box.config["device"]["sleep_mode"] == "deep":
+                problems.append(f"{box.hostname} saved part of a refused request")
+
+        # The dead boxes only add their timeout; leave them out to compare
+        # the parallel limits on the boxes that answer
+        alive = [b for b in found if by_name[b.hostname].fault != "dead"]
+        print()
+        print(f"status of {len(alive)} live boxes by parallel limit:")
+        for parallel in PARALLEL_LEVELS:
+            results, wall = await timed_fan_out(alive, fleet.get_status, parallel)
+            report(f"    {parallel:>3}", results, wall, parallel)
+    finally:
+        transport.close()
+        for box in boxes:
+            box.server.close()
+
+    if problems:
+        print()
+        print(f"{len(problems)} problems:")
+        for problem in problems:
+            print(f"    {problem}")
+    else:
+        print("All checks passed")
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--boxes", type=int, default=200)
+    parser.add_argument("--slow", type=float, default=0.1, help="share of boxes")
+    parser.add_argument("--flaky", type=float, default=0.1, help="share of boxes")
+    parser.add_argument("--dead", type=int, default=2, help="number of boxes")
+    args = parser.parse_args()
+    return asyncio.run(simulate(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
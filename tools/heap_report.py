@@ -0,0 +1,113 @@
+"""
+Heap report for the firmware modules, simulated on the host with CPython
+Imports each module under heap_profile (backed by tracemalloc here),
+renders the config page templates and, given a recorded play-by-play
+feed, replays polls through the tracker:
+
+    python tools/heap_report.py [pbp.json] [TEAM] [POLLS]
+
+The MicroPython-only modules (machine, network, neopixel, esp32,
+urequests) are replaced by empty stand-ins, so the modules using them
+import here; the urequests line itself measures only the stand-in.
+The standard library and the firmware modules most others import are
+loaded before profiling starts, so each import line holds that module
+alone rather than the first importer's share of the common code.
+CPython objects are larger than MicroPython's, so compare
+sections against each other rather than against the ESP32 heap size;
+on the device set "heap_profile": true and read GET /heap instead.
+"""
+
+import binascii
+import io
+import json
+import os
+import sys
+import types
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+import constants  # noqa: E402
+import heap_profile  # noqa: E402
+import log  # noqa: E402
+
+TEMPLATES = ("device_config.html", "wifi_config.html")
+STUBS = ("machine", "network", "neopixel", "esp32", "urequests")
+# Imported by many of the profiled modules; loaded before profiling
+SHARED = (
+    "_thread",
+    "errno",
+    "hashlib",
+    "random",
+    "select",
+    "socket",
+    "struct",
+    "utils",
+    "config",
+)
+
+
+def install_stubs():
+    """Empty stand-ins for the MicroPython modules; used only at run time"""
+    for name in STUBS:
+        sys.modules.setdefault(name, types.ModuleType(name))
+    sys.modules.setdefault("ubinascii", binascii)
+
+
+def warm_up():
+    for name in SHARED:
+        __import__(name)
+
+
+def render_templates():
+    from template_loader import render_template
+
+    for name in TEMPLATES:
+        with open(os.path.join(ROOT, "www", name)) as f:
+            template = f.read()
+        with heap_profile.section(f"render {name}"):
+            render_template(
+                template,
+                DEVICE_CODE="ABCD",
+                SSID="HomeNetwork",
+                PASSWORD="secret",
+                HOSTNAME="wildsensor",
+                TEAM="MIN",
+                POLL=10,
+                BRIGHTNESS=50,
+            )
+
+
+def replay_polls(path, team, polls):
+    from play_by_play import PlayByPlayTracker
+
+    with open(path, "rb") as f:
+        doc = json.load(f)
+    team = team or doc["homeTeam"]["abbrev"]
+    plays = doc["plays"]
+    tracker = PlayByPlayTracker(doc["id"], team)
+    for poll in range(1, polls + 1):
+        partial = dict(doc)
+        partial["plays"] = plays[: len(plays) * poll // polls]
+        stream = io.BytesIO(json.dumps(partial, separators=(",", ":")).encode())
+        with heap_profile.section("http play-by-play"):
+            tracker.consume(stream.read)
+
+
+def main():
+    install_stubs()
+    warm_up()
+    heap_profile.enable()
+    heap_profile.profile_imports(constants.HEAP_PROFILE_MODULES)
+    render_templates()
+    if len(sys.argv) > 1:
+        team = sys.argv[2] if len(sys.argv) > 2 else None
+        polls = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+        replay_polls(sys.argv[1], team, polls)
+    heap_profile.report()
+    log.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Simulate several hub-mode devices on localhost
+Runs on the host with CPython:
+
+    python tools/hub_sim.py --devices 8 --seconds 40
+
+Every simulated box runs the same ScoreHub election as the firmware.
+The hub is killed halfway through to show a follower taking over.
+Reports API requests made versus every box polling on its own, and
+the CPU time each box spent on hub work.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hub import ScoreHub  # noqa: E402
+
+
+class SimDevice:
+    def __init__(self, rank, key, timeout_sec):
+        self.hub = ScoreHub("MIN", key, rank=rank, iface="127.0.0.1", timeout_sec=timeout_sec)
+        self.alive = True
+        self.requests = 0
+        self.cpu = 0.0
+        self.score = (0, 0)
+
+    def step(self, poll_due, api_score):
+        start = time.process_time()
+        shared = self.hub.update()
+        if shared:
+            self.score = shared[:2]
+        if poll_due and self.hub.is_hub:
+            self.requests += 1
+            self.score = api_score
+            self.hub.publish(api_score[0], api_score[1], 2024020001)
+        self.cpu += time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--devices", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=40)
+    parser.add_argument("--poll", type=float, default=1.0, help="poll interval")
+    parser.add_argument("--timeout", type=float, default=2.0, help="hub timeout")
+    args = parser.parse_args()
+
+    devices = [SimDevice(rank, "sim-key", args.timeout) for rank in range(args.devices)]
+    start = time.monotonic()
+    next_poll = start
+    polls = 0
+    killed_at = None
+    takeover_at = None
+    api_score = (0, 0)
+
+    while time.monotonic() - start < args.seconds:
+        now = time.monotonic()
+        poll_due = now >= next_poll
+        if poll_due:
+            polls += 1
+            next_poll = now + args.poll
+            if polls % 5 == 0:
+                api_score = (api_score[0] + 1, api_score[1])
+
+        for device in devices:
+            if device.alive:
+                device.step(poll_due, api_score)
+
+        hubs = [d for d in devices if d.alive and d.hub.is_hub]
+        if killed_at is None and now - start > args.seconds / 2 and hubs:
+            victim = hubs[0]
+            victim.alive = False
+            victim.hub.close()
+            killed_at = now
+            print(f"t={now - start:5.1f}s killed hub rank {victim.hub.rank}")
+        elif killed_at and takeover_at is None and hubs:
+            takeover_at = now
+            print(f"t={now - start:5.1f}s rank {hubs[0].hub.rank} took over")
+
+        time.sleep(0.02)
+
+    total = sum(d.requests for d in devices)
+    baseline = polls * args.devices
+    print(f"\n{'rank':>4} {'requests':>8} {'cpu ms':>8} score")
+    for d in devices:
+        print(f"{d.hub.rank:>4} {d.requests:>8} {d.cpu * 1000:>8.1f} {d.score}")
+    print(f"\nAPI requests: {total} with hub mode vs {baseline} polling independently")
+    if takeover_at:
+        print(f"Failover took {takeover_at - killed_at:.1f}s")
+    in_sync = sum(1 for d in devices if d.alive and d.score == api_score)
+    print(f"Boxes showing the latest score: {in_sync}/{sum(d.alive for d in devices)}")
+
+
+if __name__ == "__main__":
+    main()
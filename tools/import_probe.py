@@ -0,0 +1,58 @@
+"""
+Device-side import probe, run by tools/build_mpy.py --compare through
+mpremote. Imports each firmware module in turn and prints one JSON line
+per module with the import time, the heap it keeps and the transient
+heap it needed (compiling .py source shows up here). Works the same for
+source and .mpy deployments.
+"""
+
+import gc
+import json
+import time
+
+import constants
+
+gc.collect()
+start_alloc = gc.mem_alloc()
+peak = start_alloc
+total_us = 0
+
+for name in constants.HEAP_PROFILE_MODULES:
+    gc.collect()
+    before = gc.mem_alloc()
+    t0 = time.ticks_us()
+    try:
+        __import__(name)
+    except ImportError as e:
+        print("PROBE " + json.dumps({"module": name, "error": str(e)}))
+        continue
+    elapsed = time.ticks_diff(time.ticks_us(), t0)
+    high = gc.mem_alloc()  # before collecting: includes compiler garbage
+    gc.collect()
+    kept = gc.mem_alloc() - before
+    peak = max(peak, high)
+    total_us += elapsed
+    print(
+        "PROBE "
+        + json.dumps(
+            {
+                "module": name,
+                "ms": elapsed / 1000,
+                "kept": kept,
+                "transient": high - before,
+            }
+        )
+    )
+
+gc.collect()
+print(
+    "PROBE "
+    + json.dumps(
+        {
+            "module": "total",
+            "ms": total_us / 1000,
+            "kept": gc.mem_alloc() - start_alloc,
+            "transient": peak - start_alloc,
+        }
+    )
+)
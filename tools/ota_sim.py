@@ -0,0 +1,174 @@
+"""
+Exercise the OTA updater against a local HTTP stand-in
+Runs on the host with CPython. Serves a release built by
+tools/build_mpy.py, fakes a device filesystem in a temporary directory
+that is one edit behind, then runs an update, a rollback and a confirmed
+update, reporting what was transferred. Last, it cuts updates short
+partway through swapping the files in, as a reset would, and checks
+that the next boot puts the old files back:
+
+    python tools/build_mpy.py
+    python tools/ota_sim.py [build/mpy]
+"""
+
+import functools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import urllib.request
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import constants  # noqa: E402
+import log  # noqa: E402
+import ota  # noqa: E402
+
+
+class CountingHandler(SimpleHTTPRequestHandler):
+    served = 0
+    requests = 0
+
+    def copyfile(self, source, outputfile):
+        data = source.read()
+        CountingHandler.served += len(data)
+        CountingHandler.requests += 1
+        outputfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class HostResponse:
+    """urequests-style response on top of urllib"""
+
+    def __init__(self, url):
+        self.raw = urllib.request.urlopen(url)
+
+    def close(self):
+        self.raw.close()
+
+
+class PowerCut(Exception):
+    pass
+
+
+def snapshot(path):
+    return {name: ota.file_hash(name) for name in sorted(os.listdir(path))}
+
+
+def fall_behind():
+    """
+    Put the device one release behind: one module differs, one template
+    is missing and an old module is lying around
+    """
+    modules = sorted(n for n in os.listdir(".") if n.endswith((".py", ".mpy")))
+    with open(modules[1], "ab") as f:
+        f.write(b"\0old")
+    os.remove("www/wifi_saved.html")
+    with open("retired_module.py", "w") as f:
+        f.write("# removed upstream\n")
+
+
+def cut_swap(url, renames):
+    """
+    Update, losing power after the given number of renames, then boot.
+    Returns True if the boot restored the files from before the update.
+    """
+    ota.update(url, open_url=HostResponse)  # Back to the release first
+    ota.confirm()
+    fall_behind()
+    before = snapshot(".")
+    real_rename = os.rename
+    done = []
+
+    def rename(src, dst):
+        if len(done) == renames:
+            raise PowerCut()
+        done.append(src)
+        real_rename(src, dst)
+
+    os.rename = rename
+    try:
+        ota.update(url, open_url=HostResponse)
+    except PowerCut:
+        pass
+    finally:
+        os.rename = real_rename
+    rolled_back = ota.check_pending()
+    return rolled_back and snapshot(".") == before
+
+
+def main():
+    release = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else "build/mpy")
+    if not os.path.exists(os.path.join(release, constants.OTA_MANIFEST)):
+        print(f"No {constants.OTA_MANIFEST} in {release}, run tools/build_mpy.py")
+        return 1
+
+    handler = functools.partial(CountingHandler, directory=release)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+
+    device = tempfile.mkdtemp(prefix="ota-device-")
+    shutil.copytree(release, device, dirs_exist_ok=True)
+    os.chdir(device)
+
+    fall_behind()
+    before = snapshot(".")
+    release_size = sum(
+        os.path.getsize(os.path.join(base, name))
+        for base, _, names in os.walk(release)
+        for name in names
+    )
+
+    print(f"Release {release_size} bytes, serving at {url}")
+    feeds = []
+    files, fetched = ota.update(
+        url, open_url=HostResponse, progress=lambda: feeds.append(1)
+    )
+    print(
+        f"Update: {files} files changed, {fetched} bytes of files fetched, "
+        f"{CountingHandler.served} bytes served in {CountingHandler.requests} "
+        "requests (manifest included)"
+    )
+    print(f"Watchdog fed {len(feeds)} times during the update")
+
+    state = ota.load_state()
+    print(f"Pending: {state}")
+    with open(constants.OTA_MANIFEST) as f:
+        manifest = json.load(f)
+    if ota.plan(manifest) != ([], []):
+        print("FAIL: device does not match the manifest after the update")
+        return 1
+
+    # New code never reached the main loop: the next boot rolls back
+    state["boots"] = 1
+    ota.save_state(state)
+    ota.check_pending()
+    restored = snapshot(".") == before and not os.path.exists("www/wifi_saved.html")
+    print(f"Rollback restored the previous files: {restored}")
+
+    # Update again and let it reach the loop this time
+    ota.update(url, open_url=HostResponse)
+    ota.confirm()
+    leftovers = [n for n in os.listdir(".") if n.endswith((ota.BAK_SUFFIX, ".new"))]
+    print(f"Confirmed, leftover backups: {leftovers or 'none'}")
+
+    # The swap renames the changed module twice, the added template once
+    # and the retired module once
+    cuts = {renames: cut_swap(url, renames) for renames in range(4)}
+    print(f"Reset partway through the swap, rolled back after n renames: {cuts}")
+
+    log.flush()
+    server.shutdown()
+    shutil.rmtree(device)
+    return 0 if restored and not leftovers and all(cuts.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Conformance and benchmark harness for the score providers
+Runs on the host with CPython. Every provider_<name>.py is checked against
+a recorded payload for its league:
+
+    python tools/provider_check.py
+    python tools/provider_check.py --payload nhl=now.json --payload nba=today.json
+
+Conformance: the provider declares the interface score_feed.py documents,
+and its streaming extractor finds the same games as a json.loads reference.
+This holds for every team, for a few network chunk sizes, and when only
+one team is tracked (the early exit). The mock provider is also polled
+from a file. The benchmark reports import heap, parse time, peak
+allocation and bytes read, each for the last team in the feed and for
+every team.
+
+tools/payloads/ has samples shaped like each league's feed. Record fresh
+ones with curl (see provider_*.py for the URLs) to check against the
+live formats.
+"""
+
+import argparse
+import gc
+import importlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import constants  # noqa: E402
+import score_feed  # noqa: E402
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(__file__), "payloads")
+CHUNK_SIZES = (7, 64, 256, 1000)
+REPEATS = 20
+INTERFACE = {
+    "NAME": str,
+    "URL": str,
+    "POLL_INTERVAL": int,
+    "PLAY_BY_PLAY": bool,
+    "SCHEDULE": bool,
+}
+
+
+def nhl_reference(doc):
+    for game in doc["games"]:
+        away, home = game["awayTeam"], game["homeTeam"]
+        yield game["id"], game["gameState"], away, home, "abbrev"
+
+
+def nba_reference(doc):
+    for game in doc["scoreboard"]["games"]:
+        away, home = game["awayTeam"], game["homeTeam"]
+        yield int(game["gameId"]), game["gameStatusText"], away, home, "teamTricode"
+
+
+def mlb_reference(doc):
+    from provider_mlb import ABBREVS
+
+    for date in doc["dates"]:
+        for game in date["games"]:
+            away, home = game["teams"]["away"], game["teams"]["home"]
+            for side in (away, home):
+                side["abbrev"] = ABBREVS.get(side["team"]["id"])
+            state = game["status"]["abstractGameState"]
+            yield game["gamePk"], state, away, home, "abbrev"
+
+
+# provider: (sample payload, reference extractor)
+PROVIDERS = {
+    "nhl": ("nhl_score_now.json", nhl_reference),
+    "nba": ("nba_scoreboard.json", nba_reference),
+    "mlb": ("mlb_schedule.json", mlb_reference),
+    "mock": ("nhl_score_now.json", nhl_reference),
+}
+
+
+def reference_games(payload, extract):
+    """{team: game} built with json.loads, in the ScoreFeed game format"""
+    games = {}
+    for game_id, state, away, home, key in extract(json.loads(payload)):
+        game = {
+            "game_id": game_id,
+            "state": state,
+            "away": away[key],
+            "home": home[key],
+            "away_score": away.get("score", 0),
+            "home_score": home.get("score", 0),
+        }
+        for team in (game["away"], game["home"]):
+            games.setdefault(team, game)
+    return games
+
+
+def consume(provider, payload, chunk=constants.NETWORK_CHUNK_SIZE):
+    stream = io.BytesIO(payload)
+    found = provider.consume(lambda _: stream.read(chunk))
+    return found, stream.tell()
+
+
+def import_heap(name):
+    """Bytes kept by importing provider_<name> (and what it pulls in)"""
+    module = f"provider_{name}"
+    for loaded in (module, "provider_nhl"):
+        sys.modules.pop(loaded, None)
+    gc.collect()
+    tracemalloc.start()
+    importlib.import_module(module)
+    gc.collect()
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept
+
+
+def check_interface(provider):
+    problems = []
+    for attr, kind in INTERFACE.items():
+        if not isinstance(getattr(provider, attr, None), kind):
+            problems.append(f"{attr} is not a {kind.__name__}")
+    for attr in ("GAME_START", "AWAY_KEY", "HOME_KEY", "GAME_STATE_KEY"):
+        if not isinstance(getattr(provider, attr, None), bytes):
+            problems.append(f"{attr} is not set")
+    if provider.POLL_INTERVAL <= 0:
+        problems.append("POLL_INTERVAL must be positive")
+    return problems
+
+
+def check_games(name, payload, expected):
+    """Compare the streaming extractor with the reference in every setup"""
+    problems = []
+    teams = list(expected)
+    for chunk in CHUNK_SIZES:
+        found, _ = consume(score_feed.load_provider(name, teams), payload, chunk)
+        if found != expected:
+            missing = sorted(set(expected) ^ set(found))
+            wrong = sorted(t for t in found if found[t] != expected.get(t))
+            problems.append(f"chunk {chunk}: missing {missing}, wrong {wrong}")
+    for team in teams:
+        found, _ = consume(score_feed.load_provider(name, [team]), payload)
+        if found != {team: expected[team]}:
+            problems.append(f"tracking only {team}: got {found}")
+    return problems
+
+
+def check_mock_poll(payload, expected):
+    """The mock reads its document from flash on every poll"""
+    device = tempfile.mkdtemp(prefix="mock-provider-")
+    cwd = os.getcwd()
+    os.chdir(device)
+    try:
+        with open(constants.MOCK_SCORE_FILE, "wb") as f:
+            f.write(payload)
+        found = score_feed.load_provider("mock", list(expected)).poll()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(device)
+    return [] if found == expected else ["poll() from the mock file differs"]
+
+
+def benchmark(name, payload, teams):
+    provider = score_feed.load_provider(name, teams)
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        _, read = consume(provider, payload)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    consume(provider, payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--payload",
+        action="append",
+        default=[],
+        metavar="NAME=PATH",
+        help="recorded payload for a provider instead of the sample",
+    )
+    args = parser.parse_args()
+    paths = {n: os.path.join(PAYLOAD_DIR, f) for n, (f, _) in PROVIDERS.items()}
+    for item in args.payload:
+        name, _, path = item.partition("=")
+        paths[name] = path
+
+    failures = 0
+    rows = []
+    for name, (_, extract) in PROVIDERS.items():
+        with open(paths[name], "rb") as f:
+            payload = f.read()
+        expected = reference_games(payload, extract)
+        heap = import_heap(name)
+        provider = score_feed.load_provider(name, list(expected))
+
+        problems = check_interface(provider) + check_games(name, payload, expected)
+        if name == "mock":
+            problems += check_mock_poll(payload, expected)
+        status = "ok" if not problems else f"{len(problems)} FAILED"
+        print(f"{name}: {provider.NAME} {len(expected)} teams, conformance {status}")
+        for problem in problems:
+            print(f"    {problem}")
+        failures += len(problems)
+
+        last = [list(expected)[-1]]
+        for label, teams in (("last team", last), ("all teams", list(expected))):
+            ms, peak, read = benchmark(name, payload, teams)
+            rows.append((name, label, heap, ms, peak, read, len(payload)))
+
+    print()
+    print(
+        f"{'provider':<8} {'tracking':<10} {'import KB':>9} {'ms':>6} "
+        f"{'peak KB':>8} {'read KB':>8} {'feed KB':>8}"
+    )
+    for name, label, heap, ms, peak, read, size in rows:
+        print(
+            f"{name:<8} {label:<10} {heap / 1024:>9.1f} {ms:>6.2f} "
+            f"{peak / 1024:>8.1f} {read / 1024:>8.1f} {size / 1024:>8.1f}"
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
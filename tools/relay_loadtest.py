@@ -0,0 +1,106 @@
+"""
+Load test the score relay with many simulated boxes
+Runs on the host with CPython:
+
+    python tools/score_relay.py --fixture recorded_score_now.json &
+    python tools/relay_loadtest.py --clients 2000 --seconds 10
+
+Each simulated client repeatedly connects, asks for a team's record and
+validates the reply, like a box polling as fast as the relay allows.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import constants  # noqa: E402
+from relay_record import RECORD_SIZE, unpack_record  # noqa: E402
+
+
+async def tcp_request(host, port, team):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(team.encode() + b"\n")
+        await writer.drain()
+        return await reader.readexactly(RECORD_SIZE)
+    finally:
+        writer.close()
+
+
+async def http_request(host, port, team):
+    reader, writer = await asyncio.open_connection(host, port + 1)
+    try:
+        writer.write(f"GET /team/{team} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        return response.split(b"\r\n\r\n", 1)[-1]
+    finally:
+        writer.close()
+
+
+async def client(args, teams, index, deadline, latencies, errors):
+    request = http_request if args.http else tcp_request
+    team = teams[index % len(teams)]
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            record = unpack_record(await request(args.host, args.port, team))
+            if record is None:
+                errors["invalid"] = errors.get("invalid", 0) + 1
+                continue
+        except (OSError, asyncio.IncompleteReadError) as e:
+            name = type(e).__name__
+            errors[name] = errors.get(name, 0) + 1
+            await asyncio.sleep(0.05)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if args.interval:
+            await asyncio.sleep(args.interval)
+
+
+async def run(args):
+    teams = args.teams.split(",")
+    latencies = []
+    errors = {}
+    deadline = time.monotonic() + args.seconds
+    start = time.monotonic()
+    await asyncio.gather(
+        *(
+            client(args, teams, i, deadline, latencies, errors)
+            for i in range(args.clients)
+        )
+    )
+    elapsed = time.monotonic() - start
+
+    latencies.sort()
+    count = len(latencies)
+    print(f"Clients: {args.clients} ({'HTTP' if args.http else 'TCP'})")
+    print(f"Requests: {count} in {elapsed:.1f}s = {count / elapsed:.0f}/s")
+    if count:
+        for label, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            print(f"Latency {label}: {latencies[int(q * (count - 1))] * 1000:.1f} ms")
+    print(f"Bytes per reply: {RECORD_SIZE}")
+    print(f"Errors: {errors or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ScoreBox relay load test")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=constants.RELAY_PORT)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument(
+        "--interval", type=float, default=0, help="pause between requests per client"
+    )
+    parser.add_argument("--teams", default="MIN,CHI,DAL,COL,WPG,NSH,STL,UTA")
+    parser.add_argument("--http", action="store_true", help="use the HTTP endpoint")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Render LED effects into the binary format played by effect_player.py
+Runs on the host with CPython:
+
+    python tools/render_effect.py chase --leds 96 --color 0,255,0 -o goal_ours.fx
+    python tools/render_effect.py sparkle --leds 96 --color 255,0,0 -o goal_theirs.fx
+    mpremote cp goal_ours.fx :effects/goal_ours.fx
+
+Effects: chase (team colour runs down the strip with a fading tail),
+sparkle (random twinkles), wipe (colours wipe in turn) and pulse (the
+classic fade in and out). Frames are rendered at --brightness percent;
+the device's power budget still applies on top.
+"""
+
+import argparse
+import math
+import os
+import random
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from effect_player import HEADER_FORMAT, EFFECT_MAGIC, EFFECT_VERSION  # noqa: E402
+
+MAX_HOLD = 255
+
+
+def chase(leds, frames, colors, tail=8):
+    color = colors[0]
+    for f in range(frames):
+        head = f % (leds + tail)
+        frame = [(0, 0, 0)] * leds
+        for t in range(tail):
+            i = head - t
+            if 0 <= i < leds:
+                level = (tail - t) / tail
+                frame[i] = tuple(int(c * level) for c in color)
+        yield frame
+
+
+def sparkle(leds, frames, colors, density=0.08, seed=1):
+    rng = random.Random(seed)
+    levels = [0.0] * leds
+    for _ in range(frames):
+        levels = [max(0.0, v - 0.2) for v in levels]
+        for _ in range(int(leds * density)):
+            levels[rng.randrange(leds)] = 1.0
+        color = colors[0]
+        yield [tuple(int(c * v) for c in color) for v in levels]
+
+
+def wipe(leds, frames, colors):
+    per_color = max(1, frames // len(colors))
+    for f in range(frames):
+        color = colors[(f // per_color) % len(colors)]
+        previous = colors[(f // per_color - 1) % len(colors)]
+        edge = leds * (f % per_color + 1) // per_color
+        yield [color] * edge + [previous] * (leds - edge)
+
+
+def pulse(leds, frames, colors, period=30):
+    color = colors[0]
+    for f in range(frames):
+        level = (1 - math.cos(2 * math.pi * f / period)) / 2
+        yield [tuple(int(c * level) for c in color)] * leds
+
+
+EFFECTS = {"chase": chase, "sparkle": sparkle, "wipe": wipe, "pulse": pulse}
+
+
+def encode(frame, brightness):
+    """One frame as GRB bytes, the NeoPixel buffer order"""
+    out = bytearray(len(frame) * 3)
+    for i, (r, g, b) in enumerate(frame):
+        out[3 * i] = g * brightness // 100
+        out[3 * i + 1] = r * brightness // 100
+        out[3 * i + 2] = b * brightness // 100
+    return bytes(out)
+
+
+def write_effect(path, leds, fps, frames, brightness=100):
+    """Write frames, merging identical neighbours; returns the record count"""
+    records = []
+    for frame in frames:
+        data = encode(frame, brightness)
+        if records and records[-1][1] == data and records[-1][0] < MAX_HOLD:
+            records[-1][0] += 1
+        else:
+            records.append([1, data])
+
+    with open(path, "wb") as f:
+        f.write(
+            struct.pack(
+                HEADER_FORMAT, EFFECT_MAGIC, EFFECT_VERSION, 0, leds, len(records), fps
+            )
+        )
+        for hold, data in records:
+            f.write(bytes([hold]))
+            f.write(data)
+    return len(records)
+
+
+def parse_color(text):
+    return tuple(int(part) for part in text.split(","))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("effect", choices=sorted(EFFECTS))
+    parser.add_argument("--leds", type=int, default=96)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument(
+        "--color",
+        action="append",
+        type=parse_color,
+        help="r,g,b; repeat for effects that use several colours",
+    )
+    parser.add_argument("--brightness", type=int, default=100, help="percent")
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    colors = args.color or [(0, 255, 0)]
+    frames = int(args.seconds * args.fps)
+    generated = EFFECTS[args.effect](args.leds, frames, colors)
+    records = write_effect(
+        args.output, args.leds, args.fps, generated, args.brightness
+    )
+    size = os.path.getsize(args.output)
+    print(f"{args.output}: {frames} frames in {records} records, {size} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
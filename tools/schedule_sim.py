@@ -0,0 +1,181 @@
+"""
+Step a box's schedule sleep through several weeks on a fake clock
+Runs on the host with CPython. A fake club-schedule feed answers each
+fetch with that week's games (Monday to Sunday, as week/now does), and
+the box runs the main loop's check: refresh when needs_refresh() says
+so, then deep-sleep for sleep_seconds() or stay awake another check.
+
+    python tools/schedule_sim.py [--weeks 6] [--retry 3600] [--teams 1]
+
+Reports fetches, wakes and games slept through. The box starts on a
+Sunday evening before the week's last game, which runs past midnight;
+from then on the cached week holds nothing upcoming, and the Monday game
+is only found by fetching again. --retry 86400 waits a full day for that
+fetch, as the schedule did before SCHEDULE_RETRY_SEC. With --teams, each
+further tracked team plays a day after the one before it, and the box has
+to wake for all of their games.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import constants  # noqa: E402
+from game_schedule import (  # noqa: E402
+    GameSchedule,
+    combined_sleep_seconds,
+    utc_to_seconds,
+)
+
+FIRST_MONDAY = "2024-10-07T00:00:00Z"
+START_OFFSET_SEC = 6 * 86400 + 20 * 3600  # Sunday 20:00 UTC, first week
+GAME_HOUR_UTC = 23  # 7 pm Eastern
+GAME_GAPS = (2, 2, 2, 1, 2, 3, 2)  # days between games, cycled
+TEAMS = ("MIN", "WPG", "DAL", "COL")
+
+
+class FeedResponse:
+    """urequests-style response holding one fake feed"""
+
+    def __init__(self, body):
+        self.status_code = 200
+        self.body = body
+        self.pos = 0
+        self.raw = self
+
+    def read(self, size):
+        chunk = self.body[self.pos : self.pos + size]
+        self.pos += len(chunk)
+        return chunk
+
+    def close(self):
+        pass
+
+
+class FakeFeed:
+    """The week/now schedule of a team, as of the fake clock"""
+
+    def __init__(self, team, games, clock):
+        self.team = team
+        self.games = games
+        self.clock = clock
+        self.fetches = 0
+
+    def week_games(self):
+        monday = utc_to_seconds(FIRST_MONDAY)
+        week_start = monday + (self.clock() - monday) // (7 * 86400) * 7 * 86400
+        return [g for g in self.games if week_start <= g < week_start + 7 * 86400]
+
+    def __call__(self, url):
+        self.fetches += 1
+        games = []
+        for start in self.week_games():
+            text = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start))
+            games.append(
+                {
+                    "id": 2024020000 + start // 86400 % 10000,
+                    "season": 20242025,
+                    "gameType": 2,
+                    "gameDate": text[:10],
+                    "venue": {"default": "Xcel Energy Center"},
+                    "startTimeUTC": text,
+                    "easternUTCOffset": "-04:00",
+                    "gameState": "FUT",
+                    "homeTeam": {"abbrev": self.team},
+                    "awayTeam": {"abbrev": "CHI"},
+                }
+            )
+        body = {"previousStartDate": "", "nextStartDate": "", "games": games}
+        return FeedResponse(json.dumps(body, separators=(",", ":")).encode())
+
+
+def season(weeks, shift_days=0):
+    """Game start times over the given number of weeks"""
+    start = utc_to_seconds(FIRST_MONDAY) + GAME_HOUR_UTC * 3600
+    start += shift_days * 86400
+    games = []
+    day = 0
+    while day < weeks * 7:
+        games.append(start + day * 86400)
+        day += GAME_GAPS[(len(games) - 1) % len(GAME_GAPS)]
+    return games
+
+
+def simulate(seasons, retry, weeks, work):
+    """
+    Runs the box from the first Sunday evening; returns its counts
+    seasons: team -> game start times
+    """
+    constants.SCHEDULE_RETRY_SEC = retry
+    now = [utc_to_seconds(FIRST_MONDAY) + START_OFFSET_SEC]
+    end = utc_to_seconds(FIRST_MONDAY) + weeks * 7 * 86400
+    clock = lambda: now[0]  # noqa: E731
+    feeds = [FakeFeed(team, games, clock) for team, games in seasons.items()]
+    schedules = [
+        GameSchedule(
+            feed.team,
+            clock=clock,
+            path=os.path.join(work, constants.SCHEDULE_TEAM_FILE.format(feed.team)),
+            open_url=feed,
+        )
+        for feed in feeds
+    ]
+    sleeps = []
+    while now[0] < end:
+        for schedule in schedules:
+            if schedule.needs_refresh():
+                schedule.refresh()
+        seconds = combined_sleep_seconds(schedules)
+        if seconds:
+            sleeps.append((now[0], now[0] + seconds))
+            now[0] += seconds
+        else:
+            now[0] += constants.SCHEDULE_CHECK_SEC
+    first = utc_to_seconds(FIRST_MONDAY) + START_OFFSET_SEC
+    due = sorted(g for games in seasons.values() for g in games if first < g < end)
+    missed = [g for g in due if any(a < g < b for a, b in sleeps)]
+    return {
+        "games": len(due),
+        "missed": missed,
+        "fetches": sum(feed.fetches for feed in feeds),
+        "wakes": len(sleeps),
+        "asleep": sum(b - a for a, b in sleeps) / (end - first),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--weeks", type=int, default=6)
+    parser.add_argument("--retry", type=int, default=constants.SCHEDULE_RETRY_SEC)
+    parser.add_argument("--teams", type=int, default=1, choices=range(1, 5))
+    args = parser.parse_args()
+
+    seasons = {team: season(args.weeks, i) for i, team in enumerate(TEAMS)}
+    seasons = dict(list(seasons.items())[: args.teams])
+    work = tempfile.mkdtemp(prefix="schedule-")
+    try:
+        result = simulate(seasons, args.retry, args.weeks, work)
+    finally:
+        shutil.rmtree(work)
+
+    print(
+        f"{args.weeks} weeks, {', '.join(seasons)}: {result['games']} games, "
+        f"refetch after {args.retry}s while empty: {result['fetches']} fetches, "
+        f"{result['wakes']} deep sleeps, asleep {result['asleep']:.0%} of the time"
+    )
+    for start in result["missed"]:
+        when = time.strftime("%a %Y-%m-%d %H:%M UTC", time.gmtime(start))
+        print(f"    slept through the game on {when}")
+    problems = len(result["missed"])
+    print("All checks passed" if not problems else f"FAILED: {problems} missed")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
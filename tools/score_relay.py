@@ -0,0 +1,211 @@
+"""
+Host-side score relay for installations with a home server
+Runs on the host with CPython:
+
+    python tools/score_relay.py
+    python tools/score_relay.py --fixture recorded_score_now.json
+
+Polls the NHL score/now feed once for every box on the network, keeps
+per-team state and serves each box a fixed-size binary record (see
+relay_record.py):
+
+    TCP:  connect to port 5769, send "MIN\\n", read the record
+    HTTP: GET http://<server>:5770/team/MIN
+
+Point a box at the relay with "relay": "<server>:5769" in the "device"
+section of its config.json.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import constants  # noqa: E402
+from relay_record import (  # noqa: E402
+    pack_record,
+    STATE_NONE,
+    STATE_PRE,
+    STATE_LIVE,
+    STATE_INTERMISSION,
+    STATE_FINAL,
+)
+
+GAME_STATES = {
+    "FUT": STATE_PRE,
+    "PRE": STATE_PRE,
+    "LIVE": STATE_LIVE,
+    "CRIT": STATE_LIVE,
+    "OFF": STATE_FINAL,
+    "FINAL": STATE_FINAL,
+}
+
+
+class RelayState:
+    def __init__(self):
+        self.records = {}
+        self.fields = {}
+        self.sequence = 0
+        self.requests = 0
+        self.polls = 0
+
+    def update(self, feed):
+        """
+        Rebuild per-team records from a score/now document
+        A team that has left the feed (last night's game) is dropped, and
+        boxes asking for it get a STATE_NONE record again.
+        """
+        self.polls += 1
+        records = {}
+        fields_by_team = {}
+        for game in feed.get("games", []):
+            clock = game.get("clock", {})
+            state = GAME_STATES.get(game.get("gameState"), STATE_PRE)
+            if state == STATE_LIVE and clock.get("inIntermission"):
+                state = STATE_INTERMISSION
+
+            away = game.get("awayTeam", {})
+            home = game.get("homeTeam", {})
+            for team, opponent in ((away, home), (home, away)):
+                abbrev = team.get("abbrev")
+                if not abbrev:
+                    continue
+                fields = (
+                    opponent.get("abbrev", "???"),
+                    team.get("score", 0),
+                    opponent.get("score", 0),
+                    state,
+                    game.get("period", 0),
+                    clock.get("secondsRemaining", 0),
+                    game.get("id", 0),
+                )
+                fields_by_team[abbrev] = fields
+                if self.fields.get(abbrev) == fields:
+                    records[abbrev] = self.records[abbrev]
+                    continue
+                # Sequence only moves when something a box would show changes
+                self.sequence += 1
+                records[abbrev] = pack_record(
+                    abbrev, *fields[:6], game_id=fields[6], sequence=self.sequence
+                )
+        self.records = records
+        self.fields = fields_by_team
+
+    def record(self, team):
+        self.requests += 1
+        record = self.records.get(team)
+        if record is None:
+            record = pack_record(team, "???", 0, 0, STATE_NONE, 0, 0, 0, 0)
+        return record
+
+
+def fetch_feed(url):
+    request = urllib.request.Request(url, headers={"User-Agent": "scorebox-relay"})
+    with urllib.request.urlopen(request, timeout=15) as response:
+        return json.load(response)
+
+
+def load_fixture(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+async def poll_loop(state, args):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = time.monotonic()
+        try:
+            if args.fixture:
+                feed = load_fixture(args.fixture)
+            else:
+                feed = await loop.run_in_executor(None, fetch_feed, constants.SCORE_URL)
+            state.update(feed)
+            print(
+                f"Poll {state.polls}: {len(state.records)} teams, "
+                f"sequence {state.sequence}, {state.requests} requests served "
+                f"({time.monotonic() - start:.2f}s)"
+            )
+        except Exception as e:
+            print(f"Poll failed: {e}")
+        await asyncio.sleep(args.interval)
+
+
+def _team_from(text):
+    return text.strip()[:3].upper()
+
+
+async def handle_tcp(state, reader, writer):
+    try:
+        line = await asyncio.wait_for(reader.readline(), constants.RELAY_TIMEOUT_SEC)
+        writer.write(state.record(_team_from(line.decode("ascii", "replace"))))
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def handle_http(state, reader, writer):
+    try:
+        request_line = await asyncio.wait_for(
+            reader.readline(), constants.RELAY_TIMEOUT_SEC
+        )
+        # Drain the headers
+        while (await reader.readline()).strip():
+            pass
+
+        parts = request_line.decode("ascii", "replace").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].startswith("/team/"):
+            body = state.record(_team_from(parts[1][6:]))
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/octet-stream\r\n"
+                b"Content-Length: %d\r\n"
+                b"Connection: close\r\n\r\n" % len(body) + body
+            )
+        else:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(args):
+    state = RelayState()
+    tcp = await asyncio.start_server(
+        lambda r, w: handle_tcp(state, r, w), args.host, args.port, backlog=1024
+    )
+    http = await asyncio.start_server(
+        lambda r, w: handle_http(state, r, w), args.host, args.port + 1, backlog=1024
+    )
+    print(f"Relay serving TCP on {args.host}:{args.port}, HTTP on {args.port + 1}")
+    async with tcp, http:
+        await asyncio.gather(
+            poll_loop(state, args), tcp.serve_forever(), http.serve_forever()
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ScoreBox score relay")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=constants.RELAY_PORT)
+    parser.add_argument(
+        "--interval", type=float, default=constants.DEFAULT_POLL_INTERVAL
+    )
+    parser.add_argument("--fixture", help="serve a recorded score/now JSON file")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
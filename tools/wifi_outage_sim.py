@@ -0,0 +1,188 @@
+"""
+Measure how soon a box in AP mode gets back on Wi-Fi after a router outage
+Runs on the host with CPython, on a fake clock. network, machine and
+neopixel are stood in for: a fake station interface fails every connect
+while the router is down, and associates ASSOCIATE_MS after it is back.
+serve_config_page() runs unchanged, its non-blocking accept loop retrying
+the station on the AP_STA_RETRY_SEC backoff, until the station connects.
+
+    python tools/wifi_outage_sim.py [--outage 30 60 120 300 900] [--verbose]
+
+Reports, per outage length, the failed connects and the time from the
+router coming back to the station reconnecting. That time is bounded by
+the longest backoff step plus one connect timeout.
+"""
+
+import argparse
+import binascii
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import constants  # noqa: E402
+import log  # noqa: E402
+
+ASSOCIATE_MS = 3000  # association and DHCP once the router answers
+OUTAGES_SEC = (30, 60, 120, 300, 900)
+
+
+class FakeClock:
+    """ticks_ms and sleep for wifi_manager; sleeping moves time on"""
+
+    def __init__(self):
+        self.ms = 0
+
+    def module(self):
+        return types.SimpleNamespace(
+            ticks_ms=lambda: self.ms,
+            ticks_add=lambda ticks, delta: ticks + delta,
+            ticks_diff=lambda end, start: end - start,
+            sleep_ms=self.sleep_ms,
+            sleep=lambda sec: self.sleep_ms(int(sec * 1000)),
+            time=lambda: 0,
+        )
+
+    def sleep_ms(self, ms):
+        self.ms += ms
+
+
+class FakeWLAN:
+    """Station or AP interface; the station reaches the router once it's up"""
+
+    def __init__(self, clock, router_up_ms):
+        self.clock = clock
+        self.router_up_ms = router_up_ms
+        self.is_active = False
+        self.connect_at = None
+        self.connects = []  # clock.ms of every connect()
+        self.connected_at = None
+
+    def active(self, value=None):
+        if value is None:
+            return self.is_active
+        self.is_active = value
+        return None
+
+    def config(self, *args, **kwargs):
+        if args == ("mac",):
+            return b"\x24\x0a\xc4\x12\x34\x56"
+        return None
+
+    def ifconfig(self, *args):
+        return ("192.168.4.1", "255.255.255.0", "192.168.4.1", "0.0.0.0")
+
+    def connect(self, ssid, password, bssid=None):
+        self.connect_at = self.clock.ms
+        self.connects.append(self.clock.ms)
+
+    def disconnect(self):
+        self.connect_at = None
+
+    def isconnected(self):
+        if self.connect_at is None:
+            return False
+        up = max(self.connect_at, self.router_up_ms) + ASSOCIATE_MS
+        if self.clock.ms >= up and self.connected_at is None:
+            self.connected_at = self.clock.ms
+        return self.connected_at is not None
+
+
+class QuietSocket:
+    """A listening socket that never has a client waiting"""
+
+    def setsockopt(self, *args):
+        pass
+
+    def bind(self, addr):
+        pass
+
+    def listen(self, backlog):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+    def accept(self):
+        raise OSError(11)  # EAGAIN
+
+    def close(self):
+        pass
+
+
+def install_stubs(clock, router_up_ms):
+    """Stand-ins for the MicroPython modules wifi_manager imports"""
+    sta = FakeWLAN(clock, router_up_ms)
+    ap = FakeWLAN(clock, 0)
+    network = types.ModuleType("network")
+    network.STA_IF, network.AP_IF = 0, 1
+    network.WLAN = lambda interface=0: ap if interface == network.AP_IF else sta
+    sys.modules["network"] = network
+    sys.modules["machine"] = types.ModuleType("machine")
+    sys.modules["machine"].Pin = lambda *args, **kwargs: None
+    sys.modules["neopixel"] = types.ModuleType("neopixel")
+    sys.modules["ubinascii"] = binascii
+    socket = types.ModuleType("socket")
+    socket.SOL_SOCKET, socket.SO_REUSEADDR = 1, 2
+    socket.getaddrinfo = lambda host, port: [(None, None, None, "", (host, port))]
+    socket.socket = QuietSocket
+    return sta, socket
+
+
+class Strip:
+    def fill(self, color):
+        pass
+
+    def write(self):
+        pass
+
+
+def simulate(outage_sec):
+    """One AP-mode stay; returns (failed connects, reconnect ms after outage)"""
+    clock = FakeClock()
+    router_up_ms = outage_sec * 1000
+    sta, socket = install_stubs(clock, router_up_ms)
+    import wifi_manager  # After the stubs it needs
+
+    wifi_manager.time = clock.module()
+    wifi_manager.network = sys.modules["network"]  # This run's interfaces
+    manager = wifi_manager.WiFiManager(led_strip=Strip())
+    real_socket = sys.modules.get("socket")
+    sys.modules["socket"] = socket  # serve_config_page imports it per call
+    try:
+        manager.serve_config_page("rink", "secret")
+    finally:
+        sys.modules["socket"] = real_socket
+    failed = len(sta.connects) - 1
+    return failed, sta.connected_at - router_up_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--outage", type=int, nargs="+", default=OUTAGES_SEC)
+    parser.add_argument("--verbose", action="store_true", help="show the log")
+    args = parser.parse_args()
+    if not args.verbose:
+        log.set_level("error")
+
+    delays = constants.AP_STA_RETRY_SEC
+    bound_ms = (max(delays) + constants.WIFI_CONNECT_TIMEOUT_SEC) * 1000
+    print(
+        f"Backoff {delays} s, connect timeout {constants.WIFI_CONNECT_TIMEOUT_SEC} s, "
+        f"association {ASSOCIATE_MS} ms"
+    )
+    print(f"{'outage s':>9} {'failed':>7} {'back after s':>13}")
+    problems = []
+    for outage in args.outage:
+        failed, recovery_ms = simulate(outage)
+        log.flush()
+        print(f"{outage:>9} {failed:>7} {recovery_ms / 1000:>13.1f}")
+        if not 0 < recovery_ms <= bound_ms + ASSOCIATE_MS:
+            problems.append(f"{outage} s outage: back after {recovery_ms} ms")
+    print("All checks passed" if not problems else f"FAILED: {problems}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
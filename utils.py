@@ -49,3 +49,59 @@ def url_decode_params(body):
             params[key] = value
 
     return params
+
+
+try:
+    from time import ticks_ms, ticks_us, ticks_diff, ticks_add, sleep_ms
+except ImportError:
+    # CPython (host-side simulations): monotonic milliseconds, no wraparound
+    import time as _time
+
+    def ticks_ms():
+        return int(_time.monotonic() * 1000)
+
+    def ticks_us():
+        return int(_time.monotonic() * 1000000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+    def ticks_add(ticks, delta):
+        return ticks + delta
+
+    def sleep_ms(ms):
+        _time.sleep(ms / 1000)
+
+
+class PhaseTimer:
+    """
+    Record how long each named phase of a sequence takes
+
+    Example:
+        >>> timer = PhaseTimer("Wi-Fi connect")
+        >>> timer.mark("scan")
+        >>> timer.report()
+        Wi-Fi connect: scan 812ms (total 812ms)
+    """
+
+    def __init__(self, name, start=None):
+        """start: ticks_ms value the first phase began at (0 = power-on)"""
+        self.name = name
+        self.start = ticks_ms() if start is None else start
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, phase):
+        """Close the current phase under the given name"""
+        now = ticks_ms()
+        self.phases.append((phase, ticks_diff(now, self.last)))
+        self.last = now
+
+    def total_ms(self):
+        return ticks_diff(self.last, self.start)
+
+    def report(self):
+        import log
+
+        parts = ", ".join(f"{phase} {ms}ms" for phase, ms in self.phases)
+        log.info("%s: %s (total %sms)", self.name, parts, self.total_ms())
@@ -0,0 +1,57 @@
+"""
+Hardware watchdog and warm restarts
+The main loop feeds the watchdog on every pass, so a hang anywhere (a
+stalled socket read, a stuck thread lock) resets the box. A crash in the
+loop stashes the live state in RTC memory and resets straight away. The
+boot after either one is a warm boot: main.py takes the score, brightness
+and Wi-Fi link from RTC memory and skips the Wi-Fi scan, DHCP and NTP.
+
+The ESP32 watchdog can't be stopped once armed; set "watchdog": false in
+config.json while working at the REPL.
+"""
+
+import machine
+import constants
+import log
+import rtc_state
+from utils import ticks_ms, ticks_diff
+
+_wdt = None
+_last_stamp = 0
+
+
+def is_warm_boot(state):
+    """True after a crash restart or a watchdog reset, with live state saved"""
+    if not state:
+        return False
+    if state["flags"] & rtc_state.FLAG_WARM:
+        return True
+    return machine.reset_cause() == machine.WDT_RESET
+
+
+def recovery_ms(state):
+    """Milliseconds from the last sign of life before the restart until now"""
+    return (rtc_state.wall_ms() - state["alive_ms"]) & 0xFFFFFFFF
+
+
+def start(timeout_ms=constants.WDT_TIMEOUT_MS):
+    global _wdt
+    _wdt = machine.WDT(timeout=timeout_ms)
+    log.info("Watchdog armed (%ss)", timeout_ms // 1000)
+
+
+def feed():
+    """Call once per main loop pass; stamps RTC memory about once a second"""
+    global _last_stamp
+    if _wdt is None:
+        return
+    _wdt.feed()
+    now = ticks_ms()
+    if ticks_diff(now, _last_stamp) >= constants.WDT_STAMP_MS:
+        _last_stamp = now
+        rtc_state.stamp()
+
+
+def sleep_limit_ms():
+    """Longest light sleep that won't starve the watchdog (None if unarmed)"""
+    return constants.WDT_SLEEP_SLICE_MS if _wdt else None
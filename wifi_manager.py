@@ -1,17 +1,19 @@
 """
 WiFi Manager with Access Point fallback and configuration web server
+The socket and template code for the AP page are only imported in AP mode
 """
 
 import network
-import socket
 import time
+import json
 import machine
 import neopixel
 import ubinascii
 from config import get_wifi_credentials, update_wifi_credentials
-from template_loader import load_template, render_template, serve_html
-from utils import url_decode_params
+from utils import PhaseTimer
+from game_schedule import clock_synced
 import constants
+import log
 
 
 def get_ap_ssid():
@@ -22,45 +24,120 @@ def get_ap_ssid():
     return f"{constants.AP_SSID_PREFIX}-{code}"
 
 
+def load_link_cache():
+    """Load the last good BSSID, channel and IP configuration"""
+    try:
+        with open(constants.WIFI_CACHE_FILE, "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def save_link_cache(ssid, bssid, channel, ifconfig):
+    """
+    Returns the cache entry, which is kept even if the write fails
+    It is only dated when the clock is set; before NTP, the clock starts
+    again at every power-up and the lease age can't be told.
+    """
+    link = {
+        "ssid": ssid,
+        "bssid": ubinascii.hexlify(bssid).decode(),
+        "channel": channel,
+        "ifconfig": list(ifconfig),
+        "saved": time.time() if clock_synced() else None,
+    }
+    try:
+        with open(constants.WIFI_CACHE_FILE, "w") as f:
+            json.dump(link, f)
+    except Exception as e:
+        log.warning("Could not save Wi-Fi cache: %s", e)
+    return link
+
+
 class WiFiManager:
-    def __init__(self):
+    def __init__(
+        self, show_spinner=True, led_strip=None, link=None, indicator_color=None
+    ):
+        """
+        show_spinner: draw the blue loading spinner while connecting; off
+        when connecting in the background behind the cached score
+        led_strip: strip or compositor layer to draw on, so the caller's
+        power model applies
+        link: link cache entry to use instead of wifi.json (the one kept in
+        RTC memory, after a warm restart)
+        indicator_color: spinner and AP mode color, at the caller's
+        brightness
+        """
+        self.show_spinner = show_spinner
         self.wlan_sta = network.WLAN(network.STA_IF)
         self.wlan_ap = network.WLAN(network.AP_IF)
-        self.np = neopixel.NeoPixel(machine.Pin(constants.DATA_PIN), constants.NUM_LEDS)
+        self.np = led_strip or neopixel.NeoPixel(
+            machine.Pin(constants.DATA_PIN), constants.NUM_LEDS
+        )
         self.connected = False
+        self.timings = None
+        self.link = link  # link cache entry of the current connection
+        self.indicator_color = indicator_color or constants.COLOR_BLUE_AP_MODE
 
     def show_loading_spinner(self, position):
-        """Show blue loading spinner at 5% brightness"""
+        """Show blue loading spinner (5% brightness unless dimmed)"""
         self.np.fill((0, 0, 0))
         # Show current LED in blue
         if position < constants.NUM_LEDS:
-            self.np[position] = (0, 0, constants.LOADING_BRIGHTNESS_VALUE)
+            self.np[position] = self.indicator_color
+        self.np.write()
+
+    def clear_leds(self):
+        """Blank the LEDs; a compositor layer lets the score show through"""
+        if hasattr(self.np, "clear"):
+            self.np.clear()
+        else:
+            self.np.fill((0, 0, 0))
         self.np.write()
 
     def try_connect_sta(self, ssid, password, hostname, timeout=None):
-        """Try to connect to WiFi in station mode with loading spinner"""
+        """
+        Try to connect to WiFi in station mode
+        Tries a fast path with the cached BSSID (and IP configuration, if
+        recent) first, then falls back to a full scan and connect with
+        loading spinner. Phase timings are kept in self.timings.
+        """
         if timeout is None:
             timeout = constants.WIFI_CONNECT_TIMEOUT_SEC
 
         if not ssid:
-            print("No SSID configured")
+            log.warning("No SSID configured")
             return False
 
+        self.timings = PhaseTimer("Wi-Fi connect")
         self.wlan_sta.active(True)
 
         # Set hostname
         try:
             self.wlan_sta.config(dhcp_hostname=hostname)
         except Exception as e:
-            print(f"Warning: Could not set hostname: {e}")
+            log.warning("Could not set hostname: %s", e)
+        self.timings.mark("radio")
 
         if self.wlan_sta.isconnected():
-            print("Already connected to WiFi")
+            log.info("Already connected to WiFi")
             self.connected = True
             return True
 
-        print(f"Connecting to {ssid} as '{hostname}'...")
-        self.wlan_sta.connect(ssid, password)
+        cache = self.link or load_link_cache()
+        self.link = None
+        if cache and cache.get("ssid", ssid) == ssid:
+            if self.try_fast_connect(ssid, password, cache):
+                self.on_connected(hostname)
+                return True
+
+        log.info("Connecting to %s as '%s'...", ssid, hostname)
+        bssid, channel = self.scan_for(ssid)
+        self.timings.mark("scan")
+        if bssid:
+            self.wlan_sta.connect(ssid, password, bssid=bssid)
+        else:
+            self.wlan_sta.connect(ssid, password)
 
         # Wait for connection with loading spinner
         max_wait = timeout * 10  # Check every 0.1 seconds
@@ -68,30 +145,101 @@ class WiFiManager:
 
         while max_wait > 0:
             if self.wlan_sta.isconnected():
+                self.timings.mark("associate+dhcp")
                 # Clear LEDs after successful connection
-                self.np.fill((0, 0, 0))
-                self.np.write()
-                print("Wi-Fi Connected!")
-                print(f"IP Address: {self.wlan_sta.ifconfig()[0]}")
-                print(f"Hostname: {hostname}")
-                self.connected = True
+                if self.show_spinner:
+                    self.clear_leds()
+                if bssid:
+                    self.link = save_link_cache(
+                        ssid, bssid, channel, self.wlan_sta.ifconfig()
+                    )
+                self.on_connected(hostname)
                 return True
 
             # Update loading spinner
-            self.show_loading_spinner(led_position)
-            led_position = (led_position + 1) % constants.NUM_LEDS
+            if self.show_spinner:
+                self.show_loading_spinner(led_position)
+                led_position = (led_position + 1) % constants.NUM_LEDS
 
             max_wait -= 1
             time.sleep(constants.WIFI_CHECK_INTERVAL_SEC)
 
-        print("Failed to connect to WiFi")
+        self.timings.mark("timeout")
+        self.timings.report()
+        log.warning("Failed to connect to WiFi")
         self.wlan_sta.active(False)
         return False
 
+    def try_fast_connect(self, ssid, password, cache):
+        """
+        Reconnect straight to the cached access point, skipping the scan
+        The cached IP configuration is reused (skipping DHCP) right after a
+        warm restart, or while it is young enough that the router should
+        still hold the lease. Without a set clock its age is unknown: DHCP.
+        """
+        bssid = ubinascii.unhexlify(cache["bssid"])
+        saved = cache.get("saved")
+        static = cache.get("warm", False)
+        if not static and saved is not None and clock_synced():
+            static = 0 <= time.time() - saved < constants.WIFI_LEASE_REUSE_SEC
+
+        try:
+            self.wlan_sta.config(channel=cache["channel"])
+        except Exception:
+            pass  # Not every firmware lets a station pick its channel
+        if static:
+            self.wlan_sta.ifconfig(tuple(cache["ifconfig"]))
+
+        log.info("Fast reconnect to %s (%s)", ssid, "cached IP" if static else "DHCP")
+        self.wlan_sta.connect(ssid, password, bssid=bssid)
+
+        start = time.ticks_ms()
+        while time.ticks_diff(time.ticks_ms(), start) < constants.WIFI_FAST_TIMEOUT_MS:
+            if self.wlan_sta.isconnected():
+                self.timings.mark("fast-associate")
+                if static:
+                    self.link = cache
+                else:
+                    self.link = save_link_cache(
+                        ssid, bssid, cache["channel"], self.wlan_sta.ifconfig()
+                    )
+                return True
+            time.sleep_ms(10)
+
+        self.timings.mark("fast-failed")
+        log.warning("Fast reconnect failed, doing a full connect")
+        self.wlan_sta.disconnect()
+        if static:
+            self.wlan_sta.ifconfig("dhcp")
+        return False
+
+    def scan_for(self, ssid):
+        """Returns (bssid, channel) of the strongest AP for ssid, or (None, None)"""
+        best = None
+        try:
+            for net in self.wlan_sta.scan():
+                # (ssid, bssid, channel, RSSI, security, hidden)
+                if net[0].decode() == ssid and (best is None or net[3] > best[3]):
+                    best = net
+        except Exception as e:
+            log.warning("Scan failed: %s", e)
+        if best is None:
+            return None, None
+        return best[1], best[2]
+
+    def on_connected(self, hostname):
+        log.info(
+            "Wi-Fi Connected! IP Address: %s, Hostname: %s",
+            self.wlan_sta.ifconfig()[0],
+            hostname,
+        )
+        self.timings.report()
+        self.connected = True
+
     def start_access_point(self):
         """Start access point mode for configuration"""
         ap_ssid = get_ap_ssid()
-        print(f"Starting Access Point: {ap_ssid}")
+        log.info("Starting Access Point: %s", ap_ssid)
         self.wlan_ap.active(True)
         self.wlan_ap.config(essid=ap_ssid, password=constants.AP_PASSWORD)
 
@@ -99,45 +247,108 @@ class WiFiManager:
         while not self.wlan_ap.active():
             time.sleep(0.1)
 
-        print(f"AP Started: {ap_ssid}")
-        print(f"AP Password: {constants.AP_PASSWORD}")
-        print(f"AP IP: {self.wlan_ap.ifconfig()[0]}")
+        log.info(
+            "AP Started: %s, Password: %s, IP: %s",
+            ap_ssid,
+            constants.AP_PASSWORD,
+            self.wlan_ap.ifconfig()[0],
+        )
         return True
 
-    def serve_config_page(self):
-        """Serve configuration web page"""
+    def serve_config_page(self, ssid="", password=""):
+        """
+        Serve configuration web page
+        The accept loop is non-blocking so the configured network can be
+        retried on a backoff schedule in between requests. Returns True
+        once the station reconnects (AP mode is then shut down).
+        """
+        import socket
+
         addr = socket.getaddrinfo("0.0.0.0", 80)[0][-1]
         s = socket.socket()
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         s.bind(addr)
         s.listen(1)
+        s.setblocking(False)
+
+        log.info(
+            "Configuration server running, visit: http://%s", self.wlan_ap.ifconfig()[0]
+        )
 
-        print("Configuration server running on port 80")
-        print(f"Visit: http://{self.wlan_ap.ifconfig()[0]}")
+        outage_start = time.ticks_ms()
+        retry_delays = constants.AP_STA_RETRY_SEC
+        attempt = 0
+        next_try = time.ticks_add(outage_start, retry_delays[0] * 1000)
+        connect_started = None
 
         while True:
             try:
                 cl, addr = s.accept()
-                print(f"Client connected from {addr}")
-                request = cl.recv(1024).decode("utf-8")
-
-                # Parse request
-                if "GET / " in request or "GET /config" in request:
-                    response = self.get_config_html()
-                elif "POST /save" in request:
-                    response = self.handle_config_save(request)
-                else:
-                    response = "HTTP/1.1 404 Not Found\r\n\r\n"
+            except OSError:
+                cl = None  # No client waiting
+
+            if cl:
+                self.handle_client(cl, addr)
+
+            now = time.ticks_ms()
+            if not ssid:
+                pass  # Nothing to retry until the user saves a network
+            elif connect_started is not None:
+                if self.wlan_sta.isconnected():
+                    recovery_ms = time.ticks_diff(now, outage_start)
+                    log.info(
+                        "Station reconnected after %ss in AP mode (%s attempts), "
+                        "leaving AP mode",
+                        recovery_ms // 1000,
+                        attempt,
+                    )
+                    s.close()
+                    self.wlan_ap.active(False)
+                    self.connected = True
+                    return True
+                if time.ticks_diff(now, connect_started) > (
+                    constants.WIFI_CONNECT_TIMEOUT_SEC * 1000
+                ):
+                    self.wlan_sta.disconnect()
+                    connect_started = None
+                    delay = retry_delays[min(attempt, len(retry_delays) - 1)]
+                    next_try = time.ticks_add(now, delay * 1000)
+                    log.warning("%s still unreachable, next try in %ss", ssid, delay)
+            elif time.ticks_diff(now, next_try) >= 0:
+                attempt += 1
+                log.debug("Retrying %s (attempt %d)", ssid, attempt)
+                self.wlan_sta.active(True)
+                self.wlan_sta.connect(ssid, password)
+                connect_started = now
+
+            time.sleep_ms(constants.AP_LOOP_INTERVAL_MS)
+
+    def handle_client(self, cl, addr):
+        """Answer one request on the AP configuration page"""
+        try:
+            cl.settimeout(constants.AP_CLIENT_TIMEOUT_SEC)
+            log.debug("Client connected from %s", addr)
+            request = cl.recv(1024).decode("utf-8")
+
+            # Parse request
+            if "GET / " in request or "GET /config" in request:
+                response = self.get_config_html()
+            elif "POST /save" in request:
+                response = self.handle_config_save(request)
+            else:
+                response = "HTTP/1.1 404 Not Found\r\n\r\n"
 
-                cl.send(response.encode("utf-8"))
-                cl.close()
+            cl.send(response.encode("utf-8"))
 
-            except OSError as e:
-                print(f"Server error: {e}")
-                cl.close()
+        except OSError as e:
+            log.error("Server error: %s", e, site="ap-server")
+        finally:
+            cl.close()
 
     def get_config_html(self):
         """Generate configuration HTML page"""
+        from template_loader import load_template, render_template, serve_html
+
         ssid, password, hostname = get_wifi_credentials()
         ap_ssid = get_ap_ssid()
         device_code = ap_ssid.split("-")[1]
@@ -155,6 +366,9 @@ class WiFiManager:
 
     def handle_config_save(self, request):
         """Handle configuration save from POST request"""
+        from template_loader import load_template, serve_html
+        from utils import url_decode_params
+
         try:
             # Extract form data from POST request
             body = request.split("\r\n\r\n")[1] if "\r\n\r\n" in request else ""
@@ -180,29 +394,31 @@ class WiFiManager:
                 return "HTTP/1.1 400 Bad Request\r\n\r\nInvalid parameters"
 
         except Exception as e:
-            print(f"Error saving config: {e}")
+            log.error("Error saving config: %s", e)
             return f"HTTP/1.1 500 Internal Server Error\r\n\r\nError: {e}"
 
-    def connect(self):
-        """Main connection logic with fallback to AP mode"""
-        ssid, password, hostname = get_wifi_credentials()
+    def connect(self, credentials=None):
+        """
+        Main connection logic with fallback to AP mode
+        credentials: (ssid, password, hostname) from an already loaded
+        config, to save reading config.json again
+        """
+        ssid, password, hostname = credentials or get_wifi_credentials()
 
         # Try to connect to configured WiFi
         if self.try_connect_sta(ssid, password, hostname):
             return True
 
         # If connection failed, start AP mode
-        print("Could not connect to WiFi. Starting configuration mode...")
+        log.warning("Could not connect to WiFi. Starting configuration mode...")
         self.start_access_point()
 
         # Show solid blue at 5% brightness to indicate AP mode
-        self.np.fill(constants.COLOR_BLUE_AP_MODE)
+        self.np.fill(self.indicator_color)
         self.np.write()
 
-        # Serve configuration page
-        self.serve_config_page()
-
-        return False
+        # Serve configuration page, retrying the station in the background
+        return self.serve_config_page(ssid, password)
 
 
 def connect_wifi():